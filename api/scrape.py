@@ -1,8 +1,14 @@
+import asyncio
+import hmac
 import json
+import logging
 import os
 import sys
+import time
 import traceback
+from types import SimpleNamespace
 from typing import Any
+from urllib.parse import parse_qs
 
 # Resolve project root robustly (works in Vercel packaged FS)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -11,16 +17,106 @@ CANDIDATES = [
     os.path.normpath(os.path.join(BASE_DIR, '..', '..', 'src', 'script')),
     os.path.normpath(os.path.join(os.getcwd(), 'src', 'script')),
 ]
-for p in CANDIDATES:
-    if os.path.isdir(p) and p not in sys.path:
-        sys.path.append(p)
 
 IMPORT_ERROR = None
 UniversalRedDeerToyotaScraper = None
-try:
-    from toyota_scrapper import UniversalRedDeerToyotaScraper  # type: ignore
-except Exception as e:
-    IMPORT_ERROR = e
+AsyncRedDeerToyotaScraper = None
+JsonInventorySource = None
+ScrapeMetrics = None
+SamplingProfiler = None
+profiling = None
+_SCRAPER_LOADED = False
+
+# Reused across warm invocations of the same instance: scraper (HTTP session, connection
+# pool, caches) and the event loop its aiohttp session is bound to
+_SCRAPER = None
+_LOOP = None
+_RESULT_CACHE = None
+
+# Concurrent page fetches per invocation when the async backend is available
+MAX_CONCURRENCY = int(os.environ.get('SCRAPE_MAX_CONCURRENCY', '8'))
+# Only /tmp is writable on Vercel; it survives between warm invocations
+CACHE_DIR = os.environ.get('SCRAPER_CACHE_DIR', '/tmp/red-deer-toyota')
+# Dealer inventory JSON endpoint - when set, listing HTML is never fetched or parsed
+INVENTORY_API = os.environ.get('SCRAPER_INVENTORY_API')
+# Whole-result cache: fresh for RESULT_TTL seconds, then served stale for up to RESULT_STALE_TTL
+# more while one scrape refreshes it. The request that finds it stale waits up to RESULT_REFRESH_WAIT
+# seconds for that refresh - once the response is sent a frozen serverless instance stops it.
+# RESULT_STORE (a .json or .db/.sqlite path) persists results beyond this process
+RESULT_TTL = int(os.environ.get('SCRAPE_RESULT_TTL', '300'))
+RESULT_STALE_TTL = int(os.environ.get('SCRAPE_RESULT_STALE_TTL', '3600'))
+RESULT_REFRESH_WAIT = float(os.environ.get('SCRAPE_RESULT_REFRESH_WAIT', '5'))
+RESULT_STORE = os.environ.get('SCRAPE_RESULT_STORE')
+# Requests that join another request's scrape give up after RESULT_WAIT_TIMEOUT seconds - the
+# function's max duration, so they fail with an error instead of being killed by the platform
+RESULT_WAIT_TIMEOUT = float(os.environ.get('SCRAPE_RESULT_WAIT_TIMEOUT', '300'))
+RESULT_KEY = 'inventory:{}'.format(INVENTORY_API or 'listing')
+# Stage timings and counters of the scrape behind each response, as a compact "metrics" summary
+METRICS_ENABLED = os.environ.get('SCRAPE_METRICS', '1').lower() in ('1', 'true', 'yes')
+# ?profile=1 runs one uncached scrape under the sampling profiler - only with the x-action-secret header,
+# and never when ACTION_TRIGGER_SECRET is unset
+ACTION_SECRET = os.environ.get('ACTION_TRIGGER_SECRET')
+PROFILE_INTERVAL = float(os.environ.get('SCRAPE_PROFILE_INTERVAL', '0.002'))
+PROFILE_TOP = int(os.environ.get('SCRAPE_PROFILE_TOP', '25'))
+
+
+def _load_scraper():
+    """Import the scraper on first use, once per process - requests/bs4 and the pattern
+    tables are only paid for by invocations that actually scrape"""
+    global _SCRAPER_LOADED, IMPORT_ERROR, UniversalRedDeerToyotaScraper, AsyncRedDeerToyotaScraper
+    global JsonInventorySource, ScrapeMetrics, SamplingProfiler, profiling
+    if _SCRAPER_LOADED:
+        return
+    _SCRAPER_LOADED = True
+    for p in CANDIDATES:
+        if os.path.isdir(p) and p not in sys.path:
+            sys.path.append(p)
+    try:
+        from toyota_scrapper import (  # type: ignore
+            UniversalRedDeerToyotaScraper, AsyncRedDeerToyotaScraper, JsonInventorySource, async_backend_available,
+        )
+        from scrape_metrics import ScrapeMetrics  # type: ignore
+        from scrape_profiler import SamplingProfiler, profiling  # type: ignore
+        if not async_backend_available():
+            AsyncRedDeerToyotaScraper = None
+    except Exception as e:
+        IMPORT_ERROR = e
+
+
+def _new_scraper(cache_dir, metrics, persistent_session):
+    """A scraper for this deployment - the async backend when aiohttp is installed"""
+    source = JsonInventorySource(INVENTORY_API) if INVENTORY_API else None
+    if AsyncRedDeerToyotaScraper is not None:
+        # Fan out over listing pages concurrently to stay within the function timeout
+        return AsyncRedDeerToyotaScraper(max_concurrency=MAX_CONCURRENCY, cache_dir=cache_dir, source=source,
+                                         persistent_session=persistent_session, metrics=metrics)
+    return UniversalRedDeerToyotaScraper(cache_dir=cache_dir, source=source, metrics=metrics)
+
+
+def _get_scraper():
+    """The process-wide scraper, built on the first invocation and reused while warm"""
+    global _SCRAPER
+    if _SCRAPER is None:
+        _SCRAPER = _new_scraper(CACHE_DIR, ScrapeMetrics(enabled=METRICS_ENABLED), persistent_session=True)
+    return _SCRAPER
+
+
+def _get_result_cache():
+    """The process-wide result cache - shared by buffered and streamed requests"""
+    global _RESULT_CACHE
+    if _RESULT_CACHE is None:
+        from result_cache import ResultCache  # type: ignore
+        _RESULT_CACHE = ResultCache(ttl=RESULT_TTL, stale_ttl=RESULT_STALE_TTL, path=RESULT_STORE,
+                                    refresh_wait=RESULT_REFRESH_WAIT, wait_timeout=RESULT_WAIT_TIMEOUT)
+    return _RESULT_CACHE
+
+
+def _run_async(coroutine):
+    """Run on the long-lived event loop so the scraper's aiohttp session stays usable"""
+    global _LOOP
+    if _LOOP is None or _LOOP.is_closed():
+        _LOOP = asyncio.new_event_loop()
+    return _LOOP.run_until_complete(coroutine)
 
 
 def _json_response(status: int, body: Any):
@@ -34,16 +130,241 @@ def _json_response(status: int, body: Any):
     }
 
 
-def handler(request, response=None):
+def _cached_response(entry, state, if_none_match=None):
+    """200 with the cached body, or an empty 304 when the client already holds this ETag
+
+    A result the cache refused to keep (an empty scrape) is marked no-store so a CDN does not keep it either.
+    """
+    cache = _get_result_cache()
+    if entry.get("cached", True):
+        cache_control = "public, max-age=0, s-maxage={}, stale-while-revalidate={}".format(
+            cache.ttl, cache.stale_ttl)
+    else:
+        cache_control = "no-store"
+    headers = {
+        "Content-Type": "application/json",
+        "Cache-Control": cache_control,
+        "ETag": entry["etag"],
+        "Age": str(int(cache.age(entry))),
+        "X-Cache": state,
+    }
+    if if_none_match and entry["etag"] in [tag.strip() for tag in if_none_match.split(",")]:
+        return {"statusCode": 304, "headers": headers, "body": ""}
+    return {"statusCode": 200, "headers": headers, "body": entry["body"]}
+
+
+def _request_value(mapping, name):
+    """First value for name from a query/header mapping whose values may be lists"""
+    value = (mapping or {}).get(name)
+    if isinstance(value, (list, tuple)):
+        value = value[0] if value else None
+    return value
+
+
+def _is_forced(query):
+    """?force=1 skips the cached result and always scrapes"""
+    return str(_request_value(query, "force") or "").lower() in ("1", "true", "yes")
+
+
+def _is_profiled(query):
+    """?profile=1 asks for a profiled scrape"""
+    return str(_request_value(query, "profile") or "").lower() in ("1", "true", "yes")
+
+
+def _profile_response(headers):
+    """Scrape once under the sampling profiler and return per-stage hot functions with speedscope
+    and collapsed-stack data - the result cache is neither read nor filled
+
+    The scrape runs on a scraper of its own, with the same backend as _scrape_result but no page
+    caches, so it never shares state with the process-wide scraper or a refresh running on it.
+    """
+    provided = _request_value(headers, "x-action-secret") or _request_value(headers, "X-Action-Secret") or ""
+    if not ACTION_SECRET or not hmac.compare_digest(provided.encode("utf-8"), ACTION_SECRET.encode("utf-8")):
+        return _json_response(401, {"error": "Unauthorized"})
+    scraper = _new_scraper(None, ScrapeMetrics(), persistent_session=False)
+    profiler = SamplingProfiler(interval=PROFILE_INTERVAL, top=PROFILE_TOP)
+    with profiling(scraper, profiler):
+        if AsyncRedDeerToyotaScraper is not None and isinstance(scraper, AsyncRedDeerToyotaScraper):
+            vehicles = asyncio.run(scraper.scrape_inventory_async())
+        else:
+            vehicles = scraper.scrape_inventory()
+    return _json_response(200, {
+        "ok": True,
+        "count": len(vehicles or []),
+        "metrics": scraper.metrics.summary(),
+        "profile": profiler.report(),
+        "speedscope": profiler.speedscope(),
+        "collapsed": profiler.collapsed(),
+    })
+
+
+def _scrape_result():
+    """Run a full scrape - (serialized body, cacheable); empty results are never cached"""
+    scraper = _get_scraper()
+    if AsyncRedDeerToyotaScraper is not None and isinstance(scraper, AsyncRedDeerToyotaScraper):
+        vehicles = _run_async(scraper.scrape_inventory_async())
+    else:
+        vehicles = scraper.scrape_inventory()
+    # Return normalized data; UI already expects sale_value support
+    vehicles = [vehicle.to_dict() for vehicle in vehicles or []]
+    result = {
+        "ok": True,
+        "count": len(vehicles),
+        "vehicles": vehicles,
+    }
+    if scraper.metrics.enabled:
+        result["metrics"] = scraper.metrics.summary()
+    body = json.dumps(result)
+    return body, bool(vehicles)
+
+
+STREAM_CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+HTTP_STATUS = {200: "200 OK", 304: "304 Not Modified", 401: "401 Unauthorized", 405: "405 Method Not Allowed",
+               500: "500 Internal Server Error"}
+
+
+class _ErrorCollector(logging.Handler):
+    """Collects scraper error log lines (failed pages etc.) for the stream summary"""
+
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def _stream_mode(query, accept):
+    """ndjson / sse when the client asked for a streamed response, else None (buffered JSON)"""
+    mode = (query.get("stream") or [""])[0].lower()
+    if mode in ("1", "true", "ndjson"):
+        return "ndjson"
+    if mode == "sse" or "text/event-stream" in accept:
+        return "sse"
+    if "application/x-ndjson" in accept:
+        return "ndjson"
+    return None
+
+
+def _event(mode, kind, data):
+    """One NDJSON line or SSE event"""
+    payload = json.dumps(data)
+    if mode == "sse":
+        return "event: {}\ndata: {}\n\n".format(kind, payload).encode("utf-8")
+    return (json.dumps({"type": kind, "data": data}) + "\n").encode("utf-8")
+
+
+def _replay_vehicles(mode, entry, state, started):
+    """Stream a cached or coalesced result in the same shape as a live scrape"""
+    result = json.loads(entry["body"])
+    vehicles = result["vehicles"]
+    for vehicle in vehicles:
+        yield _event(mode, "vehicle", vehicle)
+    summary = {
+        "ok": True,
+        "count": len(vehicles),
+        "elapsed_seconds": round(time.time() - started, 3),
+        "errors": [],
+        "cache": state,
+        "age_seconds": int(_get_result_cache().age(entry)),
+    }
+    if "metrics" in result:
+        summary["metrics"] = result["metrics"]
+    yield _event(mode, "summary", summary)
+
+
+def _stream_vehicles(mode, force=False):
+    """Vehicle events as listing pages are processed, then a summary with count, timing and errors
+
+    A cached result is replayed instead of scraping, and a request arriving while another
+    scrape is in flight waits for it, so parallel refreshes never hit the dealer site twice.
+    """
+    started = time.time()
+    cache = _get_result_cache()
+    if not force:
+        entry = cache.lookup(RESULT_KEY)
+        if entry is not None:
+            state = "HIT"
+            if not cache.is_fresh(entry):
+                state = "STALE"
+                refreshed = cache.revalidate(RESULT_KEY, _scrape_result)
+                if refreshed is not None:
+                    entry, state = refreshed, "REVALIDATED"
+            yield from _replay_vehicles(mode, entry, state, started)
+            return
+
+    flight, leader = cache.begin(RESULT_KEY)
+    if not leader:
+        try:
+            entry = flight.wait(cache.wait_timeout)
+        except Exception as e:
+            yield _event(mode, "summary", {
+                "ok": False,
+                "count": 0,
+                "elapsed_seconds": round(time.time() - started, 3),
+                "errors": [str(e)],
+            })
+            return
+        yield from _replay_vehicles(mode, entry, "COALESCED", started)
+        return
+
+    errors = _ErrorCollector()
+    scraper_logger = logging.getLogger("toyota_scrapper")
+    scraper_logger.addHandler(errors)
+    vehicles = []
+    ok = True
+    finished = False
+    scraper = None
+    try:
+        # The sync streaming pipeline works on either scraper - both share the requests session
+        scraper = _get_scraper()
+        for vehicle in scraper.iter_vehicles():
+            vehicle = vehicle.to_dict()
+            vehicles.append(vehicle)
+            yield _event(mode, "vehicle", vehicle)
+        finished = True
+        result = {"ok": True, "count": len(vehicles), "vehicles": vehicles}
+        if scraper.metrics.enabled:
+            result["metrics"] = scraper.metrics.summary()
+        body = json.dumps(result)
+        cache.complete(RESULT_KEY, flight, body, cacheable=bool(vehicles))
+    except Exception as e:
+        ok = False
+        errors.messages.append(str(e))
+        cache.complete(RESULT_KEY, flight, error=e)
+    finally:
+        scraper_logger.removeHandler(errors)
+        if not finished and not flight.event.is_set():
+            # Client disconnected mid-stream - release the waiters without caching a partial result
+            cache.complete(RESULT_KEY, flight, error=RuntimeError("Scrape aborted before completion"))
+    summary = {
+        "ok": ok,
+        "count": len(vehicles),
+        "elapsed_seconds": round(time.time() - started, 3),
+        "errors": errors.messages,
+        "cache": "BYPASS" if force else "MISS",
+    }
+    if scraper is not None and scraper.metrics.enabled:
+        summary["metrics"] = scraper.metrics.summary()
+    yield _event(mode, "summary", summary)
+
+
+def _buffered_response(request):
     """
-    Vercel Python Serverless Function entrypoint.
     Runs the scraper and returns latest vehicles as JSON without committing to GitHub.
+    Results are cached (see RESULT_TTL) with an ETag; concurrent requests share one scrape
+    and ?force=1 bypasses the cache. ?profile=1 with the x-action-secret header returns a
+    profile of one fresh scrape instead of vehicles.
     """
     # Basic method guard (allow GET/POST)
     method = getattr(request, 'method', 'GET').upper()
     if method not in ("GET", "POST"):
         return _json_response(405, {"error": "Method Not Allowed"})
 
+    _load_scraper()
     if IMPORT_ERROR or UniversalRedDeerToyotaScraper is None:
         return _json_response(500, {
             "error": "Scraper import failed",
@@ -54,13 +375,53 @@ def handler(request, response=None):
         })
 
     try:
-        scraper = UniversalRedDeerToyotaScraper()
-        vehicles = scraper.scrape_inventory()
-        # Return normalized data; UI already expects sale_value support
-        return _json_response(200, {
-            "ok": True,
-            "count": len(vehicles or []),
-            "vehicles": vehicles or [],
-        })
+        if _is_profiled(getattr(request, 'query', None)):
+            return _profile_response(getattr(request, 'headers', None))
+        force = _is_forced(getattr(request, 'query', None))
+        entry, state = _get_result_cache().get(RESULT_KEY, _scrape_result, force=force)
+        return _cached_response(entry, state, _request_value(getattr(request, 'headers', None), "If-None-Match"))
     except Exception as e:
         return _json_response(500, {"error": str(e), "trace": traceback.format_exc()})
+
+
+def app(environ, start_response):
+    """
+    Vercel Python Serverless Function entrypoint (WSGI) - the only one this module lists, so the
+    runtime always serves it. Buffered JSON (see _buffered_response), or ?stream=ndjson / ?stream=sse
+    (or a matching Accept header) to send each vehicle as soon as its page is processed, ending with
+    a summary record. Both are served from the result cache unless ?force=1. ?profile=1 is always buffered.
+    """
+    method = environ.get("REQUEST_METHOD", "GET").upper()
+    query = parse_qs(environ.get("QUERY_STRING", ""))
+    mode = _stream_mode(query, environ.get("HTTP_ACCEPT", ""))
+    _load_scraper()
+
+    if (mode is None or _is_profiled(query) or method not in ("GET", "POST") or IMPORT_ERROR
+            or UniversalRedDeerToyotaScraper is None):
+        result = _buffered_response(SimpleNamespace(
+            method=method, query=query,
+            headers={"If-None-Match": environ.get("HTTP_IF_NONE_MATCH"),
+                     "x-action-secret": environ.get("HTTP_X_ACTION_SECRET")}))
+        start_response(HTTP_STATUS.get(result["statusCode"], str(result["statusCode"])),
+                       list(result["headers"].items()))
+        return [result["body"].encode("utf-8")]
+
+    start_response("200 OK", [
+        ("Content-Type", STREAM_CONTENT_TYPES[mode]),
+        ("Cache-Control", "no-store"),
+        ("X-Accel-Buffering", "no"),
+    ])
+    return _stream_vehicles(mode, force=_is_forced(query))
+
+
+def _handler(request, response=None):
+    """Former function-style entrypoint, kept for callers that import it - buffered JSON only"""
+    return _buffered_response(request)
+
+
+def __getattr__(name):
+    # handler stays importable, but is resolved lazily so dir() - what the Vercel runtime inspects to
+    # choose an entrypoint - only lists app, and streamed responses keep being served
+    if name == "handler":
+        return _handler
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
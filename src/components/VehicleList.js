@@ -2,6 +2,101 @@ import React, { useEffect, useState } from 'react';
 import Papa from 'papaparse';
 import Poster from './VehiclePoster';
 
+const DATA_URL = `${process.env.PUBLIC_URL || ''}/data`;
+const SNAPSHOT_STORAGE_KEY = 'inventory-snapshot';
+
+// Normalize fields
+const normalizeRow = (row) => ({
+  makeName: row.makeName || row.Make || '',
+  year: row.year || row.Year || '',
+  model: row.model || row.Model || '',
+  'sub-model': row['sub-model'] || row.SubModel || row.Submodel || '',
+  trim: row.trim || row.Trim || '',
+  mileage: row.mileage || row.Mileage || '',
+  value: row.value || row.Price || row.price || '',
+  sale_value: row.sale_value || row.Sale || row.SalePrice || row.salePrice || '',
+  stock_number: row.stock_number || row.Stock || row.StockNumber || '',
+  engine: row.engine || row.Engine || '',
+});
+
+const loadFromCsv = async () => {
+  const res = await fetch(`${DATA_URL}/inventory.csv`, { cache: 'no-store' });
+  if (!res.ok) throw new Error(`Failed to fetch CSV: ${res.status}`);
+  const { data, errors } = Papa.parse(await res.text(), { header: true, skipEmptyLines: true });
+  if (errors && errors.length) {
+    console.warn('CSV parse errors:', errors);
+  }
+  return data;
+};
+
+// Typed columns with dictionary-encoded text; numbers come back as strings, like the CSV
+const loadFromColumns = async () => {
+  const res = await fetch(`${DATA_URL}/inventory.columns.json`, { cache: 'no-cache' });
+  if (!res.ok) return null;
+  const { count, fields, columns } = await res.json();
+  const decoded = fields.map((field) => {
+    const column = columns[field];
+    if (!Array.isArray(column)) return column.codes.map((code) => column.dictionary[code]);
+    return column.map((value) => (value === null ? '' : String(value)));
+  });
+  return Array.from({ length: count }, (_, i) => Object.fromEntries(fields.map((field, j) => [field, decoded[j][i]])));
+};
+
+// Replay change-feed deltas (oldest first) onto a cached { version, fields, keys, rows } snapshot
+const applyDeltas = (snapshot, deltas) => {
+  const column = Object.fromEntries(snapshot.fields.map((field, i) => [field, i]));
+  const rows = new Map(snapshot.keys.map((key, i) => [key, snapshot.rows[i]]));
+  for (const delta of deltas) {
+    delta.removed.forEach((key) => rows.delete(key));
+    [...delta.added, ...delta.updated].forEach(({ key, row }) => rows.set(key, row));
+    for (const change of [...delta.price_changed, ...delta.mileage_changed]) {
+      const row = rows.get(change.key);
+      if (!row) continue;
+      const next = [...row];
+      Object.entries(change).forEach(([field, value]) => {
+        if (field in column) next[column[field]] = value;
+      });
+      rows.set(change.key, next);
+    }
+  }
+  return { version: deltas[deltas.length - 1].to, fields: snapshot.fields, keys: [...rows.keys()], rows: [...rows.values()] };
+};
+
+// changes.json is tiny; the full content-hashed snapshot is only fetched when the cached copy
+// is missing or too far behind for the deltas the feed still carries
+const loadFromChangeFeed = async () => {
+  const res = await fetch(`${DATA_URL}/changes.json`, { cache: 'no-cache' });
+  if (!res.ok) return null;
+  const feed = await res.json();
+
+  let cached = null;
+  try {
+    cached = JSON.parse(localStorage.getItem(SNAPSHOT_STORAGE_KEY));
+  } catch {
+    cached = null;
+  }
+  let snapshot = null;
+  if (cached && cached.fields?.join() === feed.fields.join()) {
+    if (cached.version === feed.version) {
+      snapshot = cached;
+    } else {
+      const start = feed.deltas.findIndex((delta) => delta.from === cached.version);
+      if (start !== -1) snapshot = applyDeltas(cached, feed.deltas.slice(start));
+    }
+  }
+  if (!snapshot) {
+    const snapshotRes = await fetch(`${DATA_URL}/${feed.snapshot}`);
+    if (!snapshotRes.ok) return null;
+    snapshot = { version: feed.version, ...(await snapshotRes.json()) };
+  }
+  try {
+    localStorage.setItem(SNAPSHOT_STORAGE_KEY, JSON.stringify(snapshot));
+  } catch {
+    // Storage full or disabled - the next visit just fetches the snapshot again
+  }
+  return snapshot.rows.map((row) => Object.fromEntries(snapshot.fields.map((field, i) => [field, row[i] ?? ''])));
+};
+
 const VehicleList = () => {
   const [vehicles, setVehicles] = useState([]);
   const [error, setError] = useState('');
@@ -11,32 +106,14 @@ const VehicleList = () => {
   const [useDirectScrape, setUseDirectScrape] = useState(true);
 
   useEffect(() => {
-    const url = `${process.env.PUBLIC_URL || ''}/data/inventory.csv`;
-    fetch(url, { cache: 'no-store' })
-      .then((res) => {
-        if (!res.ok) throw new Error(`Failed to fetch CSV: ${res.status}`);
-        return res.text();
-      })
-      .then((csvText) => {
-        const { data, errors } = Papa.parse(csvText, { header: true, skipEmptyLines: true });
-        if (errors && errors.length) {
-          console.warn('CSV parse errors:', errors);
-        }
-        // Normalize fields
-        const normalized = data.map((row) => ({
-          makeName: row.makeName || row.Make || '',
-          year: row.year || row.Year || '',
-          model: row.model || row.Model || '',
-          'sub-model': row['sub-model'] || row.SubModel || row.Submodel || '',
-          trim: row.trim || row.Trim || '',
-          mileage: row.mileage || row.Mileage || '',
-          value: row.value || row.Price || row.price || '',
-          sale_value: row.sale_value || row.Sale || row.SalePrice || row.salePrice || '',
-          stock_number: row.stock_number || row.Stock || row.StockNumber || '',
-          engine: row.engine || row.Engine || '',
-        }));
-        setVehicles(normalized);
+    loadFromChangeFeed()
+      .catch((e) => {
+        console.warn('Change feed unavailable, loading full inventory:', e);
+        return null;
       })
+      .then((fromFeed) => fromFeed || loadFromColumns().catch(() => null))
+      .then((rows) => rows || loadFromCsv())
+      .then((rows) => setVehicles(rows.map(normalizeRow)))
       .catch((e) => setError(e.message))
       .finally(() => setLoading(false));
   }, []);
@@ -46,12 +123,10 @@ const VehicleList = () => {
       setRefreshing(true);
       setRefreshMsg('');
       if (useDirectScrape) {
-        // Directly call serverless Python function to scrape and return JSON
-        const res = await fetch('/api/scrape');
-        const data = await res.json();
-        if (!res.ok || !data?.ok) throw new Error(data?.error || 'Scrape failed');
+        // Directly call serverless Python function; vehicles stream in as NDJSON while pages are scraped
+        const res = await fetch('/api/scrape?stream=ndjson');
         // Transform to match CSV-normalized fields if needed
-        const normalized = (data.vehicles || []).map((row) => ({
+        const normalize = (row) => ({
           makeName: row.makeName || '',
           year: row.year || '',
           model: row.model || '',
@@ -62,9 +137,43 @@ const VehicleList = () => {
           sale_value: row.sale_value || '',
           stock_number: row.stock_number || '',
           engine: row.engine || '',
-        }));
-        setVehicles(normalized);
-        setRefreshMsg(`Fetched ${normalized.length} vehicles`);
+        });
+        const contentType = res.headers.get('Content-Type') || '';
+        if (!contentType.includes('ndjson') || !res.body) {
+          // Buffered JSON response
+          const data = await res.json();
+          if (!res.ok || !data?.ok) throw new Error(data?.error || 'Scrape failed');
+          const normalized = (data.vehicles || []).map(normalize);
+          setVehicles(normalized);
+          setRefreshMsg(`Fetched ${normalized.length} vehicles`);
+          return;
+        }
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        const streamed = [];
+        let buffer = '';
+        let summary = null;
+        for (;;) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+          const lines = buffer.split('\n');
+          buffer = lines.pop();
+          const batch = [];
+          for (const line of lines) {
+            if (!line.trim()) continue;
+            const record = JSON.parse(line);
+            if (record.type === 'vehicle') batch.push(normalize(record.data));
+            else if (record.type === 'summary') summary = record.data;
+          }
+          if (batch.length) {
+            streamed.push(...batch);
+            setVehicles([...streamed]);
+            setRefreshMsg(`Fetched ${streamed.length} vehicles so far…`);
+          }
+        }
+        if (!summary?.ok) throw new Error(summary?.errors?.[0] || 'Scrape failed');
+        setRefreshMsg(`Fetched ${summary.count} vehicles`);
       } else {
         // Fallback: dispatch GitHub Action to run scraper and redeploy
         const res = await fetch('/api/trigger-scrape', {
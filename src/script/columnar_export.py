@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Compact columnar export for the frontend
+Writes inventory as typed columns with dictionary-encoded text fields, plus precompressed
+.gz/.br siblings for static hosting and an optional Parquet file for analytics
+"""
+
+import gzip
+import importlib.util
+import json
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+COLUMNS_FILE = 'inventory.columns.json'
+FORMAT_VERSION = 1
+# Whole numbers (null when missing) and low-cardinality text columns stored as dictionary + codes
+NUMERIC_FIELDS = ('year', 'mileage', 'value', 'sale_value')
+DICTIONARY_FIELDS = ('makeName', 'model', 'sub-model', 'trim', 'engine')
+DIGITS_REGEX = re.compile(r'\D')
+
+
+def brotli_available():
+    """Whether the optional brotli package is installed, without importing it"""
+    return importlib.util.find_spec('brotli') is not None
+
+
+def parquet_available():
+    """Whether the optional pyarrow package is installed, without importing it"""
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def _number(value):
+    if isinstance(value, int):
+        return value
+    digits = DIGITS_REGEX.sub('', value or '')
+    return int(digits) if digits else None
+
+
+def encode_columns(vehicles, fields):
+    """{field: column} for the vehicles - ints for numeric fields, {dictionary, codes} for repetitive text"""
+    numeric = [field for field in fields if field in NUMERIC_FIELDS]
+    dictionary = [field for field in fields if field in DICTIONARY_FIELDS]
+    plain = [field for field in fields if field not in NUMERIC_FIELDS and field not in DICTIONARY_FIELDS]
+    values = {field: [] for field in fields}
+    codes = {field: {} for field in dictionary}
+    count = 0
+    for vehicle in vehicles:
+        count += 1
+        for field in numeric:
+            values[field].append(_number(vehicle.get(field)))
+        for field in dictionary:
+            text = vehicle.get(field) or ''
+            values[field].append(codes[field].setdefault(text, len(codes[field])))
+        for field in plain:
+            values[field].append(vehicle.get(field) or '')
+
+    columns = {}
+    for field in fields:
+        if field in codes:
+            columns[field] = {'dictionary': list(codes[field]), 'codes': values[field]}
+        else:
+            columns[field] = values[field]
+    return count, columns
+
+
+def decode_columns(document):
+    """Vehicle dicts back from a columnar document - numbers as strings, like the CSV"""
+    fields = document['fields']
+    decoded = []
+    for field in fields:
+        column = document['columns'][field]
+        if isinstance(column, dict):
+            dictionary = column['dictionary']
+            decoded.append([dictionary[code] for code in column['codes']])
+        elif field in NUMERIC_FIELDS:
+            decoded.append(['' if value is None else str(value) for value in column])
+        else:
+            decoded.append(column)
+    return [dict(zip(fields, row)) for row in zip(*decoded)]
+
+
+class ColumnarExporter:
+    """Writes inventory.columns.json (+ .gz, + .br when brotli is installed) into directory"""
+
+    def __init__(self, directory, fields, compress_level=9):
+        self.directory = directory
+        self.fields = list(fields)
+        self.compress_level = compress_level
+
+    def export(self, vehicles, name=COLUMNS_FILE):
+        """Write the columnar file and its precompressed siblings - returns {path: size in bytes}"""
+        count, columns = encode_columns(vehicles, self.fields)
+        if not count:
+            logger.info("No vehicles found - NOT creating {}".format(name))
+            return {}
+        document = {'version': FORMAT_VERSION, 'count': count, 'fields': self.fields, 'columns': columns}
+        body = json.dumps(document, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+        sizes = {path: self._write(path, body)}
+        # mtime=0 keeps the .gz byte-identical for identical content, so unchanged exports do not churn
+        sizes[path + '.gz'] = self._write(path + '.gz', gzip.compress(body, self.compress_level, mtime=0))
+        if brotli_available():
+            import brotli
+            sizes[path + '.br'] = self._write(path + '.br', brotli.compress(body, quality=11))
+        else:
+            logger.info("brotli not installed - skipping {}.br".format(name))
+        logger.info("Columnar export of {} vehicles: {}".format(count, ', '.join(
+            '{} {:.1f} KB'.format(os.path.basename(p), size / 1024) for p, size in sizes.items())))
+        return sizes
+
+    def export_parquet(self, vehicles, path):
+        """Write a Parquet file (dictionary-encoded text, nullable int columns) - needs pyarrow"""
+        if not parquet_available():
+            logger.warning("pyarrow not installed - skipping Parquet export")
+            return None
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        count, columns = encode_columns(vehicles, self.fields)
+        arrays = []
+        for field in self.fields:
+            column = columns[field]
+            if isinstance(column, dict):
+                arrays.append(pa.DictionaryArray.from_arrays(pa.array(column['codes'], pa.int32()),
+                                                             pa.array(column['dictionary'], pa.string())))
+            elif field in NUMERIC_FIELDS:
+                arrays.append(pa.array(column, pa.int64()))
+            else:
+                arrays.append(pa.array(column, pa.string()))
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + '.tmp'
+        pq.write_table(pa.Table.from_arrays(arrays, names=self.fields), tmp_path, compression='zstd')
+        os.replace(tmp_path, path)
+        logger.info("Parquet export of {} vehicles to {}".format(count, path))
+        return os.path.getsize(path)
+
+    def _write(self, path, data):
+        """Write into a temp file and swap it in, so readers never see a partial file"""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return len(data)
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Multi-dealership batch scraping
+Scrapes many dealer sites at once over one pooled session and one shared page pool, with
+per-host politeness limits, into one merged inventory store plus per-dealer exports -
+a batch takes about as long as its slowest site rather than the sum of all of them
+"""
+
+import dataclasses
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from urllib.parse import urlparse
+
+from http_transport import ResilientAdapter, mount_transport
+from toyota_scrapper import (
+    UniversalRedDeerToyotaScraper, HostRateLimiter, JsonInventorySource, Vehicle, CSV_FIELDNAMES, DEALER_FIELD,
+)
+
+logger = logging.getLogger(__name__)
+
+# Store/merged export columns - the per-dealer exports keep the plain frontend CSV shape
+BATCH_FIELDNAMES = CSV_FIELDNAMES + [DEALER_FIELD]
+# Page fetches in flight across every dealer at once
+MAX_PAGE_WORKERS = 32
+# Dealer ids name export directories
+DEALER_ID_REGEX = re.compile(r'^[A-Za-z0-9][\w.-]*$')
+
+
+@dataclasses.dataclass
+class DealerConfig:
+    """One dealership in a batch
+
+    url is the used-inventory listing page; selectors/fallback_selectors replace the scraper's
+    card selectors when given; requests_per_second is the politeness limit for the site's host
+    (None for none); inventory_api reads the dealer's JSON endpoint instead of its HTML.
+    """
+    dealer_id: str
+    url: str
+    selectors: Optional[list] = None
+    fallback_selectors: Optional[list] = None
+    requests_per_second: Optional[float] = 2.0
+    max_pages: int = 25
+    max_workers: int = 4
+    inventory_api: Optional[str] = None
+
+    def __post_init__(self):
+        if not DEALER_ID_REGEX.match(self.dealer_id or ''):
+            raise ValueError("Invalid dealer id: {!r}".format(self.dealer_id))
+        if urlparse(self.url).scheme not in ('http', 'https'):
+            raise ValueError("Dealer {} needs an http(s) listing URL, got {!r}".format(self.dealer_id, self.url))
+
+    @classmethod
+    def from_dict(cls, data):
+        """Config from a dict with the same keys - unknown keys are rejected so typos do not go unnoticed"""
+        unknown = set(data) - {field.name for field in dataclasses.fields(cls)}
+        if unknown:
+            raise ValueError("Unknown dealer config keys: {}".format(', '.join(sorted(unknown))))
+        return cls(**data)
+
+    @property
+    def host(self):
+        return urlparse(self.inventory_api or self.url).netloc
+
+
+def load_configs(path):
+    """Dealer configs from a JSON file - a list, or {"dealers": [...]}"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get('dealers', [])
+    return [DealerConfig.from_dict(item) for item in data]
+
+
+def host_limits(configs):
+    """host -> requests per second, the strictest of the dealers sharing that host"""
+    limits = {}
+    for config in configs:
+        rate = config.requests_per_second
+        if config.host not in limits:
+            limits[config.host] = rate
+        elif rate and (not limits[config.host] or rate < limits[config.host]):
+            limits[config.host] = rate
+    return limits
+
+
+def dealer_scraper(config, cache_dir=None):
+    """Scraper for one dealer - caches go in a per-dealer directory so dealers never share cache files"""
+    source = JsonInventorySource(config.inventory_api) if config.inventory_api else None
+    scraper = UniversalRedDeerToyotaScraper(
+        max_workers=config.max_workers, max_pages=config.max_pages, requests_per_second=config.requests_per_second,
+        source=source, cache_dir=os.path.join(cache_dir, 'dealers', config.dealer_id) if cache_dir else None)
+    parsed = urlparse(config.url)
+    scraper.base_url = '{}://{}'.format(parsed.scheme, parsed.netloc)
+    scraper.target_url = config.url
+    if config.selectors:
+        scraper.priority_selectors = list(config.selectors)
+    if config.fallback_selectors is not None:
+        scraper.fallback_selectors = list(config.fallback_selectors)
+    return scraper
+
+
+def scrape_dealer(config, scraper):
+    """Scrape one dealer and tag its vehicles - a failing site yields an error, never an exception"""
+    start = time.perf_counter()
+    error = None
+    try:
+        vehicles = scraper.scrape_inventory()
+    except Exception as e:
+        logger.error("Dealer {} failed: {}".format(config.dealer_id, str(e)))
+        vehicles, error = [], str(e)
+    for vehicle in vehicles:
+        vehicle.dealer_id = config.dealer_id
+    elapsed = time.perf_counter() - start
+    logger.info("Dealer {}: {} vehicles in {:.2f}s".format(config.dealer_id, len(vehicles), elapsed))
+    return {'vehicles': vehicles, 'count': len(vehicles), 'seconds': elapsed, 'error': error}
+
+
+def scrape_many(configs, store_path=None, output_dir=None, cache_dir=None, page_workers=None, now=None,
+                transport_settings=None):
+    """Scrape every dealer concurrently - returns {'vehicles', 'dealers': {dealer_id: result}, 'seconds'}
+
+    configs are DealerConfigs or dicts. Every dealer runs on its own thread while their page fetches
+    share one connection pool and one page pool; each host is held to its requests_per_second.
+    With store_path each dealer that returned vehicles is recorded in the merged store (a dealer
+    that failed keeps its listings), and with output_dir its CSV/JSON are exported to
+    output_dir/<dealer_id>/ next to a merged inventory.csv carrying a dealer_id column.
+    transport_settings are ResilientAdapter options (timeouts, retries, run_budget) for the
+    shared transport - its circuit breakers are per host and its run budget covers the whole batch.
+    """
+    configs = [config if isinstance(config, DealerConfig) else DealerConfig.from_dict(config)
+               for config in configs]
+    dealer_ids = [config.dealer_id for config in configs]
+    if len(set(dealer_ids)) != len(dealer_ids):
+        raise ValueError("Dealer ids must be unique")
+    if not configs:
+        return {'vehicles': [], 'dealers': {}, 'seconds': 0.0}
+
+    start = time.perf_counter()
+    page_workers = page_workers or min(MAX_PAGE_WORKERS, sum(config.max_workers for config in configs))
+    scrapers = [dealer_scraper(config, cache_dir) for config in configs]
+
+    # One session and transport (keep-alive connections per host), one politeness limiter and one page pool for all
+    session = scrapers[0].session
+    transport = mount_transport(session, ResilientAdapter(
+        pool_size=max(10, page_workers), pool_hosts=max(10, len(host_limits(configs))), **(transport_settings or {})))
+    transport.begin_run()
+    rate_limiter = HostRateLimiter(None, host_limits(configs))
+    results = {}
+    with ThreadPoolExecutor(max_workers=page_workers) as page_pool:
+        for scraper in scrapers:
+            if scraper.session is not session:
+                scraper.session.close()
+            scraper.session = session
+            scraper.transport = transport
+            scraper.shared_transport = True
+            scraper.rate_limiter = rate_limiter
+            scraper.page_executor = page_pool
+        logger.info("Scraping {} dealers with {} shared page workers".format(len(configs), page_workers))
+        with ThreadPoolExecutor(max_workers=len(configs)) as dealer_pool:
+            futures = [dealer_pool.submit(scrape_dealer, config, scraper) for config, scraper in zip(configs, scrapers)]
+            for config, future in zip(configs, futures):
+                results[config.dealer_id] = future.result()
+    session.close()
+
+    vehicles = [vehicle for result in results.values() for vehicle in result['vehicles']]
+    if store_path:
+        record_batch(results, store_path, output_dir, now)
+    elapsed = time.perf_counter() - start
+    logger.info("Batch of {} dealers: {} vehicles in {:.2f}s (slowest dealer {:.2f}s)".format(
+        len(configs), len(vehicles), elapsed, max(result['seconds'] for result in results.values())))
+    return {'vehicles': vehicles, 'dealers': results, 'seconds': elapsed}
+
+
+def record_batch(results, store_path, output_dir=None, now=None):
+    """Record each dealer's run in the merged store and export it - fills in result['summary'/'exports']"""
+    # Imported here - only batches that keep a store need it
+    from inventory_store import InventoryStore
+
+    store = InventoryStore(store_path, BATCH_FIELDNAMES)
+    try:
+        for dealer_id, result in results.items():
+            if not result['vehicles']:
+                logger.warning("No vehicles from {} - keeping its listings from earlier runs".format(dealer_id))
+                continue
+            scope = {DEALER_FIELD: dealer_id}
+            result['summary'] = store.record_run(result['vehicles'], dedup_key=Vehicle.dedup_key, now=now,
+                                                 scope=scope)
+            if output_dir:
+                directory = os.path.join(output_dir, dealer_id)
+                result['exports'] = {
+                    'csv': store.export_csv(os.path.join(directory, 'inventory.csv'), CSV_FIELDNAMES, where=scope),
+                    'json': store.export_json(os.path.join(directory, 'inventory.json'), where=scope),
+                }
+        if output_dir:
+            store.export_csv(os.path.join(output_dir, 'inventory.csv'))
+    finally:
+        store.close()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Delta export for the frontend
+Diffs each run against the previous snapshot by vehicle key and publishes a change feed
+(changes.json) next to a content-hashed full snapshot, so clients can apply deltas
+instead of refetching the whole inventory
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+CHANGES_FILE = 'changes.json'
+SNAPSHOT_PATTERN = 'inventory-{}.json'
+# Deltas kept in the feed - clients further behind than this load the full snapshot
+DELTA_HISTORY = 10
+PRICE_FIELDS = ('value', 'sale_value')
+MILEAGE_FIELDS = ('mileage',)
+
+
+class DeltaExporter:
+    """Writes changes.json + inventory-<version>.json into directory, only when something changed"""
+
+    def __init__(self, directory, fields, history=DELTA_HISTORY):
+        self.directory = directory
+        self.fields = list(fields)
+        self.history = history
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def load_feed(self):
+        """The current changes.json, or None before the first export"""
+        try:
+            with open(self._path(CHANGES_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load_snapshot(self, feed):
+        """key -> row for the snapshot the feed points at (empty when there is none)"""
+        if not feed:
+            return {}
+        try:
+            with open(self._path(feed['snapshot']), 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError, KeyError):
+            logger.warning("Previous snapshot missing - exporting every vehicle as added")
+            return {}
+        if snapshot['fields'] == self.fields:
+            return dict(zip(snapshot['keys'], snapshot['rows']))
+        # Snapshots written with a different field list are re-mapped by name
+        columns = [snapshot['fields'].index(field) if field in snapshot['fields'] else None for field in self.fields]
+        return {key: [row[index] if index is not None else '' for index in columns]
+                for key, row in zip(snapshot['keys'], snapshot['rows'])}
+
+    def rows(self, vehicles, key):
+        """Ordered key -> row of field values for this run; the first vehicle wins on duplicate keys"""
+        current = {}
+        for vehicle in vehicles:
+            vehicle_key = key(vehicle)
+            if vehicle_key not in current:
+                current[vehicle_key] = [str(vehicle.get(field, '') or '') for field in self.fields]
+        return current
+
+    def diff(self, previous, current):
+        """Added, removed, price-changed, mileage-changed and otherwise updated vehicles
+
+        One pass over each side joined on the key hash - whole rows are compared first and
+        only rows that differ are inspected field by field.
+        """
+        index = {field: position for position, field in enumerate(self.fields)}
+        price_fields = [field for field in PRICE_FIELDS if field in index]
+        price_columns = [index[field] for field in price_fields]
+        mileage_columns = [index[field] for field in MILEAGE_FIELDS if field in index]
+        delta = {'added': [], 'removed': [], 'price_changed': [], 'mileage_changed': [], 'updated': []}
+
+        for vehicle_key, row in current.items():
+            old = previous.get(vehicle_key)
+            if old is None:
+                delta['added'].append({'key': vehicle_key, 'row': row})
+                continue
+            if old == row:
+                continue
+            changed = {position for position, (a, b) in enumerate(zip(old, row)) if a != b}
+            if changed - set(price_columns) - set(mileage_columns):
+                delta['updated'].append({'key': vehicle_key, 'row': row})
+                continue
+            if changed & set(price_columns):
+                change = {'key': vehicle_key}
+                for field in price_fields:
+                    change[field] = row[index[field]]
+                    change['previous_' + field] = old[index[field]]
+                delta['price_changed'].append(change)
+            if changed & set(mileage_columns):
+                delta['mileage_changed'].append({
+                    'key': vehicle_key, 'mileage': row[index['mileage']], 'previous_mileage': old[index['mileage']]})
+
+        delta['removed'] = [vehicle_key for vehicle_key in previous if vehicle_key not in current]
+        return delta
+
+    def export(self, vehicles, key):
+        """Diff this run against the last export and publish it - returns the delta, or None if unchanged
+
+        key(vehicle) must return a stable string id (stock number, else the dedup tuple).
+        """
+        feed = self.load_feed()
+        previous = self.load_snapshot(feed)
+        current = self.rows(vehicles, key)
+        delta = self.diff(previous, current)
+        if feed and not any(delta.values()):
+            logger.info("No inventory changes since {} - nothing written".format(feed['version']))
+            return None
+
+        snapshot = json.dumps({'fields': self.fields, 'keys': list(current), 'rows': list(current.values())},
+                              ensure_ascii=False, separators=(',', ':'))
+        version = hashlib.sha256(snapshot.encode('utf-8')).hexdigest()[:16]
+        snapshot_name = SNAPSHOT_PATTERN.format(version)
+        delta.update({
+            'from': feed['version'] if feed else None,
+            'to': version,
+            'generated_at': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        })
+        # The first export has nothing to apply a delta to - clients start from the snapshot
+        deltas = feed.get('deltas', []) + [delta] if feed else []
+        new_feed = {
+            'version': version,
+            'snapshot': snapshot_name,
+            'fields': self.fields,
+            'count': len(current),
+            'generated_at': delta['generated_at'],
+            'deltas': deltas[-self.history:],
+        }
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._write(snapshot_name, snapshot)
+        # The feed goes last so it never points at a snapshot that is not there yet
+        self._write(CHANGES_FILE, json.dumps(new_feed, ensure_ascii=False, separators=(',', ':')))
+        for path in glob.glob(self._path(SNAPSHOT_PATTERN.format('*'))):
+            if os.path.basename(path) != snapshot_name:
+                os.remove(path)
+
+        logger.info("Delta export {}: {} added, {} removed, {} price changes, {} mileage changes, {} updated".format(
+            version, len(delta['added']), len(delta['removed']), len(delta['price_changed']),
+            len(delta['mileage_changed']), len(delta['updated'])))
+        return delta
+
+    def _write(self, name, text):
+        """Write into a temp file and swap it in, so readers never see a partial file"""
+        path = self._path(name)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Detail-page enrichment
+Follows each vehicle's detail link to fill in the engine, trim and VIN the listing card left
+out - pages are fetched over the scraper's bounded page pool within a page and time budget,
+and results are cached by URL and content hash so unchanged vehicles are never refetched
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+# Only an alias of the builtin TimeoutError from Python 3.11 on
+from concurrent.futures import TimeoutError as FuturesTimeoutError, as_completed
+
+logger = logging.getLogger(__name__)
+
+# Vehicle attributes a detail page can fill in - only empty ones are ever touched
+ENRICHED_FIELDS = ('engine', 'trim', 'vin')
+CACHE_VERSION = 1
+# Seconds one detail page may take, further capped by what is left of the run's budget
+DETAIL_TIMEOUT = 30
+WHITESPACE_REGEX = re.compile(r'\s+')
+# Spec rows such as "Trim: XLE", <th>Engine</th><td>2.5L 4Cyl</td> or <dt>VIN</dt><dd>...</dd>
+SPEC_LABEL_REGEX = re.compile(r'^(trim(?: level)?|engine|vin)\b\s*[:#-]?\s*(.+)$', re.IGNORECASE)
+SPEC_ELEMENTS = ('li', 'tr', 'p', 'div', 'span')
+SPEC_MAX_LENGTH = 80
+VIN_REGEX = re.compile(r'^[A-HJ-NPR-Z0-9]{17}$')
+
+
+class DetailEnricher:
+    """Fills missing engine/trim/VIN from detail pages, at most max_pages fetches and max_seconds per run
+
+    The cache maps detail URL -> the listing identity it was fetched for, a hash of the page
+    and the fields found there. A listed vehicle whose URL and identity are cached is filled
+    from the cache without a request; a refetched page whose hash is unchanged is not re-parsed.
+    Vehicles left over when the budget runs out are picked up by later runs.
+    """
+
+    def __init__(self, cache_path=None, max_pages=200, max_seconds=120):
+        self.cache_path = cache_path
+        self.max_pages = max(0, max_pages)
+        self.max_seconds = max_seconds
+        self.entries = {}
+        if cache_path:
+            try:
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == CACHE_VERSION:
+                    self.entries = data.get('entries', {})
+            except (OSError, ValueError):
+                pass
+
+    def identity(self, vehicle):
+        """What must stay the same for a cached detail page to still describe this vehicle"""
+        return '\x1f'.join((vehicle.get('year'), vehicle.makeName, vehicle.model, vehicle.stock_number))
+
+    def needs(self, vehicle):
+        """Whether a vehicle has a detail link and is missing any enrichable field"""
+        return bool(vehicle.detail_url) and any(not getattr(vehicle, field) for field in ENRICHED_FIELDS)
+
+    def apply(self, vehicle, fields):
+        """Fill the vehicle's empty fields from a detail page - returns whether anything was filled"""
+        filled = False
+        for field in ENRICHED_FIELDS:
+            if fields.get(field) and not getattr(vehicle, field):
+                setattr(vehicle, field, fields[field])
+                filled = True
+        # Cards use the trim as the sub-model too
+        if fields.get('trim') and not vehicle.sub_model:
+            vehicle.sub_model = fields['trim']
+        return filled
+
+    def match(self, vehicle, found):
+        """The structured record on a detail page that describes this vehicle - pages often list similar ones too"""
+        for candidate in found:
+            if vehicle.vin and candidate.vin == vehicle.vin:
+                return candidate
+            if vehicle.stock_number and candidate.stock_number == vehicle.stock_number:
+                return candidate
+        return found[0] if len(found) == 1 else None
+
+    def spec_fields(self, root):
+        """Engine/trim/VIN from labelled spec rows - the first row for each label wins"""
+        fields = {}
+        rows = [(dt.get_text(' ', strip=True), dd.get_text(' ', strip=True))
+                for dt in root.find_all('dt') for dd in [dt.find_next_sibling('dd')] if dd is not None]
+        for element in root.find_all(SPEC_ELEMENTS):
+            text = WHITESPACE_REGEX.sub(' ', element.get_text(' ', strip=True))
+            if len(text) <= SPEC_MAX_LENGTH:
+                rows.append((text, ''))
+        for label, value in rows:
+            match = SPEC_LABEL_REGEX.match(WHITESPACE_REGEX.sub(' ', '{} {}'.format(label, value)).strip())
+            if not match:
+                continue
+            field = match.group(1).split()[0].lower()
+            value = match.group(2).strip()
+            if field == 'vin':
+                value = value.upper()
+                if not VIN_REGEX.match(value):
+                    continue
+            fields.setdefault(field, value)
+        return fields
+
+    def extract(self, scraper, content, vehicle):
+        """Engine/trim/VIN on a detail page - structured data, then labelled spec rows, then the card
+        heuristics over the text of its main content"""
+        fields = {}
+        record = self.match(vehicle, scraper.extract_structured_vehicles(content))
+        if record is not None:
+            fields = {field: getattr(record, field) for field in ENRICHED_FIELDS if getattr(record, field)}
+        if len(fields) < len(ENRICHED_FIELDS):
+            soup = scraper.parse_page(content)
+            main = soup.find('main') or soup.body or soup
+            for field, value in self.spec_fields(main).items():
+                fields.setdefault(field, value)
+            if len(fields) < len(ENRICHED_FIELDS):
+                text = WHITESPACE_REGEX.sub(' ', main.get_text(separator=' ', strip=True))
+                parsed = scraper.extract_card_data(text, [])
+                for field in ENRICHED_FIELDS:
+                    if field not in fields and getattr(parsed, field):
+                        fields[field] = getattr(parsed, field)
+            soup.decompose()
+        return fields
+
+    def fetch_fields(self, scraper, url, vehicle, previous, deadline):
+        """Fetch one detail page and extract it - returns (content hash, fields, unchanged)
+
+        fields is None when the page could not be fetched; the whole result is None when the
+        time budget ran out before the request was made.
+        """
+        scraper.rate_limiter.wait(url)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        try:
+            logger.info("Fetching detail page: {}".format(url))
+            response = scraper.session.get(url, timeout=min(DETAIL_TIMEOUT, max(1.0, remaining)))
+            response.raise_for_status()
+        except Exception as e:
+            logger.warning("Failed to fetch detail page {}: {}".format(url, str(e)))
+            return None, None, False
+        digest = hashlib.sha256(response.content).hexdigest()[:32]
+        if previous and previous['content_hash'] == digest:
+            return digest, previous['fields'], True
+        return digest, self.extract(scraper, response.content, vehicle), False
+
+    def enrich(self, scraper, vehicles):
+        """Fill in missing fields from detail pages in place - returns counts of what happened"""
+        started = time.monotonic()
+        deadline = started + self.max_seconds
+        stats = {'candidates': 0, 'cached': 0, 'fetched': 0, 'unchanged': 0, 'failed': 0, 'deferred': 0,
+                 'enriched': 0}
+        used = {}
+        pending = {}
+        for vehicle in vehicles:
+            if not self.needs(vehicle):
+                continue
+            stats['candidates'] += 1
+            url = vehicle.detail_url
+            entry = used.get(url) or self.entries.get(url)
+            if entry and entry['identity'] == self.identity(vehicle):
+                used[url] = entry
+                stats['cached'] += 1
+                stats['enriched'] += self.apply(vehicle, entry['fields'])
+            elif url in pending or len(pending) < self.max_pages:
+                pending.setdefault(url, []).append(vehicle)
+            else:
+                stats['deferred'] += 1
+
+        if pending:
+            logger.info("Fetching up to {} detail pages ({:g}s budget)".format(len(pending), self.max_seconds))
+            with scraper.page_pool() as executor:
+                futures = {executor.submit(self.fetch_fields, scraper, url, group[0], self.entries.get(url),
+                                           deadline): url for url, group in pending.items()}
+                try:
+                    for future in as_completed(futures, timeout=max(0.0, deadline - time.monotonic())):
+                        url = futures[future]
+                        result = future.result()
+                        if result is None:
+                            stats['deferred'] += len(pending[url])
+                            continue
+                        digest, fields, unchanged = result
+                        if fields is None:
+                            stats['failed'] += len(pending[url])
+                            continue
+                        stats['fetched'] += 1
+                        stats['unchanged'] += unchanged
+                        used[url] = {'identity': self.identity(pending[url][0]), 'content_hash': digest,
+                                     'fields': fields, 'fetched_at': int(time.time())}
+                        for vehicle in pending[url]:
+                            stats['enriched'] += self.apply(vehicle, fields)
+                except FuturesTimeoutError:
+                    logger.warning("Detail enrichment budget of {:g}s used up".format(self.max_seconds))
+                for future, url in futures.items():
+                    if not future.done() and future.cancel():
+                        stats['deferred'] += len(pending[url])
+
+        # Only detail pages of vehicles listed this run are kept, so sold vehicles age out
+        self.entries = used
+        self.save()
+        logger.info("Detail enrichment: {candidates} candidates, {cached} from cache, {fetched} pages fetched "
+                    "({unchanged} unchanged), {failed} failed, {deferred} left for later runs - "
+                    "{enriched} vehicles filled in {seconds:.2f}s".format(
+                        seconds=time.monotonic() - started, **stats))
+        return stats
+
+    def save(self):
+        """Write the cache atomically"""
+        if not self.cache_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+            tmp_path = self.cache_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': CACHE_VERSION, 'entries': self.entries}, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning("Could not save detail page cache: {}".format(str(e)))
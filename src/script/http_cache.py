@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+On-disk HTTP cache for conditional inventory fetches
+Stores body + ETag/Last-Modified per URL so unchanged pages can be revalidated with a 304
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class HttpCache:
+    """URL-keyed body cache with validators, size-bounded LRU eviction and a TTL"""
+
+    def __init__(self, directory, max_bytes=50 * 1024 * 1024, ttl=7 * 24 * 3600):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        # In-memory index of key -> metadata, loaded once from disk
+        self.index = {}
+        for name in os.listdir(directory):
+            if name.endswith('.json'):
+                try:
+                    with open(os.path.join(directory, name), 'r', encoding='utf-8') as f:
+                        meta = json.load(f)
+                    self.index[name[:-5]] = meta
+                except Exception:
+                    self._remove(name[:-5])
+
+    def _key(self, url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()[:32]
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, key + suffix)
+
+    def _write_meta(self, key, meta):
+        tmp_path = self._path(key, '.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._path(key, '.json'))
+
+    def _remove(self, key):
+        self.index.pop(key, None)
+        for suffix in ('.json', '.body'):
+            try:
+                os.remove(self._path(key, suffix))
+            except OSError:
+                pass
+
+    def get(self, url):
+        """Return the cached entry for url, or None if missing or older than the TTL"""
+        key = self._key(url)
+        with self.lock:
+            meta = self.index.get(key)
+            if meta is None:
+                return None
+            if self.ttl and time.time() - meta['stored_at'] > self.ttl:
+                logger.info("HTTP cache entry expired: {}".format(url))
+                self._remove(key)
+                return None
+            meta['last_used'] = time.time()
+            return meta
+
+    def conditional_headers(self, entry):
+        """If-None-Match / If-Modified-Since headers for revalidating a cached entry"""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def read_body(self, entry):
+        """Cached response body for an entry, or None if the file has gone missing"""
+        try:
+            with open(self._path(entry['key'], '.body'), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def store(self, url, headers, body):
+        """Cache a 200 response body - only worth it when the server sent validators"""
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return None
+
+        key = self._key(url)
+        now = time.time()
+        meta = {
+            'key': key,
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'size': len(body),
+            'stored_at': now,
+            'last_used': now,
+            'extracted': None,
+        }
+        with self.lock:
+            with open(self._path(key, '.body'), 'wb') as f:
+                f.write(body)
+            self._write_meta(key, meta)
+            self.index[key] = meta
+            self._evict()
+        return meta
+
+    def refresh(self, entry):
+        """Mark an entry as revalidated by a 304 so its TTL starts over"""
+        with self.lock:
+            entry['stored_at'] = entry['last_used'] = time.time()
+            self._write_meta(entry['key'], entry)
+
+    def store_extracted(self, url, extracted):
+        """Attach the parse result for a cached page so a later 304 can skip parsing"""
+        key = self._key(url)
+        with self.lock:
+            meta = self.index.get(key)
+            if meta is not None:
+                meta['extracted'] = extracted
+                self._write_meta(key, meta)
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        total = sum(meta['size'] for meta in self.index.values())
+        if total <= self.max_bytes:
+            return
+        for key, meta in sorted(self.index.items(), key=lambda item: item[1]['last_used']):
+            if total <= self.max_bytes:
+                break
+            total -= meta['size']
+            logger.info("HTTP cache evicting: {}".format(meta['url']))
+            self._remove(key)
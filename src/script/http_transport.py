@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Resilient HTTP transport
+A requests transport adapter for the scraper's shared session - a sized connection pool,
+separate connect/read timeouts, jittered exponential backoff on transient failures that
+honors Retry-After, a per-host circuit breaker and one time budget for the whole run
+"""
+
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Transient responses worth another try - rate limiting and overloaded/restarting upstreams
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+# Only idempotent requests are ever retried
+RETRY_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """A host that kept failing is refused without a request until its cool-down ends"""
+
+
+class BudgetExhaustedError(requests.exceptions.Timeout):
+    """The run's time budget ran out before the request could be made"""
+
+
+def parse_retry_after(value, now=None):
+    """Seconds a Retry-After header asks to wait - delta-seconds or an HTTP date - or None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - (now or datetime.now(timezone.utc))).total_seconds())
+
+
+class CircuitBreaker:
+    """Per-host circuit breaker
+
+    failure_threshold consecutive failed requests (retries exhausted) open a host's circuit; requests to it are then
+    refused for cooldown seconds, after which one trial request is let through - success
+    closes the circuit, failure opens it for another cool-down.
+    """
+
+    def __init__(self, failure_threshold=5, cooldown=30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.failures = {}
+        self.opened_at = {}
+        self.trials = set()
+        self.lock = threading.Lock()
+
+    def allow(self, host):
+        """Whether a request to this host may go out now"""
+        with self.lock:
+            opened_at = self.opened_at.get(host)
+            if opened_at is None:
+                return True
+            if time.monotonic() - opened_at < self.cooldown or host in self.trials:
+                return False
+            self.trials.add(host)
+            return True
+
+    def success(self, host):
+        with self.lock:
+            self.failures.pop(host, None)
+            self.opened_at.pop(host, None)
+            self.trials.discard(host)
+
+    def failure(self, host):
+        with self.lock:
+            self.failures[host] = self.failures.get(host, 0) + 1
+            if self.failures[host] >= self.failure_threshold or host in self.trials:
+                if host not in self.opened_at or host in self.trials:
+                    logger.warning("Circuit opened for {} after {} consecutive failures".format(
+                        host, self.failures[host]))
+                self.opened_at[host] = time.monotonic()
+            self.trials.discard(host)
+
+    def state(self, host):
+        """'closed', 'open' or 'half-open' (cool-down over, next request is the trial)"""
+        with self.lock:
+            opened_at = self.opened_at.get(host)
+            if opened_at is None:
+                return 'closed'
+            return 'open' if time.monotonic() - opened_at < self.cooldown or host in self.trials else 'half-open'
+
+
+class ResilientAdapter(HTTPAdapter):
+    """Transport adapter mounted on the scraper's session - every GET through it is retried
+    with jittered exponential backoff, guarded by a per-host circuit breaker and held to the run budget
+
+    Requests without a timeout get (connect_timeout, read_timeout); both are clamped to what
+    is left of the run budget. A Retry-After longer than backoff_max is not waited for - the
+    response is handed back as is. Exhausted retries return the last response (callers still
+    raise_for_status) or raise the last connection error.
+
+    admit(), retry_delay() and succeeded() are the policy on its own, so clients that do not go
+    through requests (the aiohttp backend) share the same budget, backoff, breaker and stats.
+    """
+
+    def __init__(self, pool_size=10, connect_timeout=5.0, read_timeout=20.0, retries=3, backoff_base=0.5,
+                 backoff_max=20.0, failure_threshold=5, breaker_cooldown=30.0, run_budget=None, pool_hosts=None):
+        # pool_size connections kept per host, pools for pool_hosts hosts (default pool_size)
+        super().__init__(pool_connections=pool_hosts or pool_size, pool_maxsize=pool_size)
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = max(0, retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = CircuitBreaker(failure_threshold, breaker_cooldown)
+        self.run_budget = run_budget
+        self.deadline = None
+        self.stats = {}
+        self.stats_lock = threading.Lock()
+        self.begin_run()
+
+    def begin_run(self):
+        """Start the run budget clock and reset the counters"""
+        self.deadline = time.monotonic() + self.run_budget if self.run_budget else None
+        with self.stats_lock:
+            self.stats = {'requests': 0, 'retries': 0, 'failures': 0, 'circuit_open': 0, 'budget_exhausted': 0}
+
+    def remaining(self):
+        """Seconds left in the run budget, or None without one"""
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+    def count(self, key):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def timeouts(self, timeout, remaining):
+        """(connect, read) timeouts for one attempt"""
+        if timeout is None:
+            connect, read = self.connect_timeout, self.read_timeout
+        elif isinstance(timeout, tuple):
+            connect, read = timeout
+        else:
+            connect, read = min(self.connect_timeout, timeout), timeout
+        if remaining is not None:
+            remaining = max(0.01, remaining)
+            connect, read = min(connect, remaining), min(read, remaining)
+        return connect, read
+
+    def admit(self, url, request=None):
+        """Check the run budget and the host's circuit before a request - returns the budget left (None without one)"""
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            self.count('budget_exhausted')
+            raise BudgetExhaustedError("Run time budget of {:g}s used up".format(self.run_budget), request=request)
+        host = urlparse(url).netloc
+        if not self.breaker.allow(host):
+            self.count('circuit_open')
+            raise CircuitOpenError("Circuit open for {} after repeated failures".format(host), request=request)
+        return remaining
+
+    def succeeded(self, url):
+        self.breaker.success(urlparse(url).netloc)
+
+    def retry_delay(self, method, url, attempt, reason, response=None):
+        """Seconds to wait before retrying a failed attempt, or None when it is given up
+
+        Only requests that exhaust their retries count against the host's circuit. response is the
+        failed response, if any - anything with headers, so aiohttp responses work too.
+        """
+        delay = self.backoff(attempt, response)
+        remaining = self.remaining()
+        if method not in RETRY_METHODS or attempt >= self.retries or delay > self.backoff_max \
+                or (remaining is not None and delay >= remaining):
+            self.count('failures')
+            self.breaker.failure(urlparse(url).netloc)
+            logger.warning("Giving up on {} after {} attempts: {}".format(url, attempt + 1, reason))
+            return None
+        logger.warning("Retrying {} in {:.2f}s after {}".format(url, delay, reason))
+        self.count('retries')
+        return delay
+
+    def backoff(self, attempt, response=None):
+        """Seconds to wait before retry number attempt + 1 - full jitter, at least what Retry-After asks"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        retry_after = parse_retry_after(response.headers.get('Retry-After')) if response is not None else None
+        return delay if retry_after is None else max(delay, retry_after)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        remaining = self.admit(request.url, request)
+        attempt = 0
+        while True:
+            self.count('requests')
+            error = None
+            try:
+                response = super().send(request, stream=stream, timeout=self.timeouts(timeout, remaining),
+                                        verify=verify, cert=cert, proxies=proxies)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                response, error = None, e
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                self.succeeded(request.url)
+                return response
+
+            delay = self.retry_delay(request.method, request.url, attempt,
+                                     error or 'HTTP {}'.format(response.status_code), response)
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+            if response is not None:
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+            remaining = self.remaining()
+
+
+def mount_transport(session, adapter):
+    """Route every http(s) request of a session through the adapter"""
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return adapter
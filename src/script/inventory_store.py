@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+SQLite inventory store with listing history
+Each run is upserted in one transaction; vehicles keep first-seen/last-seen dates and a
+price history, and the frontend CSV/JSON are exported from the store atomically
+"""
+
+import csv
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+DIGITS_REGEX = re.compile(r'\D')
+SECONDS_PER_DAY = 86400
+# Stores holding several dealerships key vehicles per dealer - stock numbers are only unique within one
+DEALER_FIELD = 'dealer_id'
+
+
+def _price(text):
+    """Whole-dollar price from a scraped value such as '$12,967', or None"""
+    digits = DIGITS_REGEX.sub('', text or '')
+    return int(digits) if digits else None
+
+
+def _iso_date(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%d')
+
+
+class InventoryStore:
+    """Vehicles keyed by stock number (or the dedup tuple when there is none)
+
+    fields are the scraped vehicle fields stored as columns - the same ones the CSV export
+    writes. Removed vehicles stay in the table as inactive rows so history survives them.
+    With a dealer_id field the store holds several dealerships, each recorded and exported on its own.
+    """
+
+    def __init__(self, path, fields):
+        self.path = path
+        self.fields = list(fields)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _column(self, field):
+        return '"{}"'.format(field.replace('"', '""'))
+
+    def _create_schema(self):
+        with self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS vehicles ("
+                "vehicle_key TEXT PRIMARY KEY, position INTEGER, first_seen INTEGER NOT NULL, "
+                "last_seen INTEGER NOT NULL, removed_at INTEGER, active INTEGER NOT NULL DEFAULT 1, "
+                "price INTEGER)")
+            existing = {row[1] for row in self.db.execute("PRAGMA table_info(vehicles)")}
+            for field in self.fields:
+                if field not in existing:
+                    self.db.execute("ALTER TABLE vehicles ADD COLUMN {} TEXT NOT NULL DEFAULT ''".format(
+                        self._column(field)))
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS price_history ("
+                "vehicle_key TEXT NOT NULL, observed_at INTEGER NOT NULL, previous_price INTEGER, price INTEGER)")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                "id INTEGER PRIMARY KEY, recorded_at INTEGER NOT NULL, count INTEGER NOT NULL, "
+                "added INTEGER NOT NULL, removed INTEGER NOT NULL, price_changes INTEGER NOT NULL)")
+            # Export order, price-drop and days-on-lot queries are all answered from these
+            self.db.execute("CREATE INDEX IF NOT EXISTS vehicles_active_position ON vehicles (active, position)")
+            if DEALER_FIELD in self.fields:
+                self.db.execute("CREATE INDEX IF NOT EXISTS vehicles_dealer_active_position ON vehicles "
+                                "({}, active, position)".format(self._column(DEALER_FIELD)))
+            if 'makeName' in self.fields:
+                self.db.execute(
+                    "CREATE INDEX IF NOT EXISTS vehicles_active_make ON vehicles "
+                    "(active, makeName, first_seen, last_seen)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS price_history_observed ON price_history (observed_at)")
+            self.db.execute(
+                "CREATE INDEX IF NOT EXISTS price_history_vehicle ON price_history (vehicle_key, observed_at)")
+
+    def _where(self, where):
+        """SQL conditions (each starting with AND) and parameters for {field: value} filters"""
+        if not where:
+            return '', []
+        return ''.join(' AND {} = ?'.format(self._column(field)) for field in where), list(where.values())
+
+    def vehicle_key(self, vehicle, dedup_key=None):
+        """Stock number when the listing has one, else the scraper's dedup tuple - prefixed by the dealer
+        in multi-dealer stores"""
+        prefix = ''
+        if DEALER_FIELD in self.fields and vehicle.get(DEALER_FIELD):
+            prefix = vehicle.get(DEALER_FIELD) + '/'
+        stock_number = (vehicle.get('stock_number') or '').strip()
+        if stock_number:
+            return prefix + 'stock:' + stock_number
+        identifier = dedup_key(vehicle) if dedup_key else tuple(vehicle.get(field, '') for field in self.fields)
+        return prefix + 'dedup:' + '\x1f'.join(identifier)
+
+    def vehicle_price(self, vehicle):
+        """Price a shopper pays - the sale price when there is one"""
+        sale_price = _price(vehicle.get('sale_value'))
+        return sale_price if sale_price is not None else _price(vehicle.get('value'))
+
+    def record_run(self, vehicles, dedup_key=None, now=None, scope=None):
+        """Upsert one complete scrape in a single transaction - returns counts of what changed
+
+        Vehicles missing from the run are marked removed; new vehicles and price changes
+        are appended to the price history. scope ({field: value}, e.g. one dealer_id) limits
+        what counts as missing to the vehicles the run covers.
+        """
+        now = int(now if now is not None else time.time())
+        conditions, parameters = self._where(scope)
+        known = {key: (price, active) for key, price, active in self.db.execute(
+            "SELECT vehicle_key, price, active FROM vehicles WHERE 1{}".format(conditions), parameters)}
+
+        columns = ['vehicle_key', 'position', 'first_seen', 'last_seen', 'price'] + self.fields
+        quoted = ', '.join(self._column(column) for column in columns)
+        updates = ', '.join('{0} = excluded.{0}'.format(self._column(column))
+                            for column in columns if column not in ('vehicle_key', 'first_seen'))
+        upsert = ("INSERT INTO vehicles ({}) VALUES ({}) ON CONFLICT(vehicle_key) DO UPDATE SET {}, "
+                  "active = 1, removed_at = NULL".format(quoted, ', '.join('?' * len(columns)), updates))
+
+        rows = []
+        history = []
+        seen = set()
+        added = 0
+        for vehicle in vehicles:
+            key = self.vehicle_key(vehicle, dedup_key)
+            if key in seen:
+                continue
+            seen.add(key)
+            price = self.vehicle_price(vehicle)
+            rows.append([key, len(rows), now, now, price] + [vehicle.get(field, '') or '' for field in self.fields])
+            previous = known.get(key)
+            if previous is None:
+                added += 1
+                history.append((key, now, None, price))
+            elif previous[0] != price:
+                history.append((key, now, previous[0], price))
+
+        removed = [(now, key) for key, (_, active) in known.items() if active and key not in seen]
+        price_changes = len(history) - added
+
+        with self.db:
+            self.db.executemany(upsert, rows)
+            self.db.executemany("UPDATE vehicles SET active = 0, removed_at = ? WHERE vehicle_key = ?", removed)
+            self.db.executemany(
+                "INSERT INTO price_history (vehicle_key, observed_at, previous_price, price) VALUES (?, ?, ?, ?)",
+                history)
+            self.db.execute(
+                "INSERT INTO runs (recorded_at, count, added, removed, price_changes) VALUES (?, ?, ?, ?, ?)",
+                (now, len(rows), added, len(removed), price_changes))
+
+        summary = {'count': len(rows), 'added': added, 'removed': len(removed), 'price_changes': price_changes}
+        logger.info("Inventory store updated: {count} vehicles, {added} added, {removed} removed, "
+                    "{price_changes} price changes".format(**summary))
+        return summary
+
+    def price_drops(self, days=7, now=None):
+        """Listed vehicles whose price went down in the last `days` days, biggest drop first"""
+        now = int(now if now is not None else time.time())
+        columns = ', '.join('v.' + self._column(field) for field in self.fields)
+        cursor = self.db.execute(
+            "SELECT {}, h.previous_price, h.price, h.observed_at FROM price_history h "
+            "JOIN vehicles v ON v.vehicle_key = h.vehicle_key "
+            "WHERE h.observed_at >= ? AND h.price < h.previous_price AND v.active = 1 "
+            "ORDER BY h.previous_price - h.price DESC".format(columns),
+            (now - days * SECONDS_PER_DAY,))
+        drops = []
+        for row in cursor:
+            vehicle = dict(zip(self.fields, row))
+            vehicle.update({'previous_price': row[-3], 'price': row[-2], 'changed_on': _iso_date(row[-1])})
+            drops.append(vehicle)
+        return drops
+
+    def days_on_lot_by_make(self, active=True):
+        """Vehicle count and average/longest days on the lot per make - listed now, or already sold"""
+        cursor = self.db.execute(
+            "SELECT makeName, COUNT(*), AVG(last_seen - first_seen), MAX(last_seen - first_seen) "
+            "FROM vehicles WHERE active = ? GROUP BY makeName ORDER BY makeName", (1 if active else 0,))
+        return [{
+            'makeName': make,
+            'count': count,
+            'average_days': round(average / SECONDS_PER_DAY, 1),
+            'max_days': round(longest / SECONDS_PER_DAY, 1),
+        } for make, count, average, longest in cursor]
+
+    def iter_listed(self, where=None):
+        """Currently listed vehicles in the order the last run scraped them - optionally only {field: value}
+
+        Multi-dealer stores list dealer by dealer, each in its own scrape order - positions restart per dealer.
+        """
+        columns = ', '.join(self._column(field) for field in self.fields)
+        conditions, parameters = self._where(where)
+        order = '{}, position'.format(self._column(DEALER_FIELD)) if DEALER_FIELD in self.fields else 'position'
+        cursor = self.db.execute(
+            "SELECT {}, first_seen, last_seen FROM vehicles WHERE active = 1{} ORDER BY {}".format(
+                columns, conditions, order), parameters)
+        for row in cursor:
+            vehicle = dict(zip(self.fields, row))
+            vehicle['first_seen'] = _iso_date(row[-2])
+            vehicle['last_seen'] = _iso_date(row[-1])
+            yield vehicle
+
+    def export_csv(self, filename, fieldnames=None, where=None):
+        """Write listed vehicles as the frontend CSV - returns the count"""
+        fieldnames = fieldnames or self.fields
+
+        def write(f):
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+            writer.writeheader()
+            count = 0
+            for vehicle in self.iter_listed(where):
+                writer.writerow(vehicle)
+                count += 1
+            return count
+        return self._export(filename, 'CSV', write)
+
+    def export_json(self, filename, where=None):
+        """Write listed vehicles, with first/last seen dates, as a JSON array - returns the count"""
+        def write(f):
+            count = 0
+            f.write('[')
+            for vehicle in self.iter_listed(where):
+                f.write(',\n' if count else '\n')
+                f.write(json.dumps(vehicle, ensure_ascii=False))
+                count += 1
+            f.write('\n]\n')
+            return count
+        return self._export(filename, 'JSON', write)
+
+    def _export(self, filename, label, write):
+        """Write into a temp file and swap it in, so readers never see a partial export"""
+        tmp_path = filename + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+            with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+                count = write(f)
+            if not count:
+                logger.info("Inventory store is empty - NOT replacing {}".format(filename))
+                return 0
+            os.replace(tmp_path, filename)
+            logger.info("{} exported with {} vehicles to {}".format(label, count, filename))
+            return count
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Recorded page corpus
+Pages fetched by a scrape run are saved with their status and headers into a versioned
+fixture corpus, which a replay transport later serves to the scraper with no network at all -
+so extraction changes can be checked against real pages and the run's golden output offline
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urljoin
+
+from requests import Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+CORPUS_FORMAT = 1
+MANIFEST_NAME = 'manifest.json'
+GOLDEN_NAME = 'golden.json'
+# Hop-by-hop and transfer headers describe the original connection, not the page - bodies are stored decoded
+DROPPED_HEADERS = frozenset(['content-encoding', 'content-length', 'transfer-encoding', 'connection', 'keep-alive',
+                             'set-cookie'])
+
+
+class PageCorpus:
+    """One recorded corpus version - manifest.json, gzipped page bodies and golden.json
+
+    Versions live side by side under a root directory (root/<version>/), so a new recording
+    never overwrites the pages an older golden output was taken from.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.manifest = {'format': CORPUS_FORMAT, 'recorded_at': None, 'target_url': None, 'inventory_api': None,
+                         'detail_pages': False, 'pages': {}}
+        self.lock = threading.Lock()
+        manifest_path = os.path.join(path, MANIFEST_NAME)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('format') != CORPUS_FORMAT:
+                raise ValueError("Unsupported corpus format {} in {}".format(manifest.get('format'), path))
+            self.manifest = manifest
+
+    @classmethod
+    def new_version(cls, root, version=None):
+        """An empty corpus in a new version directory under root - named by the recording time by default"""
+        version = version or datetime.now().strftime('%Y%m%d_%H%M%S')
+        path = os.path.join(root, version)
+        if os.path.exists(os.path.join(path, MANIFEST_NAME)):
+            raise FileExistsError("Corpus version {} already exists in {}".format(version, root))
+        return cls(path)
+
+    @staticmethod
+    def versions(root):
+        """Corpus versions under root, oldest first"""
+        if not os.path.isdir(root):
+            return []
+        return sorted(name for name in os.listdir(root) if os.path.exists(os.path.join(root, name, MANIFEST_NAME)))
+
+    @classmethod
+    def latest(cls, root):
+        versions = cls.versions(root)
+        if not versions:
+            raise FileNotFoundError("No recorded corpus under {}".format(root))
+        return cls(os.path.join(root, versions[-1]))
+
+    @property
+    def pages(self):
+        return self.manifest['pages']
+
+    def add(self, url, status, headers, body):
+        """Store one response - bodies are content-addressed, so identical pages are kept once"""
+        digest = hashlib.sha256(body).hexdigest()
+        filename = os.path.join('pages', digest[:32] + '.gz')
+        body_path = os.path.join(self.path, filename)
+        if not os.path.exists(body_path):
+            os.makedirs(os.path.dirname(body_path), exist_ok=True)
+            tmp_path = '{}.{}.tmp'.format(body_path, threading.get_ident())
+            with gzip.open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, body_path)
+        with self.lock:
+            self.pages[url] = {
+                'status': status,
+                'headers': {key: value for key, value in headers.items() if key.lower() not in DROPPED_HEADERS},
+                'file': filename,
+                'sha256': digest,
+                'bytes': len(body),
+            }
+
+    def body(self, url):
+        """Recorded body of url, or None when it was never recorded"""
+        page = self.pages.get(url)
+        if page is None:
+            return None
+        with gzip.open(os.path.join(self.path, page['file']), 'rb') as f:
+            return f.read()
+
+    def final_url(self, url, max_redirects=10):
+        """Where a recorded chain of redirects starting at url ends"""
+        for _ in range(max_redirects):
+            page = self.pages.get(url)
+            location = page and page['status'] in (301, 302, 303, 307, 308) and page['headers'].get('Location')
+            if not location:
+                break
+            url = urljoin(url, location)
+        return url
+
+    def total_bytes(self):
+        return sum(page['bytes'] for page in self.pages.values())
+
+    def save(self):
+        """Write the manifest atomically"""
+        os.makedirs(self.path, exist_ok=True)
+        self.manifest['recorded_at'] = self.manifest['recorded_at'] or int(time.time())
+        tmp_path = os.path.join(self.path, MANIFEST_NAME + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, os.path.join(self.path, MANIFEST_NAME))
+
+    def save_golden(self, vehicles):
+        """Store the vehicles a run produced from these pages as the expected output"""
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, GOLDEN_NAME), 'w', encoding='utf-8') as f:
+            json.dump([vehicle.to_dict() for vehicle in vehicles], f, indent=1, ensure_ascii=False)
+
+    def golden(self):
+        """Expected vehicle dicts, or None when the corpus has no golden output"""
+        path = os.path.join(self.path, GOLDEN_NAME)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def recorder(self):
+        """requests response hook saving every page and redirect the session fetches
+
+        Redirects are kept with their Location, so replay follows them the way the site did.
+        304s carry no body and are skipped - record() turns the page cache off so none are asked for.
+        """
+        def record(response, *args, **kwargs):
+            if response.request.method == 'GET' and (response.status_code == 200 or response.is_redirect):
+                self.add(response.url, response.status_code, response.headers, response.content)
+            return response
+        return record
+
+    def record(self, scraper):
+        """Record every page the scraper's session fetches from now on
+
+        The scraper's HTTP page cache is switched off, so no request carries conditional headers and
+        every page comes back with its body. Only the requests session is hooked, so the aiohttp
+        backend cannot be recorded.
+        """
+        if hasattr(scraper, 'fetch_page_async'):
+            raise ValueError("Only the requests-based scraper can be recorded - its session carries the recorder")
+        scraper.http_cache = None
+        self.manifest['target_url'] = scraper.target_url
+        self.manifest['inventory_api'] = getattr(scraper.source, 'url', None)
+        self.manifest['detail_pages'] = scraper.enricher is not None
+        scraper.session.hooks['response'].append(self.recorder())
+
+
+class ReplayAdapter(BaseAdapter):
+    """Transport serving a corpus in place of the network - unrecorded URLs get a 404"""
+
+    def __init__(self, corpus):
+        super().__init__()
+        self.corpus = corpus
+        self.served = 0
+        self.missing = []
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        response = Response()
+        response.request = request
+        response.url = request.url
+        response.encoding = None
+        response._content_consumed = True
+        page = self.corpus.pages.get(request.url)
+        if page is None:
+            self.missing.append(request.url)
+            response.status_code = 404
+            response.reason = 'Not Recorded'
+            response._content = b''
+            response.headers = CaseInsensitiveDict()
+            return response
+        self.served += 1
+        response.status_code = page['status']
+        response.reason = 'OK' if page['status'] == 200 else 'Recorded'
+        response.headers = CaseInsensitiveDict(page['headers'])
+        response._content = self.corpus.body(request.url)
+        return response
+
+    def close(self):
+        pass
+
+
+def replay(corpus, scraper):
+    """Point a scraper at a corpus - every request it makes is answered from the recording"""
+    adapter = ReplayAdapter(corpus)
+    scraper.session.mount('https://', adapter)
+    scraper.session.mount('http://', adapter)
+    if corpus.manifest.get('target_url'):
+        scraper.target_url = corpus.manifest['target_url']
+    return adapter
+
+
+def diff_vehicles(expected, actual, key):
+    """Accuracy of actual vehicle dicts against expected ones matched by key
+
+    Returns counts of matched/missing/extra vehicles, mismatches per field among matched ones
+    and accuracy - the share of expected vehicles reproduced exactly.
+    """
+    expected_by_key = {key(vehicle): vehicle for vehicle in expected}
+    actual_by_key = {key(vehicle): vehicle for vehicle in actual}
+    field_mismatches = {}
+    exact = 0
+    for identity, vehicle in expected_by_key.items():
+        other = actual_by_key.get(identity)
+        if other is None:
+            continue
+        differing = [field for field in set(vehicle) | set(other) if vehicle.get(field, '') != other.get(field, '')]
+        for field in differing:
+            field_mismatches[field] = field_mismatches.get(field, 0) + 1
+        exact += not differing
+    matched = len(expected_by_key.keys() & actual_by_key.keys())
+    return {
+        'expected': len(expected_by_key),
+        'actual': len(actual_by_key),
+        'matched': matched,
+        'missing': len(expected_by_key) - matched,
+        'extra': len(actual_by_key) - matched,
+        'exact': exact,
+        'field_mismatches': field_mismatches,
+        'accuracy': exact / len(expected_by_key) if expected_by_key else 1.0,
+    }
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Whole-result cache for the on-demand scrape endpoint
+Fresh results are served for a TTL; a stale one starts a single refresh that the request waits
+on for a short while before serving the stale copy, and concurrent callers for the same key
+share one in-flight scrape
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+
+class Flight:
+    """One in-flight computation that any number of callers can wait on"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.entry = None
+        self.error = None
+        self.cached = False
+
+    def wait(self, timeout=None):
+        """The computed entry - re-raises the leader's error"""
+        if not self.event.wait(timeout):
+            raise TimeoutError("Timed out waiting for the in-flight scrape")
+        if self.error is not None:
+            raise self.error
+        return self.entry
+
+
+class ResultCache:
+    """Key -> serialized result with TTL, stale-while-revalidate and single-flight computes
+
+    Entries live in memory; with a path they are also persisted to a JSON file, or to
+    SQLite when the path ends in .db/.sqlite, so other processes and cold starts can reuse them.
+
+    A stale entry's refresh runs on a thread, and the request that found it waits up to refresh_wait
+    seconds for it. A refresh still running when the response goes out only finishes on hosts that
+    keep the process running afterwards - a frozen serverless instance does not, so give it a
+    refresh_wait long enough for a typical scrape there.
+
+    Callers joining another caller's computation wait up to wait_timeout seconds (None waits for
+    good) and get TimeoutError after that. An entry's 'cached' flag is False when compute() said
+    its result must not be cached - it is still returned to the callers that waited for it.
+    """
+
+    def __init__(self, ttl=300, stale_ttl=3600, path=None, refresh_wait=0.0, wait_timeout=None):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.refresh_wait = refresh_wait
+        self.wait_timeout = wait_timeout
+        self.path = path
+        self.entries = {}
+        self.flights = {}
+        self.lock = threading.Lock()
+        self.store_lock = threading.Lock()
+        self.db = None
+
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            if path.endswith(SQLITE_SUFFIXES):
+                self.db = sqlite3.connect(path, check_same_thread=False)
+                self.db.execute(
+                    "CREATE TABLE IF NOT EXISTS results "
+                    "(key TEXT PRIMARY KEY, body TEXT NOT NULL, etag TEXT NOT NULL, stored_at REAL NOT NULL)")
+                self.db.commit()
+
+    def age(self, entry):
+        return max(0.0, time.time() - entry['stored_at'])
+
+    def is_fresh(self, entry):
+        return self.age(entry) < self.ttl
+
+    def lookup(self, key):
+        """Entry for key that is still fresh or within the stale window, else None"""
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is None:
+            entry = self._load(key)
+            if entry is not None:
+                with self.lock:
+                    self.entries.setdefault(key, entry)
+        if entry is not None and self.age(entry) >= self.ttl + self.stale_ttl:
+            return None
+        return entry
+
+    def begin(self, key):
+        """Join the in-flight computation for key, or start one - returns (flight, is_leader)"""
+        with self.lock:
+            flight = self.flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self.flights[key] = Flight()
+            return flight, True
+
+    def complete(self, key, flight, body=None, cacheable=True, error=None):
+        """Finish a flight started with begin() and wake everyone waiting on it"""
+        if error is None:
+            flight.entry = {
+                'key': key,
+                'body': body,
+                'etag': '"{}"'.format(hashlib.sha256(body.encode('utf-8')).hexdigest()[:32]),
+                'stored_at': time.time(),
+                'cached': bool(cacheable),
+            }
+            if cacheable:
+                with self.lock:
+                    self.entries[key] = flight.entry
+                self._save(flight.entry)
+                flight.cached = True
+        else:
+            flight.error = error
+        with self.lock:
+            if self.flights.get(key) is flight:
+                del self.flights[key]
+        flight.event.set()
+
+    def get(self, key, compute, force=False):
+        """Cached entry for key, computing it at most once at a time - returns (entry, state)
+
+        compute() returns (body, cacheable). state is HIT, REVALIDATED (stale, refreshed within
+        refresh_wait), STALE (served while the refresh carries on), MISS, BYPASS when force
+        computed a fresh result, or COALESCED when the result came from a computation another
+        caller had already started - with force too, so a forced caller can tell it was not its own.
+        """
+        if not force:
+            entry = self.lookup(key)
+            if entry is not None:
+                if self.is_fresh(entry):
+                    return entry, 'HIT'
+                refreshed = self.revalidate(key, compute)
+                if refreshed is not None:
+                    return refreshed, 'REVALIDATED'
+                return entry, 'STALE'
+
+        flight, leader = self.begin(key)
+        if not leader:
+            return flight.wait(self.wait_timeout), 'COALESCED'
+        self._run(key, flight, compute)
+        return flight.wait(), 'BYPASS' if force else 'MISS'
+
+    def revalidate(self, key, compute, wait=None):
+        """Refresh key unless a refresh is already running, waiting up to wait seconds (refresh_wait by default)
+
+        Returns the refreshed entry if it was cached within the wait, else None - serve the stale one then.
+        """
+        flight, leader = self.begin(key)
+        if leader:
+            logger.info("Refreshing stale result for {}".format(key))
+            threading.Thread(target=self._run, args=(key, flight, compute), daemon=True).start()
+        wait = self.refresh_wait if wait is None else wait
+        if wait > 0 and flight.event.wait(wait) and flight.cached:
+            return flight.entry
+        return None
+
+    def _run(self, key, flight, compute):
+        try:
+            body, cacheable = compute()
+        except Exception as e:
+            logger.error("Result refresh for {} failed: {}".format(key, str(e)))
+            self.complete(key, flight, error=e)
+            return
+        self.complete(key, flight, body, cacheable)
+
+    def _load(self, key):
+        if not self.path:
+            return None
+        try:
+            with self.store_lock:
+                if self.db is not None:
+                    row = self.db.execute(
+                        "SELECT body, etag, stored_at FROM results WHERE key = ?", (key,)).fetchone()
+                    if row is None:
+                        return None
+                    return {'key': key, 'body': row[0], 'etag': row[1], 'stored_at': row[2], 'cached': True}
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f).get(key)
+        except (OSError, ValueError, sqlite3.Error):
+            return None
+
+    def _save(self, entry):
+        if not self.path:
+            return
+        try:
+            with self.store_lock:
+                if self.db is not None:
+                    self.db.execute(
+                        "INSERT OR REPLACE INTO results (key, body, etag, stored_at) VALUES (?, ?, ?, ?)",
+                        (entry['key'], entry['body'], entry['etag'], entry['stored_at']))
+                    self.db.commit()
+                    return
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        stored = json.load(f)
+                except (OSError, ValueError):
+                    stored = {}
+                stored[entry['key']] = entry
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(stored, f)
+                os.replace(tmp_path, self.path)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("Could not persist result cache: {}".format(str(e)))
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Per-run scrape metrics
+Stage timers (fetch, decode, parse, select, extract, dedup, write), counters and latency
+histograms for one scrape run, exported as a JSON run report or in the Prometheus text format.
+A disabled instance turns every call into an early return, so instrumented code costs next to nothing.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('fetch', 'decode', 'parse', 'select', 'extract', 'dedup', 'write')
+# Upper bounds in seconds - per-card extraction normally lands between tens of microseconds and a few ms,
+# a page fetch or parse anywhere up to seconds
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0)
+METRIC_PREFIX = 'scraper'
+
+# Shared by every disabled stage() call - entering and leaving it does nothing
+_NO_STAGE = nullcontext()
+
+
+class Histogram:
+    """Fixed-bucket histogram - constant memory however many values are observed"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """q-quantile estimated by linear interpolation inside its bucket, like Prometheus' histogram_quantile"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, self.counts):
+            if count and seen + count >= rank:
+                return min(lower + (bound - lower) * (rank - seen) / count, self.max)
+            seen += count
+            lower = bound
+        return self.max
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'buckets': dict(zip([str(bound) for bound in self.buckets] + ['+Inf'], self.counts)),
+        }
+
+
+class _StageTimer:
+    """Adds the time spent inside a with block to one stage, telling any attached profiler the thread is in it"""
+    __slots__ = ('metrics', 'name', 'started')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        if self.metrics.profiler is not None:
+            self.metrics.profiler.enter_stage(self.name)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.add_time(self.name, time.perf_counter() - self.started)
+        if self.metrics.profiler is not None:
+            self.metrics.profiler.exit_stage(self.name)
+        return False
+
+
+class ScrapeMetrics:
+    """Stage timers, counters, per-field hit counts and histograms for one run
+
+    Stage seconds are summed over every thread that ran the stage, so with concurrent page
+    workers they can add up to more than the run's wall time. begin_run() resets everything.
+    """
+
+    def __init__(self, enabled=True, profiler=None):
+        self.enabled = enabled
+        # Optional stage-aware profiler (scrape_profiler.SamplingProfiler) - only sees stages while enabled
+        self.profiler = profiler
+        self.lock = threading.Lock()
+        self.begin_run()
+
+    def begin_run(self):
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.finished = None
+        self.stage_seconds = dict.fromkeys(STAGES, 0.0)
+        self.stage_calls = dict.fromkeys(STAGES, 0)
+        self.counters = {}
+        self.field_hits = {}
+        self.histograms = {}
+
+    def finish(self):
+        """Stop the run clock - reports taken later keep this run's wall time"""
+        self.finished = time.perf_counter()
+
+    def stage(self, name):
+        """Context manager timing a block into a stage"""
+        if not self.enabled:
+            return _NO_STAGE
+        return _StageTimer(self, name)
+
+    def add_time(self, name, seconds):
+        """Add one timed block to a stage - its duration also goes into the <stage>_stage_seconds histogram"""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + seconds
+            self.stage_calls[name] = self.stage_calls.get(name, 0) + 1
+            self._histogram(name + '_stage_seconds').observe(seconds)
+
+    def count(self, name, amount=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name, value):
+        """Add a value to a histogram, created with the latency buckets on first use"""
+        if not self.enabled:
+            return
+        with self.lock:
+            self._histogram(name).observe(value)
+
+    def _histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
+
+    def fields(self, records, names):
+        """Count which of the named attributes each extracted record filled in"""
+        if not self.enabled:
+            return
+        hits = dict.fromkeys(names, 0)
+        total = 0
+        for record in records:
+            total += 1
+            for name in names:
+                if getattr(record, name) not in (None, ''):
+                    hits[name] += 1
+        with self.lock:
+            self.counters['cards_extracted'] = self.counters.get('cards_extracted', 0) + total
+            for name, count in hits.items():
+                self.field_hits[name] = self.field_hits.get(name, 0) + count
+
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def field_rates(self):
+        extracted = self.counters.get('cards_extracted', 0)
+        return {name: hits / extracted if extracted else 0.0 for name, hits in self.field_hits.items()}
+
+    def report(self):
+        """Everything recorded this run, JSON-serializable"""
+        with self.lock:
+            return {
+                'started_at': self.started_at,
+                'seconds': self.elapsed(),
+                'stages': {name: self._stage_report(name, seconds) for name, seconds in self.stage_seconds.items()},
+                'counters': dict(self.counters),
+                'field_hits': dict(self.field_hits),
+                'field_hit_rates': self.field_rates(),
+                'histograms': {name: histogram.snapshot() for name, histogram in self.histograms.items()},
+            }
+
+    def _stage_report(self, name, seconds):
+        histogram = self.histograms.get(name + '_stage_seconds')
+        stage = {'seconds': seconds, 'calls': self.stage_calls.get(name, 0)}
+        for q in (0.5, 0.95, 0.99):
+            stage['p{:g}'.format(q * 100)] = histogram.quantile(q) if histogram else None
+        return stage
+
+    def summary(self):
+        """Compact run summary for console output and API responses"""
+        with self.lock:
+            card_latency = self.histograms.get('card_extract_seconds')
+            return {
+                'seconds': round(self.elapsed(), 3),
+                'stage_ms': {name: round(seconds * 1000, 1) for name, seconds in self.stage_seconds.items()
+                             if self.stage_calls.get(name)},
+                'pages': self.counters.get('pages_fetched', 0) + self.counters.get('pages_not_modified', 0),
+                'bytes': self.counters.get('bytes_downloaded', 0),
+                'cards': self.counters.get('cards_seen', 0),
+                'rejected': self.counters.get('cards_rejected', 0),
+                'card_ms_p50': round(card_latency.quantile(0.5) * 1000, 3) if card_latency else None,
+                'card_ms_p95': round(card_latency.quantile(0.95) * 1000, 3) if card_latency else None,
+            }
+
+    def format_summary(self):
+        """summary() as one console line"""
+        summary = self.summary()
+        stages = ', '.join('{} {:.0f} ms'.format(name, ms) for name, ms in summary['stage_ms'].items())
+        line = "{:.2f}s - {} | {} pages, {:.1f} KB, {} cards ({} rejected)".format(
+            summary['seconds'], stages or 'no stages timed', summary['pages'], summary['bytes'] / 1024,
+            summary['cards'], summary['rejected'])
+        if summary['card_ms_p50'] is not None:
+            line += ", {} ms/card p50, {} ms p95".format(summary['card_ms_p50'], summary['card_ms_p95'])
+        return line
+
+    def to_prometheus(self):
+        """The run in the Prometheus text exposition format"""
+        report = self.report()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append('# HELP {}_{} {}'.format(METRIC_PREFIX, name, help_text))
+            lines.append('# TYPE {}_{} {}'.format(METRIC_PREFIX, name, kind))
+            for labels, value in samples:
+                label_text = ','.join('{}="{}"'.format(key, label) for key, label in labels)
+                lines.append('{}_{}{} {}'.format(METRIC_PREFIX, name, '{' + label_text + '}' if label_text else '',
+                                                 repr(float(value)) if isinstance(value, float) else value))
+
+        metric('run_seconds', 'gauge', 'Wall time of the scrape run', [((), report['seconds'])])
+        metric('stage_seconds_total', 'counter', 'Time spent per pipeline stage, summed over threads',
+               [((('stage', name),), stage['seconds']) for name, stage in report['stages'].items()])
+        metric('stage_calls_total', 'counter', 'Timed blocks per pipeline stage',
+               [((('stage', name),), stage['calls']) for name, stage in report['stages'].items()])
+        for name, value in sorted(report['counters'].items()):
+            metric(name + '_total', 'counter', name.replace('_', ' ').capitalize(), [((), value)])
+        if report['field_hits']:
+            metric('field_hits_total', 'counter', 'Extracted cards that filled in each field',
+                   [((('field', name),), hits) for name, hits in report['field_hits'].items()])
+        for name, histogram in report['histograms'].items():
+            lines.append('# HELP {}_{} {}'.format(METRIC_PREFIX, name, name.replace('_', ' ').capitalize()))
+            lines.append('# TYPE {}_{} histogram'.format(METRIC_PREFIX, name))
+            cumulative = 0
+            for bound, count in histogram['buckets'].items():
+                cumulative += count
+                lines.append('{}_{}_bucket{{le="{}"}} {}'.format(METRIC_PREFIX, name, bound, cumulative))
+            lines.append('{}_{}_sum {!r}'.format(METRIC_PREFIX, name, float(histogram['sum'])))
+            lines.append('{}_{}_count {}'.format(METRIC_PREFIX, name, histogram['count']))
+        return '\n'.join(lines) + '\n'
+
+    def write_report(self, path):
+        """Write the JSON run report atomically"""
+        self._write(path, json.dumps(self.report(), indent=2))
+
+    def write_prometheus(self, path):
+        """Write the Prometheus text file atomically (e.g. for the node_exporter textfile collector)"""
+        self._write(path, self.to_prometheus())
+
+    def _write(self, path, text):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+            logger.info("Metrics written to {}".format(path))
+        except OSError as e:
+            logger.warning("Could not write metrics to {}: {}".format(path, str(e)))
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Stage-scoped sampling profiler for scrape runs
+Samples the stack of every thread that is inside a pipeline stage (fetch, parse, extract, ...)
+and writes collapsed stacks for flamegraph.pl, a speedscope JSON file and the top-N hot
+functions per stage - stdlib only, and it sees the page worker threads a cProfile run would miss
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 0.002
+MAX_DEPTH = 200
+# Samples of the thread that started the profiler while it is in no stage (waiting on workers, exporting, ...)
+UNSTAGED = 'unstaged'
+
+
+def _on_event_loop():
+    """Whether the calling thread is running an asyncio event loop"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class SamplingProfiler:
+    """Samples thread stacks every interval seconds and files each sample under the thread's current stage
+
+    Stages come from ScrapeMetrics stage timers (see profiling()); other threads outside a stage
+    are idle pool workers and are not sampled. Work done in extraction worker processes is not seen.
+
+    Stages are kept per thread, so only stages entered off an event loop are attributed: coroutines
+    share the loop's thread and would file each other's samples under their stages. Stages entered
+    on a running loop's thread are ignored - their samples count as UNSTAGED on the thread that
+    started the profiler, and async work done in executor threads is attributed as usual.
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL, top=25):
+        self.interval = interval
+        self.top = top
+        self.counts = Counter()
+        self.active = {}
+        self.labels = {}
+        self.frames = {}
+        self.ticks = 0
+        self.seconds = 0.0
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.thread = None
+        self.main_ident = None
+
+    def enter_stage(self, name):
+        if _on_event_loop():
+            return
+        with self.lock:
+            self.active.setdefault(threading.get_ident(), []).append(name)
+
+    def exit_stage(self, name):
+        if _on_event_loop():
+            return
+        with self.lock:
+            stages = self.active.get(threading.get_ident())
+            if stages and stages[-1] == name:
+                stages.pop()
+
+    def start(self):
+        self.main_ident = threading.get_ident()
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self._run, name='scrape-profiler', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is not None:
+            self.stopping.set()
+            self.thread.join()
+            self.thread = None
+
+    def _run(self):
+        own = threading.get_ident()
+        started = time.perf_counter()
+        while not self.stopping.wait(self.interval):
+            frames = sys._current_frames()
+            with self.lock:
+                stages = {ident: names[-1] for ident, names in self.active.items() if names}
+            for ident, frame in frames.items():
+                stage = stages.get(ident) or (UNSTAGED if ident == self.main_ident else None)
+                if stage is None or ident == own:
+                    continue
+                self.counts[(stage,) + self._stack(frame)] += 1
+            self.ticks += 1
+            del frames
+        self.seconds += time.perf_counter() - started
+
+    def _stack(self, frame):
+        """Frame labels from the outermost call in, e.g. 'extract_card_data (toyota_scrapper.py:1630)'"""
+        stack = []
+        while frame is not None and len(stack) < MAX_DEPTH:
+            code = frame.f_code
+            label = self.labels.get(code)
+            if label is None:
+                label = self.labels[code] = '{} ({}:{})'.format(
+                    getattr(code, 'co_qualname', code.co_name), os.path.basename(code.co_filename),
+                    code.co_firstlineno)
+                self.frames[label] = (code.co_filename, code.co_firstlineno)
+            stack.append(label)
+            frame = frame.f_back
+        stack.reverse()
+        return tuple(stack)
+
+    @property
+    def seconds_per_sample(self):
+        """Thread time one sample stands for"""
+        return self.seconds / self.ticks if self.ticks else self.interval
+
+    def stage_samples(self):
+        totals = Counter()
+        for stack, count in self.counts.items():
+            totals[stack[0]] += count
+        return totals
+
+    def hot_functions(self, stage=None, top=None):
+        """Top functions by self time (innermost frame) with their inclusive time, for one stage or all of them"""
+        own = Counter()
+        inclusive = Counter()
+        total = 0
+        for stack, count in self.counts.items():
+            if stage is not None and stack[0] != stage:
+                continue
+            total += count
+            if len(stack) > 1:
+                own[stack[-1]] += count
+            for label in set(stack[1:]):
+                inclusive[label] += count
+        return [{
+            'function': label,
+            'self_seconds': samples * self.seconds_per_sample,
+            'self_share': samples / total,
+            'total_seconds': inclusive[label] * self.seconds_per_sample,
+            'total_share': inclusive[label] / total,
+        } for label, samples in own.most_common(top or self.top)]
+
+    def report(self):
+        """Per-stage sample counts, estimated seconds and hot functions - JSON-serializable"""
+        return {
+            'interval': self.interval,
+            'samples': sum(self.counts.values()),
+            'seconds_per_sample': self.seconds_per_sample,
+            'stages': {stage: {'samples': samples, 'seconds': samples * self.seconds_per_sample,
+                               'hot_functions': self.hot_functions(stage)}
+                       for stage, samples in self.stage_samples().most_common()},
+            'hot_functions': self.hot_functions(),
+        }
+
+    def collapsed(self):
+        """Collapsed stacks ('stage;outer;...;inner count' per line) for flamegraph.pl or speedscope"""
+        return ''.join('{} {}\n'.format(';'.join(stack), count) for stack, count in sorted(self.counts.items()))
+
+    def speedscope(self, name='scrape'):
+        """speedscope file with one sampled profile per stage"""
+        index = {}
+        frames = []
+        profiles = []
+        for stage, _ in self.stage_samples().most_common():
+            samples = []
+            weights = []
+            for stack, count in self.counts.items():
+                if stack[0] != stage:
+                    continue
+                for label in stack[1:]:
+                    if label not in index:
+                        index[label] = len(frames)
+                        file, line = self.frames.get(label, (None, None))
+                        frames.append({'name': label.split(' (')[0], 'file': file, 'line': line})
+                samples.append([index[label] for label in stack[1:]])
+                weights.append(count * self.seconds_per_sample)
+            profiles.append({'type': 'sampled', 'name': stage, 'unit': 'seconds', 'startValue': 0,
+                             'endValue': sum(weights), 'samples': samples, 'weights': weights})
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'exporter': 'scrape_profiler',
+            'shared': {'frames': frames},
+            'profiles': profiles,
+        }
+
+    def format_top(self, top=None):
+        """Plain-text table of the hottest functions overall and per stage"""
+        lines = []
+        stage_samples = self.stage_samples()
+        sections = [('all stages', None)] + [(stage, stage) for stage, _ in stage_samples.most_common()]
+        for title, stage in sections:
+            samples = sum(stage_samples.values()) if stage is None else stage_samples[stage]
+            lines.append('{} - {} samples, {:.2f}s'.format(title, samples, samples * self.seconds_per_sample))
+            lines.append('  {:>8} {:>6} {:>8} {:>6}  {}'.format('self s', 'self', 'total s', 'total', 'function'))
+            for row in self.hot_functions(stage, top):
+                lines.append('  {self_seconds:>8.3f} {self_share:>6.1%} {total_seconds:>8.3f} {total_share:>6.1%}  '
+                             '{function}'.format(**row))
+            lines.append('')
+        return '\n'.join(lines)
+
+    def write(self, directory, name='scrape'):
+        """Write <name>.collapsed, <name>.speedscope.json and <name>_top.txt - returns their paths"""
+        os.makedirs(directory, exist_ok=True)
+        paths = {
+            'collapsed': os.path.join(directory, name + '.collapsed'),
+            'speedscope': os.path.join(directory, name + '.speedscope.json'),
+            'top': os.path.join(directory, name + '_top.txt'),
+        }
+        with open(paths['collapsed'], 'w', encoding='utf-8') as f:
+            f.write(self.collapsed())
+        with open(paths['speedscope'], 'w', encoding='utf-8') as f:
+            json.dump(self.speedscope(name), f)
+        with open(paths['top'], 'w', encoding='utf-8') as f:
+            f.write(self.format_top())
+        logger.info("Profile written to {}".format(directory))
+        return paths
+
+
+@contextmanager
+def profiling(scraper, profiler):
+    """Sample a scraper's runs inside the block - its stage timers are switched on and reported to the profiler"""
+    metrics = scraper.metrics
+    enabled, previous = metrics.enabled, metrics.profiler
+    metrics.enabled, metrics.profiler = True, profiler
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        metrics.enabled, metrics.profiler = enabled, previous
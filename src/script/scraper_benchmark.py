@@ -0,0 +1,1127 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the Red Deer Toyota scraper
+Runs entirely offline against synthetic vehicle cards - no network access needed. Timing
+comparisons only; correctness is covered by the pytest suite in tests/, whose fixture sites
+and synthetic inventories (tests/scrape_fixtures.py) the benchmarks share
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from wsgiref.simple_server import make_server, WSGIRequestHandler
+
+import requests
+from bs4 import BeautifulSoup
+
+import asyncio
+
+import toyota_scrapper
+from toyota_scrapper import (
+    UniversalRedDeerToyotaScraper, AsyncRedDeerToyotaScraper, JsonInventorySource, ListingStrainer,
+    CSV_FIELDNAMES, HTML_PARSER, PRIORITY_SELECTORS, FALLBACK_SELECTORS, PROCESS_EXTRACTION_MIN_CARDS,
+    Vehicle, available_cpus, find_trim, select_all,
+)
+
+TESTS_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'tests'))
+if TESTS_DIR not in sys.path:
+    sys.path.insert(0, TESTS_DIR)
+
+from scrape_fixtures import (  # noqa: E402 - needs TESTS_DIR on the path
+    LocalSite, call_app, detail_site_pages, inventory_api_pages, late_selector_page, legacy_extract_make_and_model,
+    legacy_find_trim, load_api_module, paginated_site_pages, record_local_corpus, replay_run, structured_listing_page,
+    synthetic_card_texts, synthetic_cards_html, synthetic_listing_page, synthetic_titles, synthetic_trim_titles,
+    synthetic_vehicle_records,
+)
+
+
+def bench_extract(count):
+    """Time extract_clean_vehicle_data per element over a synthetic corpus, and the trim lookup
+    against the original re.search loop (tests/test_find_trim.py checks parity)"""
+    scraper = UniversalRedDeerToyotaScraper()
+    soup = BeautifulSoup(synthetic_cards_html(count), 'html.parser')
+    elements = soup.select('.vehicle-card')
+
+    start = time.perf_counter()
+    for element in elements:
+        scraper.extract_clean_vehicle_data(element)
+    elapsed = time.perf_counter() - start
+
+    print("extract: {} cards in {:.3f}s - {:.1f} us/card".format(
+        len(elements), elapsed, elapsed / len(elements) * 1e6))
+
+    titles = synthetic_card_texts(count) + synthetic_trim_titles(count)
+    start = time.perf_counter()
+    for title in titles:
+        legacy_find_trim(title)
+    legacy_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    for title in titles:
+        find_trim(title)
+    elapsed = time.perf_counter() - start
+    print("trim: {} titles - re.search loop {:.1f} us, precompiled {:.1f} us ({:.1f}x)".format(
+        len(titles), legacy_elapsed / len(titles) * 1e6, elapsed / len(titles) * 1e6, legacy_elapsed / elapsed))
+
+
+def bench_extract_workers(count, worker_counts=(1, 2, 4, 8)):
+    """Card extraction through the process pool at several worker counts against serial extraction
+    (tests/test_pagination.py checks the output is identical)"""
+    soup = BeautifulSoup(synthetic_cards_html(count), 'html.parser')
+    elements = soup.select('.vehicle-card')
+    serial_scraper = UniversalRedDeerToyotaScraper()
+
+    start = time.perf_counter()
+    for element in elements:
+        serial_scraper.extract_vehicle(element)
+    serial_elapsed = time.perf_counter() - start
+    print("extract workers: {} cards, {} CPUs available, serial {:.3f}s".format(
+        len(elements), available_cpus(), serial_elapsed))
+
+    for workers in worker_counts:
+        scraper = UniversalRedDeerToyotaScraper(parallel_extract=True, extract_workers=workers)
+        if workers > 1:
+            scraper.extract_vehicles(elements[:PROCESS_EXTRACTION_MIN_CARDS])  # start the pool outside the timing
+        start = time.perf_counter()
+        scraper.extract_vehicles(elements)
+        elapsed = time.perf_counter() - start
+        scraper.shutdown_extraction_pool()
+        print("  {} workers: {:.3f}s - {:.2f}x serial".format(workers, elapsed, serial_elapsed / elapsed))
+
+
+def bench_make_model(count):
+    """Time the make/model matcher against the legacy regex loops (tests/test_make_model.py checks parity)"""
+    scraper = UniversalRedDeerToyotaScraper()
+    titles = synthetic_titles(count)
+
+    start = time.perf_counter()
+    for title in titles:
+        legacy_extract_make_and_model(scraper.car_makes, title)
+    legacy_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for title in titles:
+        scraper.extract_make_and_model(title)
+    elapsed = time.perf_counter() - start
+
+    print("make/model: {} titles - legacy {:.1f} us, matcher {:.1f} us ({:.1f}x)".format(
+        len(titles), legacy_elapsed / len(titles) * 1e6, elapsed / len(titles) * 1e6, legacy_elapsed / elapsed))
+
+
+def bench_pagination(page_counts=(1, 4, 8, 16), latency=0.2, max_workers=8, use_async=False):
+    """Crawl N paginated fixture pages - wall time against a serial estimate
+    (tests/test_pagination.py checks the crawl is concurrent)"""
+    timings = []
+    for page_count in page_counts:
+        with LocalSite(paginated_site_pages(page_count), latency=latency) as site:
+            if use_async:
+                scraper = AsyncRedDeerToyotaScraper(max_concurrency=max_workers, max_pages=page_count,
+                                                    requests_per_second=None)
+            else:
+                scraper = UniversalRedDeerToyotaScraper(max_workers=max_workers, max_pages=page_count,
+                                                        requests_per_second=None)
+            scraper.target_url = site.url
+            start = time.perf_counter()
+            if use_async:
+                vehicles = asyncio.run(scraper.scrape_inventory_async())
+            else:
+                vehicles = scraper.scrape_inventory()
+            elapsed = time.perf_counter() - start
+        timings.append(elapsed)
+        print("pagination: {:>3} pages, {:>4} vehicles, {:>3} requests in {:.2f}s".format(
+            page_count, len(vehicles), site.requests, elapsed))
+
+    serial_estimate = timings[0] * page_counts[-1] / page_counts[0]
+    print("pagination: {} pages took {:.2f}s vs {:.2f}s serial estimate ({:.1f}x)".format(
+        page_counts[-1], timings[-1], serial_estimate, serial_estimate / timings[-1]))
+
+
+def bench_parse(card_counts=(50, 200, 800), repeat=3):
+    """Parse + select time and peak memory per parsing mode over listing pages of increasing size
+    (tests/test_parsing.py checks every mode selects the same elements)"""
+    selectors = PRIORITY_SELECTORS + FALLBACK_SELECTORS
+    parsers = ['html.parser'] + (['lxml'] if HTML_PARSER == 'lxml' else [])
+    modes = [('html.parser full, select per selector', 'html.parser', False, False)]
+    for parser in parsers:
+        modes.append(('{} full, single pass'.format(parser), parser, False, True))
+        modes.append(('{} selective, single pass'.format(parser), parser, True, True))
+
+    def run(html, parser, selective, single_pass):
+        start = time.perf_counter()
+        soup = BeautifulSoup(html, parser, parse_only=ListingStrainer(selectors) if selective else None)
+        parsed = time.perf_counter()
+        if single_pass:
+            candidates = select_all(soup, selectors)
+        else:
+            candidates = {selector: soup.select(selector) for selector in selectors}
+        selected = time.perf_counter()
+        return parsed - start, selected - parsed
+
+    for count in card_counts:
+        html = synthetic_listing_page(count)
+        print("parse: {} cards, {:.0f} KB page".format(count, len(html) / 1024))
+        for label, parser, selective, single_pass in modes:
+            timings = [run(html, parser, selective, single_pass) for _ in range(repeat)]
+            parse_time = min(t[0] for t in timings)
+            select_time = min(t[1] for t in timings)
+
+            tracemalloc.start()
+            run(html, parser, selective, single_pass)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print("  {:<40} parse {:>8.1f} ms  select {:>7.1f} ms  peak {:>7.1f} MB".format(
+                label, parse_time * 1000, select_time * 1000, peak / 1024 / 1024))
+
+
+def bench_structured(count, repeat=3):
+    """Structured-data fast path vs HTML heuristics on the same page (tests/test_structured_data.py
+    checks both read the inventory correctly)"""
+    scraper = UniversalRedDeerToyotaScraper()
+    records = synthetic_vehicle_records(count)
+    html_only = structured_listing_page(records, 'none')
+    html_only = re.sub(rb'<script>.*?</script>', b'', html_only, flags=re.S)
+
+    def run(content):
+        timings = []
+        for _ in range(repeat):
+            start = time.process_time()
+            _, vehicles, _ = scraper.process_page(content, 'http://localhost/inventory/used/')
+            timings.append(time.process_time() - start)
+        return min(timings), vehicles
+
+    html_time, html_vehicles = run(html_only)
+    print("structured: HTML heuristics        {:>6} vehicles  {:>7.1f} us/vehicle".format(
+        len(html_vehicles), html_time / max(len(html_vehicles), 1) * 1e6))
+    for kind in ('json-ld', 'embedded-json'):
+        elapsed, vehicles = run(structured_listing_page(records, kind))
+        print("structured: {:<22} {:>6} vehicles  {:>7.1f} us/vehicle ({:.1f}x)".format(
+            kind, len(vehicles), elapsed / max(len(vehicles), 1) * 1e6, html_time / elapsed))
+
+
+def bench_json_source(count=1000, page_size=50, latency=0.1, max_workers=8):
+    """Page a stub inventory API with JsonInventorySource - concurrent paging vs a serial estimate
+    (tests/test_json_source.py checks every record maps exactly and pages are fetched concurrently)"""
+    records = synthetic_vehicle_records(count)
+    for label, report_total, max_page_size in (('total reported', True, None),
+                                                ('no total', False, None),
+                                                ('server caps page size', True, page_size // 2)):
+        api = inventory_api_pages(records, report_total, max_page_size)
+        with LocalSite(api, latency=latency, content_type='application/json') as site:
+            source = JsonInventorySource(site.url, page_size=page_size)
+            scraper = UniversalRedDeerToyotaScraper(max_workers=max_workers, max_pages=100,
+                                                    requests_per_second=None, source=source)
+            start = time.perf_counter()
+            vehicles = scraper.scrape_inventory()
+            elapsed = time.perf_counter() - start
+        serial_estimate = site.requests * latency
+        print("json source ({}): {} of {} vehicles over {} requests in {:.2f}s vs {:.2f}s serial ({:.1f}x)".format(
+            label, len(vehicles), len(records), site.requests, elapsed, serial_estimate, serial_estimate / elapsed))
+
+
+def bench_stream(page_counts=(32, 64, 128), latency=0.02, max_workers=4):
+    """Peak traced memory of buffered scrape + CSV vs streaming iter_vehicles -> NDJSON as inventory grows,
+    plus when the first record reaches the sink relative to the last page fetch (tests/test_streaming.py
+    checks both produce the same vehicles and the first one arrives early)"""
+    peaks = []
+    with tempfile.TemporaryDirectory() as directory:
+        for page_count in page_counts:
+            with LocalSite(paginated_site_pages(page_count), latency=latency) as site:
+                def make_scraper():
+                    scraper = UniversalRedDeerToyotaScraper(max_workers=max_workers, max_pages=page_count,
+                                                            requests_per_second=None)
+                    scraper.target_url = site.url
+                    return scraper
+
+                tracemalloc.start()
+                scraper = make_scraper()
+                scraper.scrape_inventory()
+                scraper.save_to_csv(os.path.join(directory, 'buffered.csv'))
+                buffered_peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                del scraper
+
+                # Timestamps of the first vehicle handed to the sink and of the last page request
+                marks = {}
+                site_handler = site.server.RequestHandlerClass.do_GET
+
+                def timed_get(handler):
+                    marks['last_fetch'] = time.perf_counter()
+                    site_handler(handler)
+                site.server.RequestHandlerClass.do_GET = timed_get
+
+                def watched(vehicles):
+                    for vehicle in vehicles:
+                        marks.setdefault('first_record', time.perf_counter())
+                        yield vehicle
+
+                tracemalloc.start()
+                scraper = make_scraper()
+                start = time.perf_counter()
+                streamed_count = scraper.stream_to_ndjson(watched(scraper.iter_vehicles()),
+                                                          os.path.join(directory, 'stream.ndjson'))
+                elapsed = time.perf_counter() - start
+                streaming_peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                site.server.RequestHandlerClass.do_GET = site_handler
+
+            peaks.append((streamed_count, buffered_peak, streaming_peak))
+            print("stream: {:>3} pages, {:>5} vehicles - peak buffered {:>6.1f} MB, streaming {:>6.1f} MB; "
+                  "first record at {:.2f}s, last page requested at {:.2f}s of {:.2f}s".format(
+                      page_count, streamed_count, buffered_peak / 1024 / 1024, streaming_peak / 1024 / 1024,
+                      marks.get('first_record', start) - start, marks.get('last_fetch', start) - start, elapsed))
+
+    # Past the in-flight page window, streaming should only grow by the dedup digests and pager URLs
+    (first_count, first_buffered, first_streaming), (last_count, last_buffered, last_streaming) = peaks[0], peaks[-1]
+    buffered_slope = (last_buffered - first_buffered) / (last_count - first_count)
+    streaming_slope = (last_streaming - first_streaming) / (last_count - first_count)
+    print("stream: peak grows {:.0f} B/vehicle buffered vs {:.0f} B/vehicle streaming".format(
+        buffered_slope, streaming_slope))
+
+
+def bench_api_stream(page_count=32, latency=0.05):
+    """Run the /api/scrape WSGI app against a stub dealer site - time to first record streamed as NDJSON/SSE
+    vs buffered JSON (tests/test_api_stream.py checks the streamed vehicles and that the first one is early)"""
+    api = load_api_module()
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    with LocalSite(paginated_site_pages(page_count), latency=latency) as site:
+        class StubSiteScraper(UniversalRedDeerToyotaScraper):
+            def __init__(self, **kwargs):
+                kwargs['cache_dir'] = None
+                super().__init__(max_workers=4, max_pages=page_count, requests_per_second=None, **kwargs)
+                self.target_url = site.url
+
+        api._load_scraper()
+        api.UniversalRedDeerToyotaScraper = StubSiteScraper
+        api.AsyncRedDeerToyotaScraper = None
+        server = make_server('127.0.0.1', 0, api.app, handler_class=QuietHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = 'http://127.0.0.1:{}/api/scrape'.format(server.server_address[1])
+        try:
+            start = time.perf_counter()
+            buffered = requests.get(url, timeout=60).json()
+            print("api: buffered JSON     {:>5} vehicles, first byte after {:.2f}s".format(
+                buffered['count'], time.perf_counter() - start))
+
+            # force=1 so each mode really scrapes instead of replaying the cached result
+            for mode in ('ndjson', 'sse'):
+                start = time.perf_counter()
+                first = None
+                vehicles, summary = [], None
+                with requests.get(url, params={'stream': mode, 'force': '1'}, stream=True, timeout=60) as response:
+                    kind = None
+                    for line in response.iter_lines(decode_unicode=True):
+                        if mode == 'sse' and line.startswith('event: '):
+                            kind = line[len('event: '):]
+                        if not line or (mode == 'sse' and not line.startswith('data: ')):
+                            continue
+                        first = first or time.perf_counter() - start
+                        if mode == 'ndjson':
+                            record = json.loads(line)
+                            kind, data = record['type'], record['data']
+                        else:
+                            data = json.loads(line[len('data: '):])
+                        if kind == 'vehicle':
+                            vehicles.append(data)
+                        else:
+                            summary = data
+                total = time.perf_counter() - start
+                print("api: streamed {:<8} {:>5} vehicles, first record after {:.2f}s of {:.2f}s, "
+                      "summary {}".format(mode, len(vehicles), first or 0, total, summary))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+def bench_api_cache(page_count=8, latency=0.05, callers=8):
+    """Result cache on the endpoint - latency of concurrent cold requests sharing one scrape, of a
+    cache hit and of stale responses while the refresh runs (tests/test_result_cache.py checks the
+    cache states, ETag/304, single-flight and persistence)"""
+    from result_cache import ResultCache
+    api = load_api_module()
+
+    def concurrently(fn):
+        barrier = threading.Barrier(callers)
+
+        def call():
+            barrier.wait()
+            fn()
+        threads = [threading.Thread(target=call) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    with LocalSite(paginated_site_pages(page_count), latency=latency) as site:
+        class StubSiteScraper(UniversalRedDeerToyotaScraper):
+            def __init__(self, **kwargs):
+                kwargs['cache_dir'] = None
+                super().__init__(max_workers=4, max_pages=page_count, requests_per_second=None, **kwargs)
+                self.target_url = site.url
+
+        api._load_scraper()
+        api.UniversalRedDeerToyotaScraper = StubSiteScraper
+        api.AsyncRedDeerToyotaScraper = None
+        api._RESULT_CACHE = ResultCache(ttl=1, stale_ttl=60)
+
+        start = time.perf_counter()
+        concurrently(lambda: call_app(api))
+        cold = time.perf_counter() - start
+        print("api-cache: {} concurrent cold requests {:.2f}s, {} page fetches".format(callers, cold, site.requests))
+
+        start = time.perf_counter()
+        call_app(api)
+        print("api-cache: warm request {:.1f} ms".format((time.perf_counter() - start) * 1000))
+
+        time.sleep(1.1)
+        start = time.perf_counter()
+        concurrently(lambda: call_app(api))
+        stale = time.perf_counter() - start
+        flight = api._RESULT_CACHE.flights.get(api.RESULT_KEY)
+        if flight is not None:
+            flight.event.wait(60)
+        print("api-cache: {} requests for an expired entry {:.1f} ms (served stale), {} page fetches".format(
+            callers, stale * 1000, site.requests))
+
+        start = time.perf_counter()
+        call_app(api, {'force': '1'})
+        print("api-cache: ?force=1 {:.2f}s".format(time.perf_counter() - start))
+
+
+def bench_store(days=30, listed=5000, turnover=3000, seed=1403):
+    """Inventory store - upserts and queries over ~100k historical rows (history: tests/test_inventory_store.py)"""
+    from inventory_store import InventoryStore
+    day = 24 * 3600
+    start_time = 1700000000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        scraper = UniversalRedDeerToyotaScraper(cache_dir=None)
+        # Rolling inventory: each day `turnover` vehicles sell, as many arrive, a few get re-priced
+        rng = random.Random(seed)
+        records = synthetic_vehicle_records(listed + turnover * days, seed=seed)
+        store = InventoryStore(os.path.join(tmp, 'history.sqlite'), CSV_FIELDNAMES)
+        inventory = [dict(record) for record in records[:listed]]
+        next_number = listed
+        run_times = []
+        for run in range(days):
+            if run:
+                rng.shuffle(inventory)
+                inventory = inventory[turnover:]
+                inventory.extend(dict(record) for record in records[next_number:next_number + turnover])
+                next_number += turnover
+                for vehicle in rng.sample(inventory, listed // 20):
+                    vehicle['value'] = str(int(vehicle['value']) - rng.choice((250, 500, 1000, -500)))
+            started = time.perf_counter()
+            store.record_run(inventory, dedup_key=scraper.dedup_key, now=start_time + run * day)
+            run_times.append(time.perf_counter() - started)
+        rows = store.db.execute("SELECT COUNT(*) FROM vehicles").fetchone()[0]
+        history = store.db.execute("SELECT COUNT(*) FROM price_history").fetchone()[0]
+        print("store: {} runs of {} vehicles -> {} vehicle rows, {} price history rows; "
+              "upsert median {:.0f} ms per run".format(days, listed, rows, history,
+                                                       sorted(run_times)[len(run_times) // 2] * 1000))
+
+        now = start_time + (days - 1) * day
+        queries = [
+            ("price drops in the last 7 days", lambda: store.price_drops(days=7, now=now)),
+            ("days on lot by make (listed)", lambda: store.days_on_lot_by_make()),
+            ("days on lot by make (sold)", lambda: store.days_on_lot_by_make(active=False)),
+            ("export order (listed)", lambda: list(store.iter_listed())),
+        ]
+        for label, query in queries:
+            timings = []
+            for _ in range(5):
+                started = time.perf_counter()
+                result = query()
+                timings.append(time.perf_counter() - started)
+            print("store: {:<46} {:>7.1f} ms".format("{} ({} rows)".format(label, len(result)), min(timings) * 1000))
+        store.close()
+
+
+def bench_delta(count=50000, seed=1403):
+    """Delta export - O(n) diff time, feed vs snapshot size (tests/test_delta_export.py checks the deltas)"""
+    from delta_export import DeltaExporter, CHANGES_FILE
+
+    def key(vehicle):
+        return vehicle['stock_number']
+
+    rng = random.Random(seed)
+    records = synthetic_vehicle_records(count + 500, seed=seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        exporter = DeltaExporter(tmp, CSV_FIELDNAMES)
+        inventory = [dict(record) for record in records[:count]]
+        started = time.perf_counter()
+        first = exporter.export(inventory, key)
+        print("delta: first export of {} vehicles in {:.0f} ms ({} added)".format(
+            count, (time.perf_counter() - started) * 1000, len(first['added'])))
+
+        started = time.perf_counter()
+        exporter.export([dict(vehicle) for vehicle in reversed(inventory)], key)
+        print("delta: unchanged run diffed {} vehicles in {:.0f} ms".format(
+            count, (time.perf_counter() - started) * 1000))
+
+        # Two more runs: sold and new vehicles, re-pricing, odometer corrections, fixed trims
+        next_record = count
+        for _ in range(2):
+            rng.shuffle(inventory)
+            inventory = inventory[200:]
+            added = [dict(record) for record in records[next_record:next_record + 250]]
+            next_record += 250
+            for vehicle in inventory[:400]:
+                vehicle['value'] = str(int(vehicle['value']) - 500)
+            for vehicle in inventory[400:500]:
+                vehicle['mileage'] = str(int(vehicle['mileage']) + 1200)
+            for vehicle in inventory[500:520]:
+                vehicle['engine'] = vehicle['engine'] + ' Hybrid'
+            inventory = inventory + added
+            started = time.perf_counter()
+            delta = exporter.export(inventory, key)
+            elapsed = time.perf_counter() - started
+            counts = {kind: len(delta[kind]) for kind in ('added', 'removed', 'price_changed', 'mileage_changed',
+                                                          'updated')}
+            print("delta: diff {} vehicles in {:.0f} ms {}".format(len(inventory), elapsed * 1000, counts))
+
+        with open(os.path.join(tmp, CHANGES_FILE), 'r', encoding='utf-8') as f:
+            feed = json.load(f)
+        snapshot_size = os.path.getsize(os.path.join(tmp, feed['snapshot']))
+        feed_size = os.path.getsize(os.path.join(tmp, CHANGES_FILE))
+        print("delta: changes.json {:.0f} KB ({} deltas) vs full snapshot {:.0f} KB".format(
+            feed_size / 1024, len(feed['deltas']), snapshot_size / 1024))
+
+
+def bench_columnar(count=50000, repeat=3):
+    """Columnar export vs the CSV on a synthetic inventory - file sizes and parse time"""
+    import gzip
+    from columnar_export import ColumnarExporter, COLUMNS_FILE, NUMERIC_FIELDS, decode_columns, parquet_available
+    vehicles = synthetic_vehicle_records(count)
+    scraper = UniversalRedDeerToyotaScraper(cache_dir=None)
+    scraper.vehicles = [Vehicle.from_dict(vehicle) for vehicle in vehicles]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'inventory.csv')
+        scraper.save_to_csv(csv_path)
+        exporter = ColumnarExporter(tmp, CSV_FIELDNAMES)
+        sizes = exporter.export(vehicles)
+        if parquet_available():
+            sizes[os.path.join(tmp, 'inventory.parquet')] = exporter.export_parquet(
+                vehicles, os.path.join(tmp, 'inventory.parquet'))
+        with open(csv_path, 'rb') as f:
+            csv_body = f.read()
+        columns_path = os.path.join(tmp, COLUMNS_FILE)
+        with open(columns_path, 'rb') as f:
+            columns_body = f.read()
+
+        print("columnar: {} vehicles".format(count))
+        print("  {:<28} {:>9.1f} KB".format('inventory.csv', len(csv_body) / 1024))
+        print("  {:<28} {:>9.1f} KB".format('inventory.csv (gzip -9)', len(gzip.compress(csv_body, 9)) / 1024))
+        for path, size in sizes.items():
+            print("  {:<28} {:>9.1f} KB".format(os.path.basename(path), size / 1024))
+
+        def parse_csv():
+            # What the UI needs: rows with typed numbers
+            rows = list(csv.DictReader(csv_body.decode('utf-8').splitlines()))
+            for row in rows:
+                for field in NUMERIC_FIELDS:
+                    row[field] = int(row[field]) if row[field] else None
+            return rows
+
+        def parse_columns():
+            return json.loads(columns_body)
+
+        def parse_columns_to_rows():
+            return decode_columns(json.loads(columns_body))
+
+        def timed(parse):
+            started = time.perf_counter()
+            parse()
+            return time.perf_counter() - started
+
+        for label, parse in (('CSV -> typed rows', parse_csv), ('columnar JSON -> columns', parse_columns),
+                             ('columnar JSON -> row dicts', parse_columns_to_rows)):
+            best = min(timed(parse) for _ in range(repeat))
+            print("  parse {:<28} {:>7.1f} ms".format(label, best * 1000))
+
+
+def bench_vehicle(count=100000, repeat=3):
+    """Vehicle records vs the old string dicts - memory per 100k, serialization and dedup throughput"""
+    import io
+    records = synthetic_vehicle_records(count)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDNAMES)
+    writer.writeheader()
+    writer.writerows(records)
+    csv_text = buffer.getvalue()
+    scraper = UniversalRedDeerToyotaScraper(cache_dir=None)
+
+    def as_dicts():
+        return list(csv.DictReader(io.StringIO(csv_text)))
+
+    def as_vehicles():
+        rows = csv.reader(io.StringIO(csv_text))
+        next(rows)
+        return [Vehicle(make, int(year), model, sub_model, trim, int(mileage) if mileage else None,
+                        int(value) if value else None, int(sale) if sale else None, stock, engine, vin)
+                for make, year, model, sub_model, trim, mileage, value, sale, stock, engine, vin in rows]
+
+    def footprint(build):
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        built = build()
+        size = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        return built, size
+
+    dicts, dict_bytes = footprint(as_dicts)
+    vehicles, vehicle_bytes = footprint(as_vehicles)
+    scale = 100000 / count
+    print("vehicle: {} records - dicts {:.1f} MB, Vehicle {:.1f} MB per 100k ({:.0f} vs {:.0f} B/record, {:.1f}x)".format(
+        count, dict_bytes * scale / 1e6, vehicle_bytes * scale / 1e6, dict_bytes / count, vehicle_bytes / count,
+        dict_bytes / vehicle_bytes))
+
+    def timed(fn):
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - started)
+        return best
+
+    def csv_dicts():
+        writer = csv.DictWriter(io.StringIO(), fieldnames=CSV_FIELDNAMES)
+        writer.writeheader()
+        for vehicle in dicts:
+            writer.writerow({field: vehicle.get(field, '') for field in CSV_FIELDNAMES})
+
+    def csv_vehicles():
+        writer = csv.writer(io.StringIO())
+        writer.writerow(CSV_FIELDNAMES)
+        writer.writerows(vehicle.to_row() for vehicle in vehicles)
+
+    legacy_dedup = UniversalRedDeerToyotaScraper.dedup_key
+
+    def legacy_complete(vehicle):
+        # is_complete_vehicle as it was for string dicts
+        return all(vehicle.get(field, '').strip() for field in ('year', 'makeName')) and sum(
+            1 for field in ('model', 'value', 'stock_number', 'mileage') if vehicle.get(field, '').strip()) >= 1
+    for label, before, after in (
+            ('CSV write', csv_dicts, csv_vehicles),
+            ('JSON (API shape)', lambda: json.dumps(dicts),
+             lambda: json.dumps([vehicle.to_dict() for vehicle in vehicles])),
+            ('dedup keys', lambda: [legacy_dedup(scraper, vehicle) for vehicle in dicts],
+             lambda: [scraper.dedup_key(vehicle) for vehicle in vehicles]),
+            ('completeness check', lambda: [legacy_complete(vehicle) for vehicle in dicts],
+             lambda: [scraper.is_complete_vehicle(vehicle) for vehicle in vehicles])):
+        old, new = timed(before), timed(after)
+        print("vehicle: {:<20} dicts {:>7.0f} k/s   Vehicle {:>7.0f} k/s ({:.2f}x)".format(
+            label, count / old / 1000, count / new / 1000, old / new))
+    # The JSON gap is building the API dicts, which the string-dict pipeline paid during extraction instead
+    to_dict = timed(lambda: [vehicle.to_dict() for vehicle in vehicles])
+    print("vehicle: to_dict() {:.2f} us/vehicle - the API shape costs that once per vehicle served".format(
+        to_dict / count * 1e6))
+
+    elements = BeautifulSoup(synthetic_cards_html(5000), HTML_PARSER).select('.vehicle-card')
+    payloads = [toyota_scrapper.card_payload(element) for element in elements]
+    elapsed = timed(lambda: [scraper.extract_card_data(*payload) for payload in payloads])
+    print("vehicle: extraction {:.1f} us/card over {} cards".format(elapsed / len(payloads) * 1e6, len(payloads)))
+
+
+def bench_dealers(latency=0.1):
+    """Multi-dealer batch - wall time close to the slowest site, politeness per host (tests/test_dealer_batch.py)"""
+    from dealer_batch import dealer_scraper, scrape_many, DealerConfig
+
+    # The same fixture pages on every site - identical stock numbers must stay apart per dealer
+    sites = [LocalSite(paginated_site_pages(pages), latency=latency) for pages in (8, 6, 2)]
+    for site in sites:
+        site.__enter__()
+    try:
+        configs = [
+            # Rate-limited sites - 8 pages at 4 requests/s take at least 1.75s whatever the concurrency
+            DealerConfig('north', sites[0].url, requests_per_second=4.0, max_pages=8),
+            DealerConfig('south', sites[1].url, requests_per_second=4.0, max_pages=6),
+            DealerConfig('west', sites[2].url, requests_per_second=None, max_pages=2),
+        ]
+        alone = {}
+        for config in configs:
+            started = time.perf_counter()
+            alone[config.dealer_id] = (len(dealer_scraper(config).scrape_inventory()), time.perf_counter() - started)
+        serial = sum(seconds for _, seconds in alone.values())
+        slowest = max(seconds for _, seconds in alone.values())
+        print("dealers: one at a time {} - {:.2f}s in total".format(
+            ', '.join('{} {} vehicles {:.2f}s'.format(dealer_id, count, seconds)
+                      for dealer_id, (count, seconds) in alone.items()), serial))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            batch = scrape_many(configs, store_path=os.path.join(tmp, 'dealers.sqlite'),
+                                output_dir=os.path.join(tmp, 'dealers'))
+            print("dealers: batch {:.2f}s vs slowest site {:.2f}s and {:.2f}s one after another; "
+                  "rate-limited north {:.2f}s".format(batch['seconds'], slowest, serial,
+                                                     batch['dealers']['north']['seconds']))
+    finally:
+        for site in sites:
+            site.__exit__()
+
+
+def bench_enrich(count=72, latency=0.05, max_workers=4):
+    """Detail-page enrichment - concurrent fetches, the next run from the cache and the time budget
+    (tests/test_detail_enrichment.py checks the fields, concurrency and budget)"""
+    from detail_enrichment import DetailEnricher
+
+    pages = detail_site_pages(synthetic_vehicle_records(count))
+    site = LocalSite(pages, latency=latency).__enter__()
+
+    def run(enricher, site_latency=latency):
+        """Scrape the listing, then time enrichment alone"""
+        site.latency = site_latency
+        scraper = UniversalRedDeerToyotaScraper(max_workers=max_workers, max_pages=100, requests_per_second=None)
+        scraper.target_url = site.url
+        vehicles = scraper.scrape_inventory()
+        del pages.details[:]
+        started = time.perf_counter()
+        stats = enricher.enrich(scraper, vehicles)
+        return stats, time.perf_counter() - started
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            stats, elapsed = run(DetailEnricher(os.path.join(tmp, 'details.json'), max_seconds=30))
+            serial = len(pages.details) * latency
+            print("enrich: {} detail pages in {:.2f}s vs {:.2f}s serial {}".format(
+                len(pages.details), elapsed, serial, stats))
+            stats, elapsed = run(DetailEnricher(os.path.join(tmp, 'details.json'), max_seconds=30))
+            print("enrich: next run from the cache in {:.3f}s {}".format(elapsed, stats))
+
+            slow = 0.3
+            stats, elapsed = run(DetailEnricher(os.path.join(tmp, 'seconds.json'), max_seconds=0.5), site_latency=slow)
+            print("enrich: {:.1f}s budget with {:.1f}s pages ended after {:.2f}s {}".format(0.5, slow, elapsed, stats))
+    finally:
+        site.__exit__()
+
+
+def bench_selectors(page_count=8, cards=100, repeat=3):
+    """Adaptive selector cache - last run's winner first vs the full probe, on pages where it is late in the list
+
+    tests/test_selector_cache.py checks both find the same vehicles, that the remembered selector is the only
+    one tried and that a re-templated site is relearned.
+    """
+    from toyota_scrapper import SelectorCache, page_template_fingerprint
+    url = 'https://dealer.example/inventory/used/?page={}'
+    pages = [late_selector_page(cards, seed=number) for number in range(1, page_count + 1)]
+
+    def process(make_cache, content_pages=pages):
+        """Best-of-repeat time to process every page, with a fresh selector cache per repeat"""
+        best = None
+        for _ in range(repeat):
+            scrapers = [UniversalRedDeerToyotaScraper(cache_dir=None) for _ in content_pages]
+            for scraper in scrapers:
+                scraper.selector_cache = make_cache()
+            started = time.perf_counter()
+            for number, (scraper, content) in enumerate(zip(scrapers, content_pages), 1):
+                scraper.process_page(content, url.format(number))
+            elapsed = time.perf_counter() - started
+            if best is None or elapsed < best[0]:
+                best = (elapsed, scrapers)
+        return best
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'selectors.json')
+        # Cold: every page runs the full probe (each scraper has an empty cache)
+        cold, cold_scrapers = process(SelectorCache)
+        metrics = {}
+        for scraper in cold_scrapers:
+            for row in scraper.selector_cache.report():
+                totals = metrics.setdefault(row['selector'], {'tries': 0, 'matched': 0, 'complete': 0, 'seconds': 0.0})
+                for key in totals:
+                    totals[key] += row[key]
+        print("selectors: full-probe metrics over {} pages".format(page_count))
+        for selector, row in sorted(metrics.items(), key=lambda item: -item[1]['seconds']):
+            print("  {:<22} {:>3} tries {:>5} matched {:>5} complete ({:>4.0%}) {:>7.1f} ms".format(
+                selector, row['tries'], row['matched'], row['complete'],
+                row['complete'] / row['matched'] if row['matched'] else 0, row['seconds'] * 1000))
+
+        # A previous run left its winner on disk
+        cold_scrapers[0].selector_cache.path = path
+        cold_scrapers[0].selector_cache.save()
+        warm, _ = process(lambda: SelectorCache(path))
+        print("selectors: {} pages of {} cards - full probe {:.1f} ms, remembered selector {:.1f} ms ({:.2f}x)".format(
+            page_count, cards, cold * 1000, warm * 1000, cold / warm))
+
+        started = time.perf_counter()
+        for content in pages:
+            page_template_fingerprint(content)
+        fingerprint_ms = (time.perf_counter() - started) * 1000 / page_count
+        print("selectors: template fingerprint {:.2f} ms/page vs {:.2f} ms/page to process with the remembered "
+              "selector".format(fingerprint_ms, warm * 1000 / page_count))
+
+
+def bench_transport(page_count=12, max_workers=4, use_async=False):
+    """Retrying transport against a fault-injecting local site - what transient 429/5xx, dropped
+    connections, slow responses and a run budget cost in crawl time; with use_async the aiohttp
+    backend goes through the same faults (tests/test_http_transport.py checks retries, timeouts, the run
+    budget and the breaker)"""
+    from http_transport import ResilientAdapter
+    pages = paginated_site_pages(page_count)
+
+    def crawl(faults, **settings):
+        settings.setdefault('backoff_base', 0.05)
+        with LocalSite(pages, faults=faults) as site:
+            if use_async:
+                scraper = AsyncRedDeerToyotaScraper(max_concurrency=max_workers, max_pages=page_count,
+                                                    requests_per_second=None, transport=ResilientAdapter(**settings))
+            else:
+                scraper = UniversalRedDeerToyotaScraper(max_workers=max_workers, max_pages=page_count,
+                                                        requests_per_second=None,
+                                                        transport=ResilientAdapter(**settings))
+            scraper.target_url = site.url
+            start = time.perf_counter()
+            if use_async:
+                vehicles = asyncio.run(scraper.scrape_inventory_async())
+            else:
+                vehicles = scraper.scrape_inventory()
+            return vehicles, time.perf_counter() - start, scraper.transport.stats
+
+    clean, clean_seconds, _ = crawl(None)
+    print("transport: clean crawl {} pages, {} vehicles in {:.2f}s".format(page_count, len(clean), clean_seconds))
+
+    # Every page fails twice first - 503, 429 with Retry-After, 500 or a dropped connection
+    def transient(path, hit):
+        if hit >= 2:
+            return None
+        kind = sum(map(ord, path)) % 4
+        return [{'status': 503}, {'status': 429, 'retry_after': 1}, {'status': 500}, {'drop': True}][kind]
+    vehicles, seconds, stats = crawl(transient)
+    print("transport: transient 429/5xx/drops - {} vehicles in {:.2f}s, {}".format(len(vehicles), seconds, stats))
+
+    # A page that hangs for 3s is cut off at the read timeout and retried instead of waited out
+    vehicles, seconds, stats = crawl(lambda path, hit: {'delay': 3.0} if 'page=3' in path and hit == 0 else None,
+                                     read_timeout=0.5)
+    print("transport: 3s response cut at a 0.5s read timeout and retried - {} vehicles in {:.2f}s, {} retries".format(
+        len(vehicles), seconds, stats['retries']))
+
+    # Every page is slow; the run budget ends the crawl on time with what was fetched so far
+    budget = 1.5
+    vehicles, seconds, stats = crawl(lambda path, hit: {'delay': 0.6} if 'page=' in path else None,
+                                     run_budget=budget)
+    print("transport: {:.1f}s run budget, every page slow - {} of {} vehicles in {:.2f}s, {} over budget".format(
+        budget, len(vehicles), len(clean), seconds, stats['budget_exhausted']))
+
+
+def bench_metrics(page_count=8, cards=200, repeat=5, max_workers=4):
+    """Run metrics - a crawl's summary, and the cost of instrumentation enabled vs disabled on the
+    extraction hot path (tests/test_scrape_metrics.py checks the stages, counters and outputs)"""
+    from scrape_metrics import ScrapeMetrics
+    pages = paginated_site_pages(page_count, cards_per_page=cards)
+
+    with LocalSite(pages) as site, tempfile.TemporaryDirectory() as directory:
+        scraper = UniversalRedDeerToyotaScraper(max_workers=max_workers, max_pages=page_count,
+                                                requests_per_second=None, metrics=ScrapeMetrics())
+        scraper.target_url = site.url
+        scraper.stream_to_csv(scraper.iter_vehicles(), os.path.join(directory, 'inventory.csv'))
+        scraper.metrics.finish()
+        print("metrics: {}".format(scraper.metrics.format_summary()))
+
+    # Instrumentation cost on the per-card path: pages already fetched, extraction cache off
+    contents = list(pages.values())
+
+    def process(metrics):
+        best = None
+        for _ in range(repeat):
+            scraper = UniversalRedDeerToyotaScraper(cache_dir=None, metrics=metrics)
+            started = time.perf_counter()
+            for number, content in enumerate(contents, 1):
+                scraper.process_page(content, site.url + '?page={}'.format(number))
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    disabled = process(None)
+    enabled = process(ScrapeMetrics())
+    overhead = enabled / disabled - 1
+    print("metrics: {} pages of {} cards - disabled {:.1f} ms, enabled {:.1f} ms ({:+.1%})".format(
+        page_count, cards, disabled * 1000, enabled * 1000, overhead))
+
+
+def bench_profile(page_count=8, cards=200, max_workers=4):
+    """Stage-scoped profiler - a crawl with and without sampling, and where its time goes
+    (tests/test_scrape_profiler.py checks stage attribution, the written files and ?profile=1)"""
+    from scrape_profiler import SamplingProfiler, profiling
+    pages = paginated_site_pages(page_count, cards_per_page=cards)
+
+    with LocalSite(pages) as site:
+        scraper = UniversalRedDeerToyotaScraper(max_workers=max_workers, max_pages=page_count, cache_dir=None,
+                                                requests_per_second=None)
+        scraper.target_url = site.url
+        started = time.perf_counter()
+        scraper.scrape_inventory()
+        plain = time.perf_counter() - started
+        profiler = SamplingProfiler(interval=0.001, top=10)
+        started = time.perf_counter()
+        with profiling(scraper, profiler):
+            vehicles = scraper.scrape_inventory()
+        elapsed = time.perf_counter() - started
+    report = profiler.report()
+    print("profile: {} vehicles in {:.2f}s profiled vs {:.2f}s without ({:+.0%}), {} samples".format(
+        len(vehicles), elapsed, plain, elapsed / plain - 1, report['samples']))
+    print("profile: {}".format(
+        ', '.join('{} {:.0f} ms'.format(stage, data['seconds'] * 1000) for stage, data in report['stages'].items())))
+    print(profiler.format_top(5))
+
+
+def scaled_corpus(corpus, cards, path):
+    """One-page corpus holding cards vehicle cards cloned from the recorded listing page's winning
+    container markup - None when the listing page has no container cards to clone"""
+    from page_corpus import PageCorpus
+    url = corpus.manifest['target_url']
+    body = corpus.body(corpus.final_url(url))
+    if not body:
+        return None
+    scraper = UniversalRedDeerToyotaScraper(cache_dir=None)
+    soup = scraper.parse_page(body)
+    _, selector, _ = scraper.probe_selectors(soup)
+    if selector is None:
+        return None
+    markup = [str(element) for element in select_all(soup, [selector])[selector]]
+    page = '<html><head><title>Used Inventory</title></head><body><main class="results">{}</main></body></html>'.format(
+        ''.join(markup[index % len(markup)] for index in range(cards)))
+    scaled = PageCorpus(path)
+    scaled.manifest['target_url'] = url
+    scaled.add(url, 200, {'Content-Type': 'text/html; charset=utf-8'}, page.encode('utf-8'))
+    scaled.save()
+    return scaled
+
+
+def _quiet_replay_worker():
+    """Replay worker initializer - per-page and per-vehicle INFO lines would drown the report"""
+    logging.getLogger().setLevel(logging.WARNING)
+
+
+def replay_regressions(results, baseline, threshold):
+    """Changes against a saved baseline beyond threshold - throughput down or peak RSS / per-card growth up"""
+    found = []
+    for label, result in results.items():
+        old = baseline.get(label)
+        if not old:
+            continue
+        for key, higher_is_better in (('cards_per_second', True), ('peak_rss_mb', False), ('per_card_growth', False)):
+            if result.get(key) is None or not old.get(key):
+                continue
+            change = result[key] / old[key] - 1
+            if (-change if higher_is_better else change) > threshold:
+                found.append("{} {}: {:.4g} vs baseline {:.4g} ({:+.0%})".format(label, key, result[key], old[key],
+                                                                                   change))
+    return found
+
+
+def bench_replay(corpus_root=None, scales=(1000, 10000, 50000), baseline_path=None, save_baseline=None,
+                 threshold=0.2, update_golden=False):
+    """Replay a recorded corpus (or a fresh recording of a local site) and card-scaled copies of its
+    listing page through scrape_inventory offline - throughput, per-stage latency, peak RSS and
+    regressions against a saved baseline, which are returned (tests/test_page_corpus.py checks accuracy
+    against the golden output)"""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    from page_corpus import PageCorpus
+    found = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        if corpus_root is None:
+            corpus = record_local_corpus(os.path.join(directory, 'recorded'))
+            print("replay: recorded {} pages from a local site into {}".format(len(corpus.pages), corpus.path))
+        elif os.path.exists(os.path.join(corpus_root, 'manifest.json')):
+            corpus = PageCorpus(corpus_root)
+        else:
+            corpus = PageCorpus.latest(corpus_root)
+        print("replay: corpus {} - {} pages, {:.1f} MB".format(corpus.path, len(corpus.pages),
+                                                                corpus.total_bytes() / 1e6))
+
+        cases = [('corpus', corpus.path)]
+        for cards in scales:
+            scaled = scaled_corpus(corpus, cards, os.path.join(directory, 'scaled-{}'.format(cards)))
+            if scaled is None:
+                print("replay: listing page has no container cards - no scaled pages")
+                break
+            cases.append(('{} cards'.format(cards), scaled.path))
+
+        results = {}
+        for label, path in cases:
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'),
+                                     initializer=_quiet_replay_worker) as pool:
+                result = results[label] = pool.submit(replay_run, path).result()
+            print("replay: {:<12} {:>6} cards {:>6} vehicles in {:>7.2f}s - {:>8.0f} cards/s {:>6.2f} MB/s "
+                  "{:>7.1f} us/card, peak RSS {} MB".format(
+                      label, result['cards'], len(result['vehicles']), result['seconds'], result['cards_per_second'],
+                      result['mb_per_second'], result['us_per_card'] or 0,
+                      '{:.0f}'.format(result['peak_rss_mb']) if result['peak_rss_mb'] is not None else '?'))
+            for name, stage in result['stages'].items():
+                print("          {:<8} {:>5} calls {:>9.1f} ms total, p50 {:>8.3f} ms, p95 {:>8.3f} ms".format(
+                    name, stage['calls'], stage['seconds'] * 1000, stage['p50'] * 1000, stage['p95'] * 1000))
+        if results['corpus']['missing']:
+            print("replay: {} pages were not recorded - timings are off".format(len(results['corpus']['missing'])))
+
+        # Per-card cost should stay flat as pages grow - growth well above 1 means something is non-linear
+        scaled_results = [result for label, result in results.items() if label != 'corpus']
+        if len(scaled_results) > 1:
+            growth = scaled_results[-1]['us_per_card'] / scaled_results[0]['us_per_card']
+            results['corpus']['per_card_growth'] = growth
+            print("replay: per-card cost grows {:.2f}x from {} to {}{}".format(
+                growth, cases[1][0], cases[-1][0], ' - non-linear' if growth > 1 + threshold else ''))
+
+        if update_golden:
+            vehicles = results['corpus']['vehicles']
+            corpus.save_golden([Vehicle.from_dict(vehicle) for vehicle in vehicles])
+            print("replay: golden output updated with {} vehicles".format(len(vehicles)))
+
+        summary = {label: {key: value for key, value in result.items() if key not in ('vehicles', 'missing')}
+                   for label, result in results.items()}
+        if baseline_path:
+            with open(baseline_path, encoding='utf-8') as f:
+                found = replay_regressions(summary, json.load(f), threshold)
+            print("replay: {} regressions beyond {:.0%} against {}".format(
+                len(found), threshold, os.path.basename(baseline_path)))
+            for regression in found:
+                print("  " + regression)
+        if save_baseline:
+            with open(save_baseline, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=2)
+            print("replay: baseline saved to {}".format(save_baseline))
+    return found
+
+
+def import_times(statement, cwd):
+    """Cumulative import time in microseconds per module from python -X importtime"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], cwd=cwd,
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def bench_startup(repeat=3):
+    """Cold import cost of the scraper and the endpoint, then two warm invocations in one process
+    (tests/test_startup.py checks what is imported lazily and what warm invocations reuse)"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    api_dir = os.path.join(script_dir, '..', '..', 'api')
+
+    runs = [import_times('import toyota_scrapper', script_dir) for _ in range(repeat)]
+    times = min(runs, key=lambda run: run['toyota_scrapper'])
+    print("startup: import toyota_scrapper {:.1f} ms (best of {})".format(times['toyota_scrapper'] / 1000, repeat))
+    for name, cumulative in sorted(times.items(), key=lambda item: -item[1])[1:9]:
+        if '.' not in name:
+            print("  {:<20} {:>7.1f} ms".format(name, cumulative / 1000))
+
+    runs = [import_times('import scrape', api_dir) for _ in range(repeat)]
+    endpoint = min(run['scrape'] for run in runs)
+    print("startup: import api/scrape.py {:.1f} ms - scraper loads on the first invocation".format(endpoint / 1000))
+
+    # First invocation builds the scraper, the warm one reuses it
+    api = load_api_module()
+    api._load_scraper()
+    with LocalSite(paginated_site_pages(4), latency=0.02) as site:
+        def stub(scraper_class):
+            class StubSiteScraper(scraper_class):
+                def __init__(self, **kwargs):
+                    kwargs['cache_dir'] = None
+                    super().__init__(max_pages=4, requests_per_second=None, **kwargs)
+                    self.target_url = site.url
+            return StubSiteScraper
+
+        backends = [('sync', stub(UniversalRedDeerToyotaScraper), None)]
+        if api.AsyncRedDeerToyotaScraper is not None:
+            backends.append(('async', stub(UniversalRedDeerToyotaScraper), stub(api.AsyncRedDeerToyotaScraper)))
+        for label, sync_class, async_class in backends:
+            api.UniversalRedDeerToyotaScraper, api.AsyncRedDeerToyotaScraper = sync_class, async_class
+            api._SCRAPER = None
+            timings = []
+            for _ in range(2):
+                start = time.perf_counter()
+                call_app(api, {'force': '1'})
+                timings.append(time.perf_counter() - start)
+            print("startup: {} handler - first {:.0f} ms, warm {:.0f} ms".format(
+                label, timings[0] * 1000, timings[1] * 1000))
+            if getattr(api._SCRAPER, 'http', None) is not None:
+                api._run_async(api._SCRAPER.close())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline scraper benchmarks')
+    parser.add_argument('benchmark', choices=['extract', 'make-model', 'pagination', 'parse',
+                                              'structured', 'json-source', 'extract-workers', 'stream',
+                                              'api-stream', 'api-cache', 'startup', 'store',
+                                              'delta', 'columnar', 'vehicle', 'dealers', 'enrich', 'selectors', 'transport',
+                                              'metrics', 'replay', 'profile'])
+    parser.add_argument('-n', '--count', type=int, default=5000, help='number of synthetic cards')
+    parser.add_argument('--async', dest='use_async', action='store_true', help='use the asyncio backend')
+    parser.add_argument('--corpus', help='replay: recorded corpus directory or root of versions '
+                                         '(default: record a local site)')
+    parser.add_argument('--scales', default='1000,10000,50000', help='replay: card counts of the scaled pages')
+    parser.add_argument('--baseline', help='replay: fail on regressions against this saved result file')
+    parser.add_argument('--save-baseline', help='replay: save this run as a baseline file')
+    parser.add_argument('--threshold', type=float, default=0.2, help='replay: allowed throughput/RSS regression')
+    parser.add_argument('--update-golden', action='store_true', help='replay: accept this run as the golden output')
+    args = parser.parse_args()
+
+    if args.benchmark == 'extract':
+        bench_extract(args.count)
+    elif args.benchmark == 'extract-workers':
+        bench_extract_workers(args.count)
+    elif args.benchmark == 'make-model':
+        bench_make_model(args.count)
+    elif args.benchmark == 'parse':
+        bench_parse()
+    elif args.benchmark == 'structured':
+        bench_structured(min(args.count, 1000))
+    elif args.benchmark == 'json-source':
+        bench_json_source()
+    elif args.benchmark == 'stream':
+        bench_stream()
+    elif args.benchmark == 'api-stream':
+        bench_api_stream()
+    elif args.benchmark == 'api-cache':
+        bench_api_cache()
+    elif args.benchmark == 'store':
+        bench_store()
+    elif args.benchmark == 'delta':
+        bench_delta()
+    elif args.benchmark == 'columnar':
+        bench_columnar()
+    elif args.benchmark == 'vehicle':
+        bench_vehicle()
+    elif args.benchmark == 'dealers':
+        bench_dealers()
+    elif args.benchmark == 'enrich':
+        bench_enrich()
+    elif args.benchmark == 'selectors':
+        bench_selectors()
+    elif args.benchmark == 'transport':
+        bench_transport(use_async=args.use_async)
+    elif args.benchmark == 'metrics':
+        bench_metrics()
+    elif args.benchmark == 'profile':
+        bench_profile()
+    elif args.benchmark == 'replay':
+        scales = [int(cards) for cards in args.scales.split(',') if cards]
+        # Regressions against --baseline fail the run, so it can gate a change
+        return 1 if bench_replay(args.corpus, scales, args.baseline, args.save_baseline, args.threshold,
+                                 args.update_golden) else 0
+    elif args.benchmark == 'startup':
+        bench_startup()
+    elif args.benchmark == 'pagination':
+        bench_pagination(use_async=args.use_async)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -6,7 +6,7 @@ NO sample data fallback - only real scraped data from any manufacturer
 """
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import json
 import csv
 import time
@@ -14,403 +14,1352 @@ import re
 import logging
 from datetime import datetime
 import os
-from urllib.parse import urljoin
+import argparse
+import asyncio
+import hashlib
+import threading
+import dataclasses
+from collections import deque
+from contextlib import ExitStack, contextmanager
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional
+from urllib.parse import urljoin, urlparse, parse_qsl, urlencode, urlunparse
+
+# The async backend is optional and aiohttp is a slow import - it is only loaded when an
+# AsyncRedDeerToyotaScraper is created, so sync runs and serverless cold starts skip it
+aiohttp = None
+
+
+def async_backend_available():
+    """Whether aiohttp is installed, without importing it"""
+    return aiohttp is not None or importlib.util.find_spec('aiohttp') is not None
+
+try:
+    import lxml  # noqa: F401 - only probing whether the faster parser is installed
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+from http_cache import HttpCache
+from http_transport import RETRY_STATUSES, ResilientAdapter, mount_transport
+from scrape_metrics import ScrapeMetrics
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-class UniversalRedDeerToyotaScraper:
-    def __init__(self):
-        self.base_url = "https://www.reddeertoyota.com"
-        self.target_url = "https://www.reddeertoyota.com/inventory/used/"
-        self.session = requests.Session()
-        
-        # Enhanced headers
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Cache-Control': 'no-cache',
-            'Pragma': 'no-cache',
-            'DNT': '1'
-        })
+# Bump whenever extraction logic changes what a card or page yields - cached extractions from an
+# older version are discarded. Edits to the make/model, trim and pattern tables are picked up on
+# their own (see EXTRACTION_FINGERPRINT)
+EXTRACTION_VERSION = 1
+
+# Universal car makes and models
+CAR_MAKES = {
+    # Toyota models
+    'Toyota': {
+        'Camry', 'RAV4', 'Highlander', 'Prius', 'Corolla', 'Tacoma', 'Tundra', 
+        'Sienna', '4Runner', 'Sequoia', 'Avalon', 'C-HR', 'Venza', 'Land Cruiser', 
+        'GR86', 'Supra', 'Yaris', 'Matrix', 'FJ Cruiser', 'Celica', 'MR2'
+    },
+    # Honda models
+    'Honda': {
+        'Civic', 'Accord', 'CR-V', 'HR-V', 'Pilot', 'Odyssey', 'Fit', 'Insight', 
+        'Ridgeline', 'Passport', 'Element', 'S2000', 'NSX', 'Prelude', 'del Sol'
+    },
+    # Ford models
+    'Ford': {
+        'F-150', 'F-250', 'F-350', 'Escape', 'Explorer', 'Expedition', 'Edge', 
+        'Fusion', 'Focus', 'Fiesta', 'Mustang', 'Bronco', 'Ranger', 'Transit', 
+        'Taurus', 'Crown Victoria', 'Thunderbird'
+    },
+    # Chevrolet models
+    'Chevrolet': {
+        'Silverado', 'Tahoe', 'Suburban', 'Equinox', 'Traverse', 'Malibu', 
+        'Cruze', 'Impala', 'Camaro', 'Corvette', 'Colorado', 'Blazer', 'Trax'
+    },
+    # GMC models
+    'GMC': {
+        'Sierra', 'Yukon', 'Acadia', 'Terrain', 'Canyon', 'Savana', 'Envoy'
+    },
+    # Dodge/Ram models
+    'Dodge': {
+        'Charger', 'Challenger', 'Journey', 'Durango', 'Grand Caravan', 'Dart', 'Avenger'
+    },
+    'Ram': {
+        '1500', '2500', '3500', 'ProMaster'
+    },
+    # Nissan models
+    'Nissan': {
+        'Altima', 'Sentra', 'Rogue', 'Murano', 'Pathfinder', 'Armada', 'Titan', 
+        'Frontier', '370Z', 'GT-R', 'Leaf', 'Kicks', 'Versa'
+    },
+    # Hyundai models
+    'Hyundai': {
+        'Elantra', 'Sonata', 'Tucson', 'Santa Fe', 'Palisade', 'Accent', 'Veloster', 
+        'Genesis', 'Azera', 'Venue'
+    },
+    # Kia models
+    'Kia': {
+        'Forte', 'Optima', 'Sportage', 'Sorento', 'Telluride', 'Soul', 'Stinger', 
+        'Rio', 'Sedona', 'Niro'
+    },
+    # Mazda models
+    'Mazda': {
+        'Mazda3', 'Mazda6', 'CX-3', 'CX-5', 'CX-9', 'MX-5', 'CX-30', 'RX-7', 'RX-8'
+    },
+    # Subaru models
+    'Subaru': {
+        'Outback', 'Forester', 'Impreza', 'Legacy', 'Crosstrek', 'Ascent', 'WRX', 'BRZ'
+    },
+    # Volkswagen models
+    'Volkswagen': {
+        'Jetta', 'Passat', 'Golf', 'Tiguan', 'Atlas', 'Beetle', 'GTI', 'Touareg'
+    },
+    # Luxury brands
+    'BMW': {
+        '3 Series', '5 Series', '7 Series', 'X1', 'X3', 'X5', 'X7', 'Z4', 'i3', 'i8'
+    },
+    'Mercedes-Benz': {
+        'C-Class', 'E-Class', 'S-Class', 'GLA', 'GLC', 'GLE', 'GLS', 'CLA', 'SL'
+    },
+    'Audi': {
+        'A3', 'A4', 'A6', 'A8', 'Q3', 'Q5', 'Q7', 'Q8', 'TT', 'R8'
+    },
+    'Lexus': {
+        'ES', 'IS', 'GS', 'LS', 'NX', 'RX', 'GX', 'LX', 'UX', 'LC'
+    },
+    'Infiniti': {
+        'Q50', 'Q60', 'QX50', 'QX60', 'QX80', 'G35', 'G37', 'FX35', 'FX37'
+    },
+    'Acura': {
+        'ILX', 'TLX', 'RLX', 'RDX', 'MDX', 'NSX', 'TSX', 'TL', 'RSX'
+    },
+    # Jeep models
+    'Jeep': {
+        'Wrangler', 'Grand Cherokee', 'Cherokee', 'Compass', 'Renegade', 'Gladiator', 'Liberty'
+    },
+    # Cadillac models
+    'Cadillac': {
+        'Escalade', 'XT4', 'XT5', 'XT6', 'CT4', 'CT5', 'CTS', 'ATS', 'SRX'
+    },
+    # Lincoln models
+    'Lincoln': {
+        'Navigator', 'Aviator', 'Corsair', 'Nautilus', 'Continental', 'MKZ', 'MKX'
+    },
+    # Buick models
+    'Buick': {
+        'Enclave', 'Encore', 'Envision', 'LaCrosse', 'Regal', 'Verano'
+    }
+}
+
+# Trim levels - comprehensive patterns for all brands, in priority order
+TRIM_PATTERNS = {
+    # Toyota trims
+    'LE': r'\bLE\b(?!\w)',
+    'SE': r'\bSE\b(?!\w)',
+    'XLE': r'\bXLE\b(?!\w)',
+    'XSE': r'\bXSE\b(?!\w)',
+    'Limited': r'\bLimited\b(?!\w)',
+    'Platinum': r'\bPlatinum\b(?!\w)',
+    'Hybrid': r'\bHybrid\b(?!\w)',
+    'Prime': r'\bPrime\b(?!\w)',
+    'TRD': r'\bTRD\b(?!\w)',
+    'SR': r'\bSR\b(?!\w)',
+    'SR5': r'\bSR5\b(?!\w)',
+    'TRD Pro': r'\bTRD\s+Pro\b',
+    'TRD Off-Road': r'\bTRD\s+Off-?Road\b',
+    'TRD Sport': r'\bTRD\s+Sport\b',
+    # Honda trims
+    'LX': r'\bLX\b(?!\w)',
+    'EX': r'\bEX\b(?!\w)',
+    'EX-L': r'\bEX-L\b(?!\w)',
+    'Touring': r'\bTouring\b(?!\w)',
+    'Sport': r'\bSport\b(?!\w)',
+    'Type R': r'\bType\s+R\b',
+    'Si': r'\bSi\b(?!\w)',
+    # Ford trims - Enhanced
+    'XL': r'\bXL\b(?!\w)',
+    'XLT': r'\bXLT\b(?!\w)',
+    'Lariat': r'\bLariat\b(?!\w)',
+    'King Ranch': r'\bKing\s+Ranch\b',
+    'Raptor': r'\bRaptor\b(?!\w)',
+    'ST': r'\bST\b(?!\w)',
+    'RS': r'\bRS\b(?!\w)',
+    'GT': r'\bGT\b(?!\w)',
+    'Shelby': r'\bShelby\b(?!\w)',
+    'Tremor': r'\bTremor\b(?!\w)',
+    'FX4': r'\bFX4\b(?!\w)',
+    'STX': r'\bSTX\b(?!\w)',
+    'SuperCrew': r'\bSuperCrew\b(?!\w)',
+    'SuperCab': r'\bSuperCab\b(?!\w)',
+    'Titanium': r'\bTitanium\b(?!\w)',
+    'SEL': r'\bSEL\b(?!\w)',
+    'SES': r'\bSES\b(?!\w)',
+    'ST-Line': r'\bST-Line\b(?!\w)',
+    'Vignale': r'\bVignale\b(?!\w)',
+    'Wildtrak': r'\bWildtrak\b(?!\w)',
+    # Dodge trims - Enhanced
+    'SXT': r'\bSXT\b(?!\w)',
+    'R/T': r'\bR/T\b(?!\w)',
+    'RT': r'\bRT\b(?!\w)',
+    'SRT': r'\bSRT\b(?!\w)',
+    'Hellcat': r'\bHellcat\b(?!\w)',
+    'Redeye': r'\bRedeye\b(?!\w)',
+    'Demon': r'\bDemon\b(?!\w)',
+    'Scat Pack': r'\bScat\s+Pack\b',
+    'ScatPack': r'\bScatPack\b(?!\w)',
+    'Pursuit': r'\bPursuit\b(?!\w)',
+    'Police': r'\bPolice\b(?!\w)',
+    'Express': r'\bExpress\b(?!\w)',
+    'Tradesman': r'\bTradesman\b(?!\w)',
+    'Big Horn': r'\bBig\s+Horn\b',
+    'Laramie': r'\bLaramie\b(?!\w)',
+    'Rebel': r'\bRebel\b(?!\w)',
+    'TRX': r'\bTRX\b(?!\w)',
+    'Warlock': r'\bWarlock\b(?!\w)',
+    'Night Edition': r'\bNight\s+Edition\b',
+    'Blacktop': r'\bBlacktop\b(?!\w)',
+    'Rallye': r'\bRallye\b(?!\w)',
+    'AWD': r'\bAWD\b(?!\w)',
+    'Plus': r'\bPlus\b(?!\w)',
+    'Crew': r'\bCrew\b(?!\w)',
+    'Quad Cab': r'\bQuad\s+Cab\b',
+    'Regular Cab': r'\bRegular\s+Cab\b',
+    # Hyundai trims - Enhanced
+    'Blue': r'\bBlue\b(?!\w)',
+    'SE': r'\bSE\b(?!\w)', # Already defined but important for Hyundai
+    'SEL': r'\bSEL\b(?!\w)', # Already defined but important for Hyundai
+    'Ultimate': r'\bUltimate\b(?!\w)',
+    'Calligraphy': r'\bCalligraphy\b(?!\w)',
+    'N Line': r'\bN\s+Line\b',
+    'N-Line': r'\bN-Line\b(?!\w)',
+    'Preferred': r'\bPreferred\b(?!\w)',
+    'Essential': r'\bEssential\b(?!\w)',
+    'Luxury': r'\bLuxury\b(?!\w)',
+    'Trend': r'\bTrend\b(?!\w)',
+    'GL': r'\bGL\b(?!\w)',
+    'GLS': r'\bGLS\b(?!\w)',
+    'Limited': r'\bLimited\b(?!\w)', # Already defined but important
+    'Sport': r'\bSport\b(?!\w)', # Already defined but important
+    'Value Edition': r'\bValue\s+Edition\b',
+    'Tech': r'\bTech\b(?!\w)',
+    'Convenience': r'\bConvenience\b(?!\w)',
+    'Premium': r'\bPremium\b(?!\w)', # Already defined but important
+    'Active': r'\bActive\b(?!\w)',
+    'Preferred AWD': r'\bPreferred\s+AWD\b',
+    'Ultimate AWD': r'\bUltimate\s+AWD\b',
+    # Chevrolet trims
+    'LS': r'\bLS\b(?!\w)',
+    'LT': r'\bLT\b(?!\w)',
+    'LTZ': r'\bLTZ\b(?!\w)',
+    'SS': r'\bSS\b(?!\w)',
+    'Z71': r'\bZ71\b(?!\w)',
+    'High Country': r'\bHigh\s+Country\b',
+    'Premier': r'\bPremier\b(?!\w)',
+    'RS': r'\bRS\b(?!\w)', # Already defined but important for Chevy
+    'Redline': r'\bRedline\b(?!\w)',
+    'Midnight': r'\bMidnight\b(?!\w)',
+    # GMC trims
+    'Denali': r'\bDenali\b(?!\w)',
+    'SLE': r'\bSLE\b(?!\w)',
+    'SLT': r'\bSLT\b(?!\w)',
+    'AT4': r'\bAT4\b(?!\w)',
+    'Elevation': r'\bElevation\b(?!\w)',
+    # Nissan trims
+    'S': r'\bS\b(?!\w)',
+    'SV': r'\bSV\b(?!\w)',
+    'SL': r'\bSL\b(?!\w)',
+    'SR': r'\bSR\b(?!\w)', # Already defined
+    'Nismo': r'\bNismo\b(?!\w)',
+    'Midnight Edition': r'\bMidnight\s+Edition\b',
+    'Pro-4X': r'\bPro-4X\b(?!\w)',
+    # Kia trims  
+    'LX': r'\bLX\b(?!\w)', # Already defined
+    'S': r'\bS\b(?!\w)', # Already defined
+    'EX': r'\bEX\b(?!\w)', # Already defined
+    'SX': r'\bSX\b(?!\w)',
+    'GT': r'\bGT\b(?!\w)', # Already defined
+    'GT-Line': r'\bGT-Line\b(?!\w)',
+    'Turbo': r'\bTurbo\b(?!\w)',
+    # Mazda trims
+    'Sport': r'\bSport\b(?!\w)', # Already defined
+    'Touring': r'\bTouring\b(?!\w)', # Already defined
+    'Grand Touring': r'\bGrand\s+Touring\b',
+    'Signature': r'\bSignature\b(?!\w)',
+    'Carbon Edition': r'\bCarbon\s+Edition\b',
+    # Subaru trims
+    'Base': r'\bBase\b(?!\w)', # Already defined
+    'Premium': r'\bPremium\b(?!\w)', # Already defined
+    'Limited': r'\bLimited\b(?!\w)', # Already defined
+    'Touring': r'\bTouring\b(?!\w)', # Already defined
+    'Onyx Edition': r'\bOnyx\s+Edition\b',
+    'Wilderness': r'\bWilderness\b(?!\w)',
+    'STI': r'\bSTI\b(?!\w)',
+    # Luxury trims
+    'Base': r'\bBase\b(?!\w)', # Already defined
+    'Premium': r'\bPremium\b(?!\w)', # Already defined
+    'Luxury': r'\bLuxury\b(?!\w)', # Already defined
+    'Executive': r'\bExecutive\b(?!\w)', # Already defined
+    'M Sport': r'\bM\s+Sport\b', # Already defined
+    'AMG': r'\bAMG\b(?!\w)', # Already defined
+    'S-Line': r'\bS-Line\b(?!\w)', # Already defined
+    'F Sport': r'\bF\s+Sport\b' # Already defined
+}
+
+# Single-word trims (\bWORD\b(?!\w)) match exactly when the word is a whole
+# token of the text, so they resolve with one dict lookup per token. The few
+# multi-word/punctuated trims share one alternation wrapped in a lookahead so
+# every start position reports its highest-priority trim without consuming
+# text that another trim might need (e.g. "Touring" inside "Grand Touring").
+def _split_trim_patterns(patterns):
+    """Split trims into a word -> priority dict and the priorities needing a regex"""
+    words = {}
+    compound_indexes = []
+    for index, (name, pattern) in enumerate(patterns.items()):
+        if re.fullmatch(r'\w+', name) and pattern == r'\b{}\b(?!\w)'.format(name):
+            words.setdefault(name.lower(), index)
+        else:
+            compound_indexes.append(index)
+    return words, compound_indexes
+
+
+TRIM_NAMES = tuple(TRIM_PATTERNS.keys())
+TRIM_WORDS, TRIM_COMPOUND_INDEXES = _split_trim_patterns(TRIM_PATTERNS)
+TRIM_COMPOUND_REGEX = re.compile(
+    r'\b(?=' + '|'.join('({})'.format(TRIM_PATTERNS[TRIM_NAMES[i]]) for i in TRIM_COMPOUND_INDEXES) + ')',
+    re.IGNORECASE
+)
+WORD_REGEX = re.compile(r'\w+')
+
+YEAR_REGEX = re.compile(r'\b(19[8-9][0-9]|20[0-2][0-9])\b')
+YEAR_ATTR_REGEX = re.compile(r'^(19[8-9][0-9]|20[0-2][0-9])$')
+WHITESPACE_REGEX = re.compile(r'\s+')
+NON_WORD_REGEX = re.compile(r'[\W_]+')
+NON_DIGIT_REGEX = re.compile(r'[^\d]')
+ENGINE_SIZE_REGEX = re.compile(r'(\d+\.\d+)L')
+
+# Common paired patterns e.g. "Was $X Now $Y"
+PAIRED_PRICE_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"Was[:\s]*\$([0-9,]+)\s*(?:Now|Sale Price)[:\s]*\$([0-9,]+)",
+    r"List Price[:\s]*\$([0-9,]+)\s*(?:Now|Sale Price)[:\s]*\$([0-9,]+)",
+    r"Retail Price[:\s]*\$([0-9,]+)\s*(?:Now|Sale Price)[:\s]*\$([0-9,]+)",
+)]
+
+SALE_PRICE_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"(?:Sale\s*Price|Now|Internet\s*Price|Special|Clearance)[:\s]*\$([0-9,]+)",
+)]
+
+ORIG_PRICE_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"(?:Price|MSRP|List\s*Price|Retail\s*Price|Was)[:\s]*\$([0-9,]+)",
+    r"\$([0-9]{2}[0-9,]*)",
+)]
+
+# Mileage - more accurate patterns including miles and km
+MILEAGE_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'(\d{1,3}(?:,\d{3})*)\s*(?:km|kilometers?)\b',
+    r'(\d{1,3}(?:,\d{3})*)\s*(?:miles?|mi)\b',
+    r'Odometer[:\s]*(\d{1,3}(?:,\d{3})*)',
+    r'Mileage[:\s]*(\d{1,3}(?:,\d{3})*)',
+    r'(\d{1,3}(?:,\d{3})*)\s*(?:k|K)\s*(?:km|mi|miles?)\b'
+)]
+
+# Stock number - more specific
+STOCK_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'Stock[#\s]*([A-Z0-9]{3,10})\b',
+    r'#([A-Z0-9]{3,10})\b',
+    r'ID[:\s]*([A-Z0-9]{3,10})\b',
+    r'VIN[:\s]*([A-Z0-9]{17})\b'  # VIN numbers
+)]
+
+# VIN - 17 characters, never I, O or Q
+VIN_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'\bVIN[:#\s]*([A-HJ-NPR-Z0-9]{17})\b',
+)]
+VIN_REGEX = re.compile(r'^[A-HJ-NPR-Z0-9]{17}$')
+
+# Engine - much more comprehensive patterns for all brands
+ENGINE_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'(\d\.\d+L\s*(?:V?\d+|I\d+|[0-9]-?Cyl|Cylinder))',  # 2.5L V6, 1.8L 4Cyl
+    r'(\d\.\d+\s*L\s*(?:V?\d+|I\d+|[0-9]-?Cyl))',        # 3.5 L V6
+    r'(\d\.\d+L)\s*(?:Engine|Motor)',                     # 2.4L Engine
+    r'Engine[:\s]*(\d\.\d+L[^,\n]*)',                     # Engine: 2.0L description
+    r'(\d\.\d+L\s*Hybrid)',                               # 1.8L Hybrid
+    r'(\d\.\d+L\s*Turbo)',                                # 2.0L Turbo
+    r'(\d\.\d+L\s*Supercharged)',                         # 6.2L Supercharged
+    r'(\d\.\d+L\s*Diesel)',                               # 3.0L Diesel
+    r'(V\d+\s*\d\.\d+L)',                                 # V8 5.0L
+    r'(\d+\.\d+\s*Liter)',                                # 3.6 Liter
+    r'Electric\s*Motor',                                   # Electric vehicles
+    r'(\d+kWh\s*Battery)'                                 # Battery capacity
+)]
+
+
+def find_trim(text):
+    """Return the highest-priority trim found anywhere in text, or None"""
+    no_match = len(TRIM_NAMES)
+    best = min((TRIM_WORDS.get(word, no_match) for word in WORD_REGEX.findall(text.lower())), default=no_match)
+    if best > TRIM_COMPOUND_INDEXES[0]:
+        for match in TRIM_COMPOUND_REGEX.finditer(text):
+            best = min(best, TRIM_COMPOUND_INDEXES[match.lastindex - 1])
+    return TRIM_NAMES[best] if best < no_match else None
+
+GENERIC_VEHICLE_REGEX = re.compile(r'\b(20[0-2][0-9])\s+([A-Z][a-zA-Z-]+)\s+([A-Z][a-zA-Z0-9-]+)\b')
+TOKEN_REGEX = re.compile(r'\w+|\W')
+
+
+class MakeModelMatcher:
+    """Token trie over make and model names for single-pass make/model lookup
+
+    Text is split into maximal word runs and single non-word characters, so a
+    name (which always starts and ends with a word character) matches a token
+    sequence exactly where a word-bounded regex for it would match. Models are
+    indexed with their hyphen-less and space-less variants.
+    """
+
+    def __init__(self, car_makes):
+        self.makes = list(car_makes.keys())
+        self.models = []
+        self.make_lookup = {make.lower(): make for make in self.makes}
+        self.trie = {}
+
+        for make_index, (make, models) in enumerate(car_makes.items()):
+            self._add(make, (make_index, None))
+            # Sorted rather than set order, so ties resolve the same in every process and run
+            ordered_models = sorted(models)
+            self.models.append(ordered_models)
+            for model_rank, model in enumerate(ordered_models):
+                for variant in {model, model.replace("-", ""), model.replace(" ", "")}:
+                    self._add(variant, (make_index, model_rank))
+
+    def _add(self, name, entry):
+        node = self.trie
+        for token in TOKEN_REGEX.findall(name.lower()):
+            node = node.setdefault(token, {})
+        node.setdefault(None, []).append(entry)
+
+    def find(self, text):
+        """Return (make, model) for the first make (in table order) whose model also appears"""
+        tokens = TOKEN_REGEX.findall(text.lower())
+        found_makes = set()
+        found_models = []
+
+        for start, token in enumerate(tokens):
+            node = self.trie.get(token)
+            position = start
+            while node is not None:
+                for make_index, model_rank in node.get(None, ()):
+                    if model_rank is None:
+                        found_makes.add(make_index)
+                    else:
+                        found_models.append((make_index, model_rank))
+                position += 1
+                if position == len(tokens):
+                    break
+                node = node.get(tokens[position])
+
+        best = min((entry for entry in found_models if entry[0] in found_makes), default=None)
+        if best is None:
+            return None, None
+        make_index, model_rank = best
+        return self.makes[make_index], self.models[make_index][model_rank]
+
+
+MAKE_MODEL_MATCHER = MakeModelMatcher(CAR_MAKES)
+
+# Query parameters dealer platforms use for the results page number
+PAGE_PARAM_REGEX = re.compile(r'^(?:page|pg|p|pn|_p|pagenum|page_no|page_number)$', re.IGNORECASE)
+PAGINATION_CLASS_REGEX = re.compile(r'pagination|pager|paging', re.IGNORECASE)
+
+
+# Container selectors - specific ones first, broader ones only if those fail
+PRIORITY_SELECTORS = [
+    '[data-vehicle-id]',
+    '[data-stock-number]',
+    '[data-vin]',
+    '.vehicle-card',
+    '.inventory-item',
+    '.vehicle-listing',
+    '.srp-list-item'
+]
+
+FALLBACK_SELECTORS = [
+    '.vehicle',
+    '.car-item',
+    '.listing-item',
+    '.inventory-card',
+    '[class*="vehicle"]',
+    '[class*="inventory"]'
+]
+
+SIMPLE_SELECTOR_REGEX = re.compile(r'^(?:\.(?P<cls>[\w-]+)|\[(?P<attr>[\w-]+)(?:(?P<op>\*?=)"(?P<value>[^"]*)")?\])$')
+
+
+def _attr_text(value):
+    """Attribute value as one string - class is a list on parsed tags but a string while parsing"""
+    if value is None:
+        return ''
+    return ' '.join(value) if isinstance(value, (list, tuple)) else str(value)
+
+
+def compile_selector(selector):
+    """Predicate over (tag name, attrs) for .class, [attr], [attr="v"] and [attr*="v"] selectors
+
+    Returns None for anything more complex, which then goes through soup.select.
+    """
+    match = SIMPLE_SELECTOR_REGEX.match(selector.strip())
+    if not match:
+        return None
+    cls, attr, op, value = match.group('cls', 'attr', 'op', 'value')
+    if cls:
+        return lambda name, attrs: cls in _attr_text(attrs.get('class')).split()
+    if op is None:
+        return lambda name, attrs: attr in attrs
+    if op == '*=':
+        return lambda name, attrs: bool(value) and value in _attr_text(attrs.get(attr))
+    return lambda name, attrs: attr in attrs and _attr_text(attrs.get(attr)) == value
+
+
+def select_all(soup, selectors):
+    """Evaluate several selectors in one traversal - {selector: elements in document order}"""
+    matches = {selector: [] for selector in selectors}
+    simple = []
+    for selector in selectors:
+        predicate = compile_selector(selector)
+        if predicate:
+            simple.append((matches[selector], predicate))
+        else:
+            matches[selector] = soup.select(selector)
+    
+    for tag in soup.find_all(True):
+        for elements, predicate in simple:
+            if predicate(tag.name, tag.attrs):
+                elements.append(tag)
+    return matches
+
+
+class ListingStrainer(SoupStrainer):
+    """Parse-time filter that only materializes candidate container subtrees,
+    plus what page handling needs: the title, links, pagers and JSON scripts"""
+
+    def __init__(self, selectors):
+        super().__init__()
+        self.predicates = [compile_selector(selector) for selector in selectors]
+
+    def wants(self, name, attrs):
+        attrs = attrs or {}
+        if name == 'title' or (name == 'a' and 'href' in attrs):
+            return True
+        if name == 'script' and 'json' in _attr_text(attrs.get('type')):
+            return True
+        if PAGINATION_CLASS_REGEX.search(_attr_text(attrs.get('class'))):
+            return True
+        return any(predicate(name, attrs) for predicate in self.predicates)
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        return self.wants(name, attrs)
+
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        # bs4 < 4.13 filters tags during parsing through search_tag instead
+        return markup_name if self.wants(markup_name, markup_attrs) else None
+
+
+# Embedded structured data - JSON-LD Vehicle/Car objects or inventory JSON in script tags
+SCRIPT_REGEX = re.compile(r'<script\b([^>]*)>(.*?)</script\s*>', re.IGNORECASE | re.DOTALL)
+JS_ASSIGNMENT_REGEX = re.compile(r'[=(]\s*(?=[\[{])')
+DECIMAL_REGEX = re.compile(r'[^\d.]')
+VEHICLE_TYPES = {'vehicle', 'car'}
+VEHICLE_PRODUCT_KEYS = ('vehicleIdentificationNumber', 'mileageFromOdometer', 'vehicleModelDate')
+TOTAL_KEYS = ('total', 'totalCount', 'total_count', 'totalResults', 'total_results', 'totalRecords',
+              'numFound', 'recordCount', 'count')
+
+# Key aliases used by JSON-LD and dealer-platform inventory JSON, checked in order
+RECORD_FIELDS = {
+    'makeName': ('makeName', 'make', 'make_name', 'brand', 'manufacturer'),
+    'model': ('model', 'modelName', 'model_name'),
+    'year': ('year', 'modelYear', 'model_year', 'vehicleModelDate', 'modelDate', 'productionDate'),
+    'trim': ('trim', 'trimLevel', 'trim_level', 'vehicleConfiguration', 'subModel', 'series'),
+    'mileage': ('mileage', 'mileageFromOdometer', 'odometer', 'kilometers', 'km', 'miles'),
+    'value': ('msrp', 'listPrice', 'list_price', 'retailPrice', 'price', 'askingPrice', 'offers'),
+    'sale_value': ('salePrice', 'sale_price', 'specialPrice', 'internetPrice', 'finalPrice'),
+    'stock_number': ('stockNumber', 'stock_number', 'stockNo', 'stock', 'sku', 'productID'),
+    'vin': ('vin', 'VIN', 'vehicleIdentificationNumber'),
+    'engine': ('engine', 'engineDescription', 'vehicleEngine'),
+    'detail_url': ('url', 'detailUrl', 'detail_url', 'vdpUrl', 'vdp_url', 'link'),
+}
+
+
+def _first_field(record, field):
+    """First non-empty value among a field's key aliases"""
+    for key in RECORD_FIELDS[field]:
+        value = record.get(key)
+        if value not in (None, '', [], {}):
+            return value
+    return None
+
+
+def _scalar(value):
+    """Reduce nested JSON-LD values (Brand, QuantitativeValue, lists) to one plain value"""
+    while isinstance(value, (dict, list)):
+        if isinstance(value, list):
+            value = value[0] if value else None
+        else:
+            value = next((value[key] for key in ('name', 'value', 'price', 'lowPrice') if key in value), None)
+    return value
+
+
+def _whole_number(value):
+    """25999, "25,999.00" or "$25,999" -> 25999; None if not a number"""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    try:
+        return int(float(DECIMAL_REGEX.sub('', str(value))))
+    except ValueError:
+        return None
+
+
+def _offer_prices(value):
+    """All prices from an Offer / AggregateOffer / list of offers"""
+    offers = value if isinstance(value, list) else [value]
+    prices = []
+    for offer in offers:
+        if isinstance(offer, dict):
+            for key in ('price', 'lowPrice', 'highPrice'):
+                price = _whole_number(_scalar(offer.get(key)))
+                if price is not None:
+                    prices.append(price)
+        else:
+            price = _whole_number(offer)
+            if price is not None:
+                prices.append(price)
+    return prices
+
+
+def _engine_text(value):
+    """Engine description from a string or an EngineSpecification"""
+    if isinstance(value, dict) and not value.get('name') and value.get('engineDisplacement'):
+        displacement = value['engineDisplacement']
+        size = _scalar(displacement)
+        unit = displacement.get('unitCode', 'L') if isinstance(displacement, dict) else 'L'
+        return '{}{}'.format(size, 'L' if unit in ('LTR', 'L') else unit)
+    engine = _scalar(value)
+    return WHITESPACE_REGEX.sub(' ', str(engine)).strip() if engine is not None else ''
+
+
+def _is_vehicle_record(node):
+    """JSON-LD Vehicle/Car (or vehicle-like Product), or a plain record with make and model keys"""
+    types = node.get('@type')
+    if types is not None:
+        types = {str(t).lower() for t in (types if isinstance(types, list) else [types])}
+        if types & VEHICLE_TYPES:
+            return True
+        return 'product' in types and any(key in node for key in VEHICLE_PRODUCT_KEYS)
+    return _first_field(node, 'makeName') is not None and _first_field(node, 'model') is not None
+
+
+def iter_vehicle_records(data):
+    """Vehicle-like dicts anywhere in a JSON document, in document order"""
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if _is_vehicle_record(node):
+                yield node
+                continue
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+
+
+def _dotted(data, path):
+    """Follow a dotted path like "data.inventory.items" (list indexes allowed) into JSON"""
+    for key in path.split('.'):
+        if isinstance(data, dict):
+            data = data.get(key)
+        elif isinstance(data, list) and key.isdigit() and int(key) < len(data):
+            data = data[int(key)]
+        else:
+            return None
+    return data
+
+
+def iter_embedded_json(script):
+    """JSON values assigned or passed in a script (window.inventory = {...}), decoded in place"""
+    decoder = json.JSONDecoder(strict=False)
+    position = 0
+    while True:
+        match = JS_ASSIGNMENT_REGEX.search(script, position)
+        if not match:
+            return
+        try:
+            data, position = decoder.raw_decode(script, match.end())
+            yield data
+        except ValueError:
+            position = match.end()
+
+
+def card_link(element):
+    """href of a card's first real link - usually its detail page - or ''"""
+    for link in element.find_all('a', href=True):
+        href = link['href'].strip()
+        if href and not href.startswith(('#', 'javascript:', 'mailto:', 'tel:')):
+            return href
+    return ''
+
+
+def _extraction_fingerprint():
+    """Hash of EXTRACTION_VERSION and every table extraction reads - unrelated code edits leave it alone"""
+    tables = [
+        EXTRACTION_VERSION,
+        {make: sorted(models) for make, models in CAR_MAKES.items()},
+        list(TRIM_PATTERNS.items()),
+        [regex.pattern for regex in (YEAR_REGEX, YEAR_ATTR_REGEX, ENGINE_SIZE_REGEX, VIN_REGEX, GENERIC_VEHICLE_REGEX)],
+        [[regex.pattern for regex in patterns] for patterns in (
+            PAIRED_PRICE_PATTERNS, SALE_PRICE_PATTERNS, ORIG_PRICE_PATTERNS, MILEAGE_PATTERNS, STOCK_PATTERNS,
+            VIN_PATTERNS, ENGINE_PATTERNS)],
+        RECORD_FIELDS,
+    ]
+    return hashlib.sha256(json.dumps(tables, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+# Cached parse results are only replayed if they came from the same extraction version and tables
+EXTRACTION_FINGERPRINT = _extraction_fingerprint()
+
+
+def card_payload(element):
+    """What extraction reads from a card - normalized text and data-* attributes, picklable"""
+    text = WHITESPACE_REGEX.sub(' ', element.get_text(separator=' ', strip=True))
+    data_attrs = [(attr, str(value)) for attr, value in element.attrs.items() if 'data-' in attr.lower()]
+    return text, data_attrs
+
+
+class ExtractionCache:
+    """Persistent card-hash -> extracted vehicle cache so unchanged cards skip the regex battery"""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.used = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        # Keys of the cards seen by the page being processed on this thread, while recording()
+        self.local = threading.local()
         
-        self.vehicles = []
-        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            # Results from different extraction code are not trustworthy
+            if data.get('fingerprint') == EXTRACTION_FINGERPRINT:
+                self.entries = data.get('entries', {})
+        except (OSError, ValueError):
+            pass
+
+    def key(self, payload):
+        """Hash of a card payload - its normalized text and data-* attributes"""
+        text, data_attrs = payload
+        return hashlib.sha1(json.dumps([text, sorted(data_attrs)]).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Cached Vehicle for a card key (a fresh instance), or None on a miss"""
+        row = self.entries.get(key)
+        with self.lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.used[key] = row
+        self._note(key)
+        return Vehicle.from_row(row)
+
+    def _note(self, key):
+        keys = getattr(self.local, 'keys', None)
+        if keys is not None:
+            keys[key] = None
+
+    @contextmanager
+    def recording(self):
+        """Collect the keys of every card looked up or stored on this thread inside the block - yields a list
+        filled in when the block ends"""
+        self.local.keys = {}
+        recorded = []
+        try:
+            yield recorded
+        finally:
+            recorded.extend(self.local.keys)
+            self.local.keys = None
+
+    def keep(self, keys):
+        """Count cards as seen this run without extracting them - for pages replayed from an earlier parse"""
+        with self.lock:
+            for key in keys:
+                row = self.entries.get(key)
+                if row is not None:
+                    self.used[key] = row
+
+    def begin_run(self):
+        """Start counting hits and used cards afresh - entries already loaded stay in memory"""
+        with self.lock:
+            self.used = {}
+            self.hits = 0
+            self.misses = 0
+
+    def put(self, key, vehicle):
+        with self.lock:
+            self.entries[key] = self.used[key] = vehicle.to_row()
+        self._note(key)
+
+    def save(self):
+        """Persist only the cards seen this run so cards that left the lot age out"""
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'fingerprint': EXTRACTION_FINGERPRINT, 'entries': self.used}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("Could not save extraction cache: {}".format(str(e)))
+
+
+# Template fingerprints only look at class names - tokens with digits are usually per-vehicle ids
+CLASS_ATTR_REGEX = re.compile(r'\bclass\s*=\s*["\']([^"\']*)["\']', re.IGNORECASE)
+# A remembered container selector is trusted while at least this share of its matches are complete vehicles
+SELECTOR_MIN_YIELD = 0.5
+SELECTOR_TEMPLATES_PER_SITE = 50
+
+
+def page_template_fingerprint(content):
+    """Hash of the class names a page uses - the same for every page rendered from one template"""
+    html = content.decode('utf-8', errors='replace') if isinstance(content, bytes) else content
+    tokens = {token for classes in CLASS_ATTR_REGEX.findall(html) for token in classes.split()
+              if not any(character.isdigit() for character in token)}
+    return hashlib.sha1(' '.join(sorted(tokens)).encode('utf-8')).hexdigest()[:16]
+
+
+class SelectorCache:
+    """Container selector that produced vehicles per site and page template, plus per-selector metrics
+
+    Pages try the remembered selector first and only run the full probe when its yield
+    (complete vehicles / matched elements) drops below min_yield. With a path the winners
+    persist, so later runs start from them too.
+    """
+
+    def __init__(self, path=None, min_yield=SELECTOR_MIN_YIELD):
+        self.path = path
+        self.min_yield = min_yield
+        self.sites = {}
+        self.metrics = {}
+        self.lock = threading.Lock()
         
-        # Universal car makes and models
-        self.car_makes = {
-            # Toyota models
-            'Toyota': {
-                'Camry', 'RAV4', 'Highlander', 'Prius', 'Corolla', 'Tacoma', 'Tundra', 
-                'Sienna', '4Runner', 'Sequoia', 'Avalon', 'C-HR', 'Venza', 'Land Cruiser', 
-                'GR86', 'Supra', 'Yaris', 'Matrix', 'FJ Cruiser', 'Celica', 'MR2'
-            },
-            # Honda models
-            'Honda': {
-                'Civic', 'Accord', 'CR-V', 'HR-V', 'Pilot', 'Odyssey', 'Fit', 'Insight', 
-                'Ridgeline', 'Passport', 'Element', 'S2000', 'NSX', 'Prelude', 'del Sol'
-            },
-            # Ford models
-            'Ford': {
-                'F-150', 'F-250', 'F-350', 'Escape', 'Explorer', 'Expedition', 'Edge', 
-                'Fusion', 'Focus', 'Fiesta', 'Mustang', 'Bronco', 'Ranger', 'Transit', 
-                'Taurus', 'Crown Victoria', 'Thunderbird'
-            },
-            # Chevrolet models
-            'Chevrolet': {
-                'Silverado', 'Tahoe', 'Suburban', 'Equinox', 'Traverse', 'Malibu', 
-                'Cruze', 'Impala', 'Camaro', 'Corvette', 'Colorado', 'Blazer', 'Trax'
-            },
-            # GMC models
-            'GMC': {
-                'Sierra', 'Yukon', 'Acadia', 'Terrain', 'Canyon', 'Savana', 'Envoy'
-            },
-            # Dodge/Ram models
-            'Dodge': {
-                'Charger', 'Challenger', 'Journey', 'Durango', 'Grand Caravan', 'Dart', 'Avenger'
-            },
-            'Ram': {
-                '1500', '2500', '3500', 'ProMaster'
-            },
-            # Nissan models
-            'Nissan': {
-                'Altima', 'Sentra', 'Rogue', 'Murano', 'Pathfinder', 'Armada', 'Titan', 
-                'Frontier', '370Z', 'GT-R', 'Leaf', 'Kicks', 'Versa'
-            },
-            # Hyundai models
-            'Hyundai': {
-                'Elantra', 'Sonata', 'Tucson', 'Santa Fe', 'Palisade', 'Accent', 'Veloster', 
-                'Genesis', 'Azera', 'Venue'
-            },
-            # Kia models
-            'Kia': {
-                'Forte', 'Optima', 'Sportage', 'Sorento', 'Telluride', 'Soul', 'Stinger', 
-                'Rio', 'Sedona', 'Niro'
-            },
-            # Mazda models
-            'Mazda': {
-                'Mazda3', 'Mazda6', 'CX-3', 'CX-5', 'CX-9', 'MX-5', 'CX-30', 'RX-7', 'RX-8'
-            },
-            # Subaru models
-            'Subaru': {
-                'Outback', 'Forester', 'Impreza', 'Legacy', 'Crosstrek', 'Ascent', 'WRX', 'BRZ'
-            },
-            # Volkswagen models
-            'Volkswagen': {
-                'Jetta', 'Passat', 'Golf', 'Tiguan', 'Atlas', 'Beetle', 'GTI', 'Touareg'
-            },
-            # Luxury brands
-            'BMW': {
-                '3 Series', '5 Series', '7 Series', 'X1', 'X3', 'X5', 'X7', 'Z4', 'i3', 'i8'
-            },
-            'Mercedes-Benz': {
-                'C-Class', 'E-Class', 'S-Class', 'GLA', 'GLC', 'GLE', 'GLS', 'CLA', 'SL'
-            },
-            'Audi': {
-                'A3', 'A4', 'A6', 'A8', 'Q3', 'Q5', 'Q7', 'Q8', 'TT', 'R8'
-            },
-            'Lexus': {
-                'ES', 'IS', 'GS', 'LS', 'NX', 'RX', 'GX', 'LX', 'UX', 'LC'
-            },
-            'Infiniti': {
-                'Q50', 'Q60', 'QX50', 'QX60', 'QX80', 'G35', 'G37', 'FX35', 'FX37'
-            },
-            'Acura': {
-                'ILX', 'TLX', 'RLX', 'RDX', 'MDX', 'NSX', 'TSX', 'TL', 'RSX'
-            },
-            # Jeep models
-            'Jeep': {
-                'Wrangler', 'Grand Cherokee', 'Cherokee', 'Compass', 'Renegade', 'Gladiator', 'Liberty'
-            },
-            # Cadillac models
-            'Cadillac': {
-                'Escalade', 'XT4', 'XT5', 'XT6', 'CT4', 'CT5', 'CTS', 'ATS', 'SRX'
-            },
-            # Lincoln models
-            'Lincoln': {
-                'Navigator', 'Aviator', 'Corsair', 'Nautilus', 'Continental', 'MKZ', 'MKX'
-            },
-            # Buick models
-            'Buick': {
-                'Enclave', 'Encore', 'Envision', 'LaCrosse', 'Regal', 'Verano'
+        if path:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.sites = json.load(f).get('sites', {})
+            except (OSError, ValueError):
+                pass
+
+    def lookup(self, url, fingerprint):
+        """Selector that won for this page template, else the site's latest winner, else None"""
+        with self.lock:
+            site = self.sites.get(urlparse(url).netloc)
+            if not site:
+                return None
+            template = site['templates'].get(fingerprint)
+            return template['selector'] if template else site['last']
+
+    def trusted(self, matched, complete):
+        """Whether a remembered selector's yield on this page is good enough to skip the probe"""
+        return complete > 0 and complete >= self.min_yield * matched
+
+    def record(self, url, fingerprint, selector, matched, complete):
+        """Remember the selector a page's vehicles came from"""
+        with self.lock:
+            site = self.sites.setdefault(urlparse(url).netloc, {'last': None, 'templates': {}})
+            site['last'] = selector
+            site['templates'][fingerprint] = {
+                'selector': selector,
+                'yield': round(complete / matched, 3) if matched else 0.0,
+                'updated_at': int(time.time()),
             }
+            if len(site['templates']) > SELECTOR_TEMPLATES_PER_SITE:
+                oldest = min(site['templates'], key=lambda key: site['templates'][key]['updated_at'])
+                del site['templates'][oldest]
+            self.metrics.setdefault(selector, self._new_metrics())['wins'] += 1
+
+    def _new_metrics(self):
+        return {'tries': 0, 'wins': 0, 'matched': 0, 'complete': 0, 'seconds': 0.0}
+
+    def measure(self, selector, matched, complete, seconds):
+        """Add one try of a selector - elements matched, complete vehicles, extraction time"""
+        with self.lock:
+            metrics = self.metrics.setdefault(selector, self._new_metrics())
+            metrics['tries'] += 1
+            metrics['matched'] += matched
+            metrics['complete'] += complete
+            metrics['seconds'] += seconds
+
+    def report(self):
+        """Per-selector metrics for this run, most expensive first"""
+        with self.lock:
+            rows = [dict(metrics, selector=selector,
+                         yield_rate=metrics['complete'] / metrics['matched'] if metrics['matched'] else 0.0)
+                    for selector, metrics in self.metrics.items()]
+        return sorted(rows, key=lambda row: row['seconds'], reverse=True)
+
+    def begin_run(self):
+        with self.lock:
+            self.metrics = {}
+
+    def save(self):
+        """Persist the winners - a no-op without a path"""
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with self.lock:
+                data = json.dumps({'sites': self.sites})
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("Could not save selector cache: {}".format(str(e)))
+
+
+# Below this many cards the pickling round trip costs more than it saves
+PROCESS_EXTRACTION_MIN_CARDS = 200
+
+_process_extractor = None
+
+
+def _init_extraction_worker(make_model_matcher):
+    """Process pool initializer - one CardExtractor per worker, sharing the parent's matcher
+
+    Workers reuse the parent's matcher (and any models added to it) instead of rebuilding the trie,
+    and build no session, transport or caches - extraction needs none of them.
+    """
+    global _process_extractor
+    _process_extractor = CardExtractor(make_model_matcher)
+
+
+def extract_card_chunk(extractor, chunk, timed=False):
+    """Extract a chunk of card payloads - returns (vehicles, per-card seconds), the timings only when timed"""
+    if not timed:
+        return [extractor.extract_card_data(text, data_attrs) for text, data_attrs in chunk], []
+    vehicles = []
+    timings = []
+    for text, data_attrs in chunk:
+        started = time.perf_counter()
+        vehicles.append(extractor.extract_card_data(text, data_attrs))
+        timings.append(time.perf_counter() - started)
+    return vehicles, timings
+
+
+def _extract_card_chunk(chunk, timed=False):
+    """Process pool worker - extract_card_chunk with this worker's extractor"""
+    return extract_card_chunk(_process_extractor, chunk, timed)
+
+
+def available_cpus():
+    """CPUs this process may run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class HostRateLimiter:
+    """Thread-safe minimum interval between requests to the same host"""
+
+    def __init__(self, requests_per_second=None, host_limits=None):
+        self.requests_per_second = requests_per_second
+        self.host_limits = dict(host_limits or {})
+        self.next_slot = {}
+        self.lock = threading.Lock()
+
+    def reserve(self, url):
+        """Claim the next request slot for this URL's host and return the seconds to wait for it"""
+        host = urlparse(url).netloc
+        rate = self.host_limits.get(host, self.requests_per_second)
+        if not rate:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + 1.0 / rate
+        return slot - now
+
+    def wait(self, url):
+        """Block until the next request slot for this URL's host"""
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _time_iteration(items, spent):
+    """Yield from items, adding the time spent waiting for each one to spent[0]"""
+    iterator = iter(items)
+    while True:
+        started = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            spent[0] += time.perf_counter() - started
+        yield item
+
+
+def release_soup(soup):
+    """Free a parsed page now instead of at the next full gc - soups are reference cycles,
+    and the root's decompose() does not reach its children"""
+    for child in list(soup.contents):
+        child.decompose()
+    soup.decompose()
+
+
+def ordered_map(executor, fn, items, window):
+    """executor.map with at most window calls in flight - results stream in order with bounded memory"""
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+CSV_FIELDNAMES = ['makeName', 'year', 'model', 'sub-model', 'trim', 'mileage', 'value', 'sale_value',
+                  'stock_number', 'engine', 'vin']
+# Multi-dealer batches tag every vehicle with the dealership it was scraped from
+DEALER_FIELD = 'dealer_id'
+# Listing pages link each card to its detail page - only the enrichment stage follows it
+DETAIL_URL_FIELD = 'detail_url'
+# CSV/JSON field name -> Vehicle attribute
+VEHICLE_ATTRIBUTES = {name: name.replace('-', '_') for name in CSV_FIELDNAMES + [DEALER_FIELD, DETAIL_URL_FIELD]}
+# Attributes card extraction fills in - their hit rates are part of the run metrics
+EXTRACTED_FIELDS = tuple(VEHICLE_ATTRIBUTES[name] for name in CSV_FIELDNAMES)
+NUMERIC_VEHICLE_FIELDS = frozenset(['year', 'mileage', 'value', 'sale_value'])
+
+
+def _text(number):
+    return '' if number is None else str(number)
+
+
+@dataclasses.dataclass(slots=True)
+class Vehicle:
+    """One extracted vehicle - whole numbers for year/mileage/prices (None when missing), text otherwise
+
+    to_dict() is the JSON shape the API and exports always had (every field a string) and
+    to_row() the CSV row; get() lets dict-style consumers read a field by its CSV name.
+    dealer_id and detail_url are not CSV columns - to_dict() only includes them when they are set.
+    """
+    makeName: str = ''
+    year: Optional[int] = None
+    model: str = ''
+    sub_model: str = ''
+    trim: str = ''
+    mileage: Optional[int] = None
+    value: Optional[int] = None
+    sale_value: Optional[int] = None
+    stock_number: str = ''
+    engine: str = ''
+    vin: str = ''
+    dealer_id: str = ''
+    detail_url: str = ''
+    _dedup_key: Optional[tuple] = dataclasses.field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def from_row(cls, row):
+        """Inverse of to_row()"""
+        return cls(*row)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Vehicle from a dict with CSV field names - numbers may be strings like '$12,967'"""
+        vehicle = cls()
+        for name, attribute in VEHICLE_ATTRIBUTES.items():
+            value = data.get(name)
+            if name in NUMERIC_VEHICLE_FIELDS:
+                digits = NON_DIGIT_REGEX.sub('', str(value or ''))
+                setattr(vehicle, attribute, int(digits) if digits else None)
+            elif value:
+                setattr(vehicle, attribute, str(value))
+        return vehicle
+
+    def dedup_key(self):
+        """(year, make, model, stock number, price) as strings - built once, after extraction"""
+        key = self._dedup_key
+        if key is None:
+            key = self._dedup_key = (_text(self.year), self.makeName, self.model, self.stock_number,
+                                     _text(self.value))
+        return key
+
+    def to_row(self):
+        """Values in CSV_FIELDNAMES order - numbers stay ints and None, which csv writes as ''"""
+        return [self.makeName, self.year, self.model, self.sub_model, self.trim, self.mileage, self.value,
+                self.sale_value, self.stock_number, self.engine, self.vin]
+
+    def to_dict(self):
+        """CSV field name -> string value, '' when missing"""
+        # One dict display with the numbers converted inline - the API serializes every vehicle through
+        # here, and a _text() call per number or a comprehension over a field table costs more than the rest
+        year, mileage, value, sale_value = self.year, self.mileage, self.value, self.sale_value
+        data = {
+            'makeName': self.makeName,
+            'year': '' if year is None else str(year),
+            'model': self.model,
+            'sub-model': self.sub_model,
+            'trim': self.trim,
+            'mileage': '' if mileage is None else str(mileage),
+            'value': '' if value is None else str(value),
+            'sale_value': '' if sale_value is None else str(sale_value),
+            'stock_number': self.stock_number,
+            'engine': self.engine,
+            'vin': self.vin,
         }
+        if self.dealer_id:
+            data[DEALER_FIELD] = self.dealer_id
+        if self.detail_url:
+            data[DETAIL_URL_FIELD] = self.detail_url
+        return data
 
-    def fetch_main_page(self):
-        """Fetch the main inventory page"""
+    def get(self, name, default=''):
+        """One field by its CSV name, as a string like to_dict() gives it"""
+        attribute = VEHICLE_ATTRIBUTES.get(name)
+        if attribute is None:
+            return default
+        value = getattr(self, attribute)
+        return _text(value) if name in NUMERIC_VEHICLE_FIELDS else value
+
+
+class HtmlListingSource:
+    """Inventory scraped from the rendered listing pages - first page, pagination crawl, text fallback"""
+
+    def iter_vehicles(self, scraper):
+        """Complete vehicles page by page as listing pages are processed, before dedup"""
+        first_page = scraper.scrape_page(scraper.target_url)
+        if not first_page:
+            logger.error("Cannot proceed without main page")
+            return
+        soup, vehicles, page_urls = first_page
+        first_page = None
+        found = bool(vehicles)
+        if found and soup is not None:
+            release_soup(soup)  # only the text fallback needs the tree
+            soup = None
+        yield from vehicles
+        
+        # Follow pagination - later pages go through the same dedup step
+        for page_vehicles, _ in scraper.iter_additional_pages(page_urls):
+            found = found or bool(page_vehicles)
+            yield from page_vehicles
+        
+        if not found:
+            logger.warning("No complete vehicles found with current selectors")
+            yield from scraper.extract_vehicles_from_text(soup)
+
+    def fetch_vehicles(self, scraper):
+        """Complete vehicles from every listing page, before dedup"""
+        return list(self.iter_vehicles(scraper))
+
+
+class JsonInventorySource:
+    """Inventory read from the dealer platform's paged JSON/XHR endpoint - no HTML rendering or parsing
+
+    records_key and total_key are dotted paths into each response; when omitted the vehicle
+    records and the total count are located automatically.
+    """
+
+    def __init__(self, url, page_size=100, page_param='page', size_param='pageSize', first_page=1,
+                 records_key=None, total_key=None, params=None):
+        self.url = url
+        self.page_size = max(1, page_size)
+        self.page_param = page_param
+        self.size_param = size_param
+        self.first_page = first_page
+        self.records_key = records_key
+        self.total_key = total_key
+        self.params = dict(params or {})
+
+    def page_url(self, number):
+        """Endpoint URL for one page of results"""
+        parsed = urlparse(self.url)
+        query = [(key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+                 if key not in (self.page_param, self.size_param)]
+        query.extend(self.params.items())
+        query.append((self.page_param, str(number)))
+        if self.size_param:
+            query.append((self.size_param, str(self.page_size)))
+        return urlunparse(parsed._replace(query=urlencode(query)))
+
+    def fetch_json(self, scraper, url):
+        """GET one endpoint page as JSON over the scraper's session, or None on failure"""
         try:
-            logger.info("Fetching: {}".format(self.target_url))
-            response = self.session.get(self.target_url, timeout=30)
-            response.raise_for_status()
-            
-            logger.info("Response: {}, Size: {} bytes".format(response.status_code, len(response.content)))
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Log page info
-            title = soup.find('title')
-            if title:
-                logger.info("Page title: {}".format(title.get_text().strip()))
-            
-            return soup
-            
+            scraper.rate_limiter.wait(url)
+            logger.info("Fetching: {}".format(url))
+            with scraper.metrics.stage('fetch'):
+                response = scraper.session.get(url, headers={
+                    'Accept': 'application/json, text/javascript, */*; q=0.01',
+                    'X-Requested-With': 'XMLHttpRequest',
+                })
+                response.raise_for_status()
+                content = response.content
+            scraper.metrics.count('pages_fetched')
+            scraper.metrics.count('bytes_downloaded', len(content))
+            with scraper.metrics.stage('decode'):
+                return response.json()
         except Exception as e:
-            logger.error("Failed to fetch main page: {}".format(str(e)))
+            scraper.metrics.count('pages_failed')
+            logger.error("Failed to fetch inventory API page {}: {}".format(url, str(e)))
             return None
 
+    def records(self, data):
+        """Vehicle records in one response"""
+        if self.records_key:
+            records = _dotted(data, self.records_key)
+            return [record for record in records if isinstance(record, dict)] if isinstance(records, list) else []
+        return list(iter_vehicle_records(data))
+
+    def total(self, data):
+        """Total result count reported by the endpoint, or None"""
+        if self.total_key:
+            return _whole_number(_dotted(data, self.total_key))
+        if not isinstance(data, dict):
+            return None
+        # Usually top level or inside a meta/pagination object
+        for container in [data] + [value for value in data.values() if isinstance(value, dict)]:
+            for key in TOTAL_KEYS:
+                total = _whole_number(container.get(key))
+                if total is not None:
+                    return total
+        return None
+
+    def fetch_page_records(self, scraper, number):
+        """Records on one page, or None if it could not be fetched"""
+        data = self.fetch_json(scraper, self.page_url(number))
+        return None if data is None else self.records(data)
+
+    def map_records(self, scraper, records):
+        """Complete vehicles mapped from one page of records"""
+        for record in records or []:
+            vehicle = scraper.vehicle_from_record(record)
+            if scraper.is_complete_vehicle(vehicle):
+                if vehicle.detail_url:
+                    vehicle.detail_url = urljoin(self.url, vehicle.detail_url)
+                yield vehicle
+
+    def iter_vehicles(self, scraper):
+        """Complete vehicles page by page as endpoint pages arrive (fetched concurrently), before dedup"""
+        data = self.fetch_json(scraper, self.page_url(self.first_page))
+        if data is None:
+            logger.error("Cannot proceed without the first inventory API page")
+            return
+        records = self.records(data)
+        total = self.total(data)
+        # Servers often cap the page size below what was asked for
+        per_page = len(records) if 0 < len(records) < self.page_size else self.page_size
+        fetch = partial(self.fetch_page_records, scraper)
+        window = scraper.max_workers * 2
+        pages = 1
+        yield from self.map_records(scraper, records)
+        
+        with scraper.page_pool() as executor:
+            if total is not None:
+                page_count = min(-(-total // per_page), scraper.max_pages)
+                numbers = range(self.first_page + 1, self.first_page + page_count)
+                logger.info("Inventory API reports {} vehicles - fetching {} more pages with {} workers".format(
+                    total, len(numbers), scraper.max_workers))
+                for records in ordered_map(executor, fetch, numbers, window):
+                    pages += 1
+                    yield from self.map_records(scraper, records)
+            else:
+                # No total reported - fetch waves of pages until one comes back short
+                number = self.first_page + 1
+                while pages < scraper.max_pages and len(records or []) >= per_page:
+                    batch = range(number, number + min(scraper.max_workers, scraper.max_pages - pages))
+                    number = batch[-1] + 1
+                    logger.info("Fetching {} more inventory API pages with {} workers".format(
+                        len(batch), scraper.max_workers))
+                    for records in ordered_map(executor, fetch, batch, window):
+                        pages += 1
+                        yield from self.map_records(scraper, records)
+                        if len(records or []) < per_page:
+                            break
+        
+        logger.info("Read {} inventory API pages".format(pages))
+
+    def fetch_vehicles(self, scraper):
+        """Complete vehicles from every endpoint page, before dedup"""
+        return list(self.iter_vehicles(scraper))
+
+
+class CardExtractor:
+    """Card text and data-* attributes -> Vehicle - only the make/model matcher is needed
+
+    Scrapers are card extractors; extraction worker processes build just this instead of a whole scraper.
+    """
+
+    def __init__(self, make_model_matcher=MAKE_MODEL_MATCHER):
+        self.make_model_matcher = make_model_matcher
+
     def extract_make_and_model(self, text):
         """Extract make and model from text using comprehensive patterns"""
         # Clean up text
-        text = re.sub(r'\s+', ' ', text.strip())
-        
-        # Try to find make and model combinations
-        for make, models in self.car_makes.items():
-            # Create patterns for this make
-            make_patterns = [
-                r'\b{}\b'.format(re.escape(make)),
-                r'\b{}\b'.format(re.escape(make.upper())),
-                r'\b{}\b'.format(re.escape(make.lower()))
-            ]
-            
-            for make_pattern in make_patterns:
-                if re.search(make_pattern, text, re.IGNORECASE):
-                    # Found the make, now look for models
-                    for model in models:
-                        model_patterns = [
-                            r'\b{}\b'.format(re.escape(model)),
-                            r'\b{}\b'.format(re.escape(model.replace("-", ""))),  # Handle hyphens
-                            r'\b{}\b'.format(re.escape(model.replace(" ", "")))   # Handle spaces
-                        ]
-                        
-                        for model_pattern in model_patterns:
-                            if re.search(model_pattern, text, re.IGNORECASE):
-                                return make, model
+        text = WHITESPACE_REGEX.sub(' ', text.strip())
+        
+        # Try to find make and model combinations in one pass
+        make, model = self.make_model_matcher.find(text)
+        if make:
+            return make, model
         
         # If no exact match found, try generic patterns
         # Look for Year Make Model patterns
-        generic_pattern = r'\b(20[0-2][0-9])\s+([A-Z][a-zA-Z-]+)\s+([A-Z][a-zA-Z0-9-]+)\b'
-        match = re.search(generic_pattern, text)
+        match = GENERIC_VEHICLE_REGEX.search(text)
         if match:
             year, potential_make, potential_model = match.groups()
             # Validate the potential make against known makes
-            for make in self.car_makes.keys():
-                if make.lower() == potential_make.lower():
-                    return make, potential_model
+            make = self.make_model_matcher.make_lookup.get(potential_make.lower())
+            if make:
+                return make, potential_model
         
         return None, None
 
-    def extract_clean_vehicle_data(self, element):
-        """Extract clean, accurate vehicle data from element - universal version"""
-        vehicle = {
-            'makeName': '',
-            'year': '',
-            'model': '',
-            'sub-model': '',
-            'trim': '',
-            'mileage': '',
-            'value': '',
-            'sale_value': '',
-            'stock_number': '',
-            'engine': ''
-        }
+    def extract_card_data(self, element_text, data_attrs):
+        """Extract a Vehicle from a card's normalized text and data-* attributes"""
+        vehicle = Vehicle()
         
         try:
-            # Get clean text without extra whitespace
-            element_text = element.get_text(separator=' ', strip=True)
-            element_text = re.sub(r'\s+', ' ', element_text)
-            
             logger.debug("Processing element text: {}...".format(element_text[:100]))
             
             # Extract year - must be 4 digits starting with 19 or 20
-            year_match = re.search(r'\b(19[8-9][0-9]|20[0-2][0-9])\b', element_text)
+            year_match = YEAR_REGEX.search(element_text)
             if year_match:
-                vehicle['year'] = year_match.group(1)
+                vehicle.year = int(year_match.group(1))
             
             # Extract make and model using universal method
             make, model = self.extract_make_and_model(element_text)
             if make:
-                vehicle['makeName'] = make
+                vehicle.makeName = make
             if model:
-                vehicle['model'] = model
-            
-            # Extract trim levels - comprehensive patterns for all brands
-            trim_patterns = {
-                # Toyota trims
-                'LE': r'\bLE\b(?!\w)',
-                'SE': r'\bSE\b(?!\w)',
-                'XLE': r'\bXLE\b(?!\w)',
-                'XSE': r'\bXSE\b(?!\w)',
-                'Limited': r'\bLimited\b(?!\w)',
-                'Platinum': r'\bPlatinum\b(?!\w)',
-                'Hybrid': r'\bHybrid\b(?!\w)',
-                'Prime': r'\bPrime\b(?!\w)',
-                'TRD': r'\bTRD\b(?!\w)',
-                'SR': r'\bSR\b(?!\w)',
-                'SR5': r'\bSR5\b(?!\w)',
-                'TRD Pro': r'\bTRD\s+Pro\b',
-                'TRD Off-Road': r'\bTRD\s+Off-?Road\b',
-                'TRD Sport': r'\bTRD\s+Sport\b',
-                # Honda trims
-                'LX': r'\bLX\b(?!\w)',
-                'EX': r'\bEX\b(?!\w)',
-                'EX-L': r'\bEX-L\b(?!\w)',
-                'Touring': r'\bTouring\b(?!\w)',
-                'Sport': r'\bSport\b(?!\w)',
-                'Type R': r'\bType\s+R\b',
-                'Si': r'\bSi\b(?!\w)',
-                # Ford trims - Enhanced
-                'XL': r'\bXL\b(?!\w)',
-                'XLT': r'\bXLT\b(?!\w)',
-                'Lariat': r'\bLariat\b(?!\w)',
-                'King Ranch': r'\bKing\s+Ranch\b',
-                'Raptor': r'\bRaptor\b(?!\w)',
-                'ST': r'\bST\b(?!\w)',
-                'RS': r'\bRS\b(?!\w)',
-                'GT': r'\bGT\b(?!\w)',
-                'Shelby': r'\bShelby\b(?!\w)',
-                'Tremor': r'\bTremor\b(?!\w)',
-                'FX4': r'\bFX4\b(?!\w)',
-                'STX': r'\bSTX\b(?!\w)',
-                'SuperCrew': r'\bSuperCrew\b(?!\w)',
-                'SuperCab': r'\bSuperCab\b(?!\w)',
-                'Titanium': r'\bTitanium\b(?!\w)',
-                'SEL': r'\bSEL\b(?!\w)',
-                'SES': r'\bSES\b(?!\w)',
-                'ST-Line': r'\bST-Line\b(?!\w)',
-                'Vignale': r'\bVignale\b(?!\w)',
-                'Wildtrak': r'\bWildtrak\b(?!\w)',
-                # Dodge trims - Enhanced
-                'SXT': r'\bSXT\b(?!\w)',
-                'R/T': r'\bR/T\b(?!\w)',
-                'RT': r'\bRT\b(?!\w)',
-                'SRT': r'\bSRT\b(?!\w)',
-                'Hellcat': r'\bHellcat\b(?!\w)',
-                'Redeye': r'\bRedeye\b(?!\w)',
-                'Demon': r'\bDemon\b(?!\w)',
-                'Scat Pack': r'\bScat\s+Pack\b',
-                'ScatPack': r'\bScatPack\b(?!\w)',
-                'Pursuit': r'\bPursuit\b(?!\w)',
-                'Police': r'\bPolice\b(?!\w)',
-                'Express': r'\bExpress\b(?!\w)',
-                'Tradesman': r'\bTradesman\b(?!\w)',
-                'Big Horn': r'\bBig\s+Horn\b',
-                'Laramie': r'\bLaramie\b(?!\w)',
-                'Rebel': r'\bRebel\b(?!\w)',
-                'TRX': r'\bTRX\b(?!\w)',
-                'Warlock': r'\bWarlock\b(?!\w)',
-                'Night Edition': r'\bNight\s+Edition\b',
-                'Blacktop': r'\bBlacktop\b(?!\w)',
-                'Rallye': r'\bRallye\b(?!\w)',
-                'AWD': r'\bAWD\b(?!\w)',
-                'Plus': r'\bPlus\b(?!\w)',
-                'Crew': r'\bCrew\b(?!\w)',
-                'Quad Cab': r'\bQuad\s+Cab\b',
-                'Regular Cab': r'\bRegular\s+Cab\b',
-                # Hyundai trims - Enhanced
-                'Blue': r'\bBlue\b(?!\w)',
-                'SE': r'\bSE\b(?!\w)', # Already defined but important for Hyundai
-                'SEL': r'\bSEL\b(?!\w)', # Already defined but important for Hyundai
-                'Ultimate': r'\bUltimate\b(?!\w)',
-                'Calligraphy': r'\bCalligraphy\b(?!\w)',
-                'N Line': r'\bN\s+Line\b',
-                'N-Line': r'\bN-Line\b(?!\w)',
-                'Preferred': r'\bPreferred\b(?!\w)',
-                'Essential': r'\bEssential\b(?!\w)',
-                'Luxury': r'\bLuxury\b(?!\w)',
-                'Trend': r'\bTrend\b(?!\w)',
-                'GL': r'\bGL\b(?!\w)',
-                'GLS': r'\bGLS\b(?!\w)',
-                'Limited': r'\bLimited\b(?!\w)', # Already defined but important
-                'Sport': r'\bSport\b(?!\w)', # Already defined but important
-                'Value Edition': r'\bValue\s+Edition\b',
-                'Tech': r'\bTech\b(?!\w)',
-                'Convenience': r'\bConvenience\b(?!\w)',
-                'Premium': r'\bPremium\b(?!\w)', # Already defined but important
-                'Active': r'\bActive\b(?!\w)',
-                'Preferred AWD': r'\bPreferred\s+AWD\b',
-                'Ultimate AWD': r'\bUltimate\s+AWD\b',
-                # Chevrolet trims
-                'LS': r'\bLS\b(?!\w)',
-                'LT': r'\bLT\b(?!\w)',
-                'LTZ': r'\bLTZ\b(?!\w)',
-                'SS': r'\bSS\b(?!\w)',
-                'Z71': r'\bZ71\b(?!\w)',
-                'High Country': r'\bHigh\s+Country\b',
-                'Premier': r'\bPremier\b(?!\w)',
-                'RS': r'\bRS\b(?!\w)', # Already defined but important for Chevy
-                'Redline': r'\bRedline\b(?!\w)',
-                'Midnight': r'\bMidnight\b(?!\w)',
-                # GMC trims
-                'Denali': r'\bDenali\b(?!\w)',
-                'SLE': r'\bSLE\b(?!\w)',
-                'SLT': r'\bSLT\b(?!\w)',
-                'AT4': r'\bAT4\b(?!\w)',
-                'Elevation': r'\bElevation\b(?!\w)',
-                # Nissan trims
-                'S': r'\bS\b(?!\w)',
-                'SV': r'\bSV\b(?!\w)',
-                'SL': r'\bSL\b(?!\w)',
-                'SR': r'\bSR\b(?!\w)', # Already defined
-                'Nismo': r'\bNismo\b(?!\w)',
-                'Midnight Edition': r'\bMidnight\s+Edition\b',
-                'Pro-4X': r'\bPro-4X\b(?!\w)',
-                # Kia trims  
-                'LX': r'\bLX\b(?!\w)', # Already defined
-                'S': r'\bS\b(?!\w)', # Already defined
-                'EX': r'\bEX\b(?!\w)', # Already defined
-                'SX': r'\bSX\b(?!\w)',
-                'GT': r'\bGT\b(?!\w)', # Already defined
-                'GT-Line': r'\bGT-Line\b(?!\w)',
-                'Turbo': r'\bTurbo\b(?!\w)',
-                # Mazda trims
-                'Sport': r'\bSport\b(?!\w)', # Already defined
-                'Touring': r'\bTouring\b(?!\w)', # Already defined
-                'Grand Touring': r'\bGrand\s+Touring\b',
-                'Signature': r'\bSignature\b(?!\w)',
-                'Carbon Edition': r'\bCarbon\s+Edition\b',
-                # Subaru trims
-                'Base': r'\bBase\b(?!\w)', # Already defined
-                'Premium': r'\bPremium\b(?!\w)', # Already defined
-                'Limited': r'\bLimited\b(?!\w)', # Already defined
-                'Touring': r'\bTouring\b(?!\w)', # Already defined
-                'Onyx Edition': r'\bOnyx\s+Edition\b',
-                'Wilderness': r'\bWilderness\b(?!\w)',
-                'STI': r'\bSTI\b(?!\w)',
-                # Luxury trims
-                'Base': r'\bBase\b(?!\w)', # Already defined
-                'Premium': r'\bPremium\b(?!\w)', # Already defined
-                'Luxury': r'\bLuxury\b(?!\w)', # Already defined
-                'Executive': r'\bExecutive\b(?!\w)', # Already defined
-                'M Sport': r'\bM\s+Sport\b', # Already defined
-                'AMG': r'\bAMG\b(?!\w)', # Already defined
-                'S-Line': r'\bS-Line\b(?!\w)', # Already defined
-                'F Sport': r'\bF\s+Sport\b' # Already defined
-            }
+                vehicle.model = model
             
-            for trim_name, pattern in trim_patterns.items():
-                if re.search(pattern, element_text, re.IGNORECASE):
-                    vehicle['trim'] = trim_name
-                    vehicle['sub-model'] = trim_name  # Use same value for both
-                    break
+            # Extract trim levels - one pass over the text for all brands
+            trim_name = find_trim(element_text)
+            if trim_name:
+                vehicle.trim = trim_name
+                vehicle.sub_model = trim_name  # Use same value for both
             
             # Extract price and potential sale price with robust patterns
             orig_price = None
             sale_price = None
 
             # Common paired patterns e.g. "Was $X Now $Y"
-            paired_patterns = [
-                r"Was[:\s]*\$([0-9,]+)\s*(?:Now|Sale Price)[:\s]*\$([0-9,]+)",
-                r"List Price[:\s]*\$([0-9,]+)\s*(?:Now|Sale Price)[:\s]*\$([0-9,]+)",
-                r"Retail Price[:\s]*\$([0-9,]+)\s*(?:Now|Sale Price)[:\s]*\$([0-9,]+)",
-            ]
-            for pattern in paired_patterns:
-                m = re.search(pattern, element_text, re.IGNORECASE)
+            for pattern in PAIRED_PRICE_PATTERNS:
+                m = pattern.search(element_text)
                 if m:
                     p1 = int(m.group(1).replace(',', ''))
                     p2 = int(m.group(2).replace(',', ''))
@@ -420,15 +1369,8 @@ class UniversalRedDeerToyotaScraper:
 
             if orig_price is None and sale_price is None:
                 # Independent patterns
-                sale_patterns = [
-                    r"(?:Sale\s*Price|Now|Internet\s*Price|Special|Clearance)[:\s]*\$([0-9,]+)",
-                ]
-                orig_patterns = [
-                    r"(?:Price|MSRP|List\s*Price|Retail\s*Price|Was)[:\s]*\$([0-9,]+)",
-                    r"\$([0-9]{2}[0-9,]*)",
-                ]
-                for pattern in sale_patterns:
-                    m = re.search(pattern, element_text, re.IGNORECASE)
+                for pattern in SALE_PRICE_PATTERNS:
+                    m = pattern.search(element_text)
                     if m:
                         try:
                             sp = int(m.group(1).replace(',', ''))
@@ -437,8 +1379,8 @@ class UniversalRedDeerToyotaScraper:
                                 break
                         except Exception:
                             pass
-                for pattern in orig_patterns:
-                    m = re.search(pattern, element_text, re.IGNORECASE)
+                for pattern in ORIG_PRICE_PATTERNS:
+                    m = pattern.search(element_text)
                     if m:
                         try:
                             op = int(m.group(1).replace(',', ''))
@@ -449,114 +1391,94 @@ class UniversalRedDeerToyotaScraper:
                         except Exception:
                             pass
 
-            # Assign into vehicle dict
+            # Assign into the vehicle
             if sale_price is not None and (orig_price is None or sale_price < orig_price):
-                if orig_price is not None:
-                    vehicle['value'] = str(orig_price)
-                vehicle['sale_value'] = str(sale_price)
+                vehicle.value = orig_price
+                vehicle.sale_value = sale_price
             elif orig_price is not None:
-                vehicle['value'] = str(orig_price)
-            
-            # Extract mileage - more accurate patterns including miles and km
-            mileage_patterns = [
-                r'(\d{1,3}(?:,\d{3})*)\s*(?:km|kilometers?)\b',
-                r'(\d{1,3}(?:,\d{3})*)\s*(?:miles?|mi)\b',
-                r'Odometer[:\s]*(\d{1,3}(?:,\d{3})*)',
-                r'Mileage[:\s]*(\d{1,3}(?:,\d{3})*)',
-                r'(\d{1,3}(?:,\d{3})*)\s*(?:k|K)\s*(?:km|mi|miles?)\b'
-            ]
+                vehicle.value = orig_price
             
-            for pattern in mileage_patterns:
-                mileage_match = re.search(pattern, element_text, re.IGNORECASE)
+            # Extract mileage
+            for pattern in MILEAGE_PATTERNS:
+                mileage_match = pattern.search(element_text)
                 if mileage_match:
                     mileage_value = mileage_match.group(1).replace(',', '')
                     # Validate mileage is reasonable (0 to 500,000)
                     try:
                         mileage_int = int(mileage_value)
                         if 0 <= mileage_int <= 500000:
-                            vehicle['mileage'] = mileage_value
+                            vehicle.mileage = mileage_int
                             break
                     except ValueError:
                         continue
             
-            # Extract stock number - more specific
-            stock_patterns = [
-                r'Stock[#\s]*([A-Z0-9]{3,10})\b',
-                r'#([A-Z0-9]{3,10})\b',
-                r'ID[:\s]*([A-Z0-9]{3,10})\b',
-                r'VIN[:\s]*([A-Z0-9]{17})\b'  # VIN numbers
-            ]
-            
-            for pattern in stock_patterns:
-                stock_match = re.search(pattern, element_text, re.IGNORECASE)
+            # Extract stock number
+            for pattern in STOCK_PATTERNS:
+                stock_match = pattern.search(element_text)
                 if stock_match:
                     stock_value = stock_match.group(1)
                     # Validate stock number format
                     if len(stock_value) >= 3 and stock_value.isalnum():
-                        vehicle['stock_number'] = stock_value
+                        vehicle.stock_number = stock_value
                         break
             
-            # Extract engine - much more comprehensive patterns for all brands
-            engine_patterns = [
-                r'(\d\.\d+L\s*(?:V?\d+|I\d+|[0-9]-?Cyl|Cylinder))',  # 2.5L V6, 1.8L 4Cyl
-                r'(\d\.\d+\s*L\s*(?:V?\d+|I\d+|[0-9]-?Cyl))',        # 3.5 L V6
-                r'(\d\.\d+L)\s*(?:Engine|Motor)',                     # 2.4L Engine
-                r'Engine[:\s]*(\d\.\d+L[^,\n]*)',                     # Engine: 2.0L description
-                r'(\d\.\d+L\s*Hybrid)',                               # 1.8L Hybrid
-                r'(\d\.\d+L\s*Turbo)',                                # 2.0L Turbo
-                r'(\d\.\d+L\s*Supercharged)',                         # 6.2L Supercharged
-                r'(\d\.\d+L\s*Diesel)',                               # 3.0L Diesel
-                r'(V\d+\s*\d\.\d+L)',                                 # V8 5.0L
-                r'(\d+\.\d+\s*Liter)',                                # 3.6 Liter
-                r'Electric\s*Motor',                                   # Electric vehicles
-                r'(\d+kWh\s*Battery)'                                 # Battery capacity
-            ]
+            # Extract VIN
+            for pattern in VIN_PATTERNS:
+                vin_match = pattern.search(element_text)
+                if vin_match:
+                    vehicle.vin = vin_match.group(1).upper()
+                    break
             
-            for pattern in engine_patterns:
-                engine_match = re.search(pattern, element_text, re.IGNORECASE)
+            # Extract engine
+            for pattern in ENGINE_PATTERNS:
+                engine_match = pattern.search(element_text)
                 if engine_match:
                     engine_text = engine_match.group(1).strip()
                     # Clean up engine text
-                    engine_text = re.sub(r'\s+', ' ', engine_text)
+                    engine_text = WHITESPACE_REGEX.sub(' ', engine_text)
                     
                     # For electric vehicles
                     if 'Electric' in engine_text or 'kWh' in engine_text:
-                        vehicle['engine'] = engine_text
+                        vehicle.engine = engine_text
                         break
                     
                     # Validate engine size is reasonable (0.8L to 8.0L for most cars)
-                    engine_size_match = re.search(r'(\d+\.\d+)L', engine_text)
+                    engine_size_match = ENGINE_SIZE_REGEX.search(engine_text)
                     if engine_size_match:
                         engine_size = float(engine_size_match.group(1))
                         if 0.8 <= engine_size <= 8.0:
-                            vehicle['engine'] = engine_text
+                            vehicle.engine = engine_text
                             break
             
             # Check HTML attributes for additional data
-            for attr, value in element.attrs.items():
+            for attr, value in data_attrs:
                 attr_lower = attr.lower()
                 if 'data-' in attr_lower:
-                    if 'year' in attr_lower and not vehicle['year']:
-                        if re.match(r'^(19[8-9][0-9]|20[0-2][0-9])$', str(value)):
-                            vehicle['year'] = str(value)
-                    elif 'make' in attr_lower and not vehicle['makeName']:
-                        vehicle['makeName'] = str(value).title()
-                    elif 'model' in attr_lower and not vehicle['model']:
-                        vehicle['model'] = str(value)
-                    elif 'sale' in attr_lower and not vehicle['sale_value']:
-                        sale_clean = re.sub(r'[^\d]', '', str(value))
-                        if sale_clean and sale_clean.isdigit() and 3000 <= int(sale_clean) <= 300000:
-                            vehicle['sale_value'] = sale_clean
+                    if 'year' in attr_lower and vehicle.year is None:
+                        if YEAR_ATTR_REGEX.match(str(value)):
+                            vehicle.year = int(value)
+                    elif 'make' in attr_lower and not vehicle.makeName:
+                        vehicle.makeName = str(value).title()
+                    elif 'model' in attr_lower and not vehicle.model:
+                        vehicle.model = str(value)
+                    elif 'sale' in attr_lower and vehicle.sale_value is None:
+                        sale_clean = NON_DIGIT_REGEX.sub('', str(value))
+                        if sale_clean and 3000 <= int(sale_clean) <= 300000:
+                            vehicle.sale_value = int(sale_clean)
                     elif 'price' in attr_lower:
-                        price_clean = re.sub(r'[^\d]', '', str(value))
-                        if price_clean and price_clean.isdigit() and 3000 <= int(price_clean) <= 300000:
-                            if vehicle['sale_value'] and int(price_clean) < int(vehicle['sale_value']):
-                                vehicle['value'], vehicle['sale_value'] = vehicle['sale_value'], price_clean
-                            elif not vehicle['value']:
-                                vehicle['value'] = price_clean
-                    elif 'stock' in attr_lower and not vehicle['stock_number']:
+                        price_clean = NON_DIGIT_REGEX.sub('', str(value))
+                        if price_clean and 3000 <= int(price_clean) <= 300000:
+                            price = int(price_clean)
+                            if vehicle.sale_value is not None and price < vehicle.sale_value:
+                                vehicle.value, vehicle.sale_value = vehicle.sale_value, price
+                            elif vehicle.value is None:
+                                vehicle.value = price
+                    elif 'stock' in attr_lower and not vehicle.stock_number:
                         if len(str(value)) >= 3:
-                            vehicle['stock_number'] = str(value)
+                            vehicle.stock_number = str(value)
+                    elif 'vin' in attr_lower and not vehicle.vin:
+                        if VIN_REGEX.match(str(value).upper()):
+                            vehicle.vin = str(value).upper()
             
             return vehicle
             
@@ -564,79 +1486,550 @@ class UniversalRedDeerToyotaScraper:
             logger.debug("Error extracting vehicle data: {}".format(str(e)))
             return vehicle
 
+
+class UniversalRedDeerToyotaScraper(CardExtractor):
+    def __init__(self, max_workers=4, max_pages=25, requests_per_second=4.0, host_rate_limits=None,
+                 cache_dir=None, cache_max_bytes=50 * 1024 * 1024, cache_ttl=7 * 24 * 3600,
+                 parser=None, selective_parse=True, source=None, parallel_extract=False, extract_workers=None,
+                 enricher=None, transport=None, metrics=None):
+        self.base_url = "https://www.reddeertoyota.com"
+        self.target_url = "https://www.reddeertoyota.com/inventory/used/"
+        self.session = requests.Session()
+        
+        # Pagination crawl settings - pages are fetched concurrently over the shared session
+        self.max_workers = max(1, max_workers)
+        self.max_pages = max(1, max_pages)
+        self.rate_limiter = HostRateLimiter(requests_per_second, host_rate_limits)
+        # Every request goes through the retrying, circuit-breaking transport with its run budget
+        self.transport = mount_transport(self.session, transport or ResilientAdapter(pool_size=max(10, self.max_workers)))
+        # Multi-dealer batches share one transport and start its run budget themselves
+        self.shared_transport = False
+        # Multi-dealer batches hand every scraper one shared page pool instead of a pool per crawl
+        self.page_executor = None
+        
+        # Parsing - lxml when installed; listing pages only materialize candidate containers
+        self.parser = parser or HTML_PARSER
+        self.selective_parse = selective_parse
+        self.priority_selectors = list(PRIORITY_SELECTORS)
+        self.fallback_selectors = list(FALLBACK_SELECTORS)
+        # The selector that worked last time is tried first - remembered across runs when caching
+        self.selector_cache = SelectorCache(os.path.join(cache_dir, 'selectors.json') if cache_dir else None)
+        
+        # Optional process pool for card extraction - worker count follows the available CPUs
+        self.parallel_extract = parallel_extract
+        self.extract_workers = extract_workers or available_cpus()
+        self.extract_pool = None
+        self.extract_pool_lock = threading.Lock()
+        
+        # Where vehicles come from - rendered listing pages unless a JSON inventory endpoint is known
+        self.source = source or HtmlListingSource()
+        # Optional detail-page stage that fills in what the listing cards left out
+        self.enricher = enricher
+        # Stage timers and counters for each run - a disabled instance makes them no-ops
+        self.metrics = metrics or ScrapeMetrics(enabled=False)
+        
+        # Optional on-disk caches - pages are revalidated with ETag/Last-Modified instead of
+        # re-downloaded, and unchanged cards reuse their previous extraction
+        self.http_cache = None
+        self.extraction_cache = None
+        if cache_dir:
+            self.http_cache = HttpCache(os.path.join(cache_dir, 'http'), cache_max_bytes, cache_ttl)
+            self.extraction_cache = ExtractionCache(os.path.join(cache_dir, 'extraction.json'))
+        
+        # Enhanced headers
+        self.session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.9',
+            'Accept-Encoding': 'gzip, deflate, br',
+            'Connection': 'keep-alive',
+            'Sec-Fetch-Dest': 'document',
+            'Sec-Fetch-Mode': 'navigate',
+            'Sec-Fetch-Site': 'none',
+            'Cache-Control': 'no-cache',
+            'Pragma': 'no-cache',
+            'DNT': '1'
+        })
+        
+        self.vehicles = []
+        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        
+        # Universal car makes and models
+        self.car_makes = CAR_MAKES
+        self.make_model_matcher = MAKE_MODEL_MATCHER
+
+    def fetch_main_page(self):
+        """Fetch the main inventory page"""
+        return self.fetch_page(self.target_url)
+
+    def fetch_page(self, url):
+        """Fetch and parse one inventory page - safe to call from worker threads"""
+        content, _ = self.fetch_content(url)
+        return self.parse_page(content) if content is not None else None
+
+    def fetch_content(self, url):
+        """GET a page, revalidating any cached copy - returns (body, cache entry if not modified)"""
+        try:
+            self.rate_limiter.wait(url)
+            entry = self.http_cache.get(url) if self.http_cache else None
+            headers = self.http_cache.conditional_headers(entry) if entry else {}
+            
+            logger.info("Fetching: {}".format(url))
+            with self.metrics.stage('fetch'):
+                response = self.session.get(url, headers=headers)
+                if response.status_code == 304 and entry:
+                    body = self.http_cache.read_body(entry)
+                    if body is not None:
+                        logger.info("Not modified since last run, using cached copy: {}".format(url))
+                        self.http_cache.refresh(entry)
+                        self.metrics.count('pages_not_modified')
+                        return body, entry
+                    response = self.session.get(url)
+                response.raise_for_status()
+                content = response.content
+            
+            logger.info("Response: {}, Size: {} bytes".format(response.status_code, len(content)))
+            self.metrics.count('pages_fetched')
+            self.metrics.count('bytes_downloaded', len(content))
+            if self.http_cache:
+                self.http_cache.store(url, response.headers, content)
+            return content, None
+            
+        except Exception as e:
+            self.metrics.count('pages_failed')
+            logger.error("Failed to fetch page {}: {}".format(url, str(e)))
+            return None, None
+
+    def process_page(self, content, url, entry=None):
+        """Parse a page and extract its vehicles and pagination links - returns (soup, vehicles, page_urls)
+
+        A page the server reported unchanged replays its previous parse (soup is None then).
+        """
+        extracted = entry.get('extracted') if entry else None
+        if extracted and extracted['vehicles'] and extracted['fingerprint'] == EXTRACTION_FINGERPRINT:
+            logger.info("Reusing previous parse of {}: {} vehicles".format(url, len(extracted['vehicles'])))
+            vehicles = [Vehicle.from_row(row) for row in extracted['vehicles']]
+            for vehicle, detail_url in zip(vehicles, extracted['detail_urls']):
+                vehicle.detail_url = detail_url
+            if self.extraction_cache:
+                # The page's cards were not extracted, but they are still on the lot - keep them cached
+                self.extraction_cache.keep(extracted.get('card_keys', []))
+            return None, vehicles, extracted['page_urls']
+        
+        with self.metrics.stage('decode'):
+            html = content.decode('utf-8', errors='replace') if isinstance(content, bytes) else content
+        with self.metrics.stage('extract'):
+            vehicles = self.extract_structured_vehicles(html)
+        card_keys = []
+        if vehicles:
+            # Structured data is authoritative - the soup is only needed for pagination links
+            logger.info("Found {} vehicles in embedded structured data on {}".format(len(vehicles), url))
+            soup = self.parse_page(content, selective=self.selective_parse, selectors=[])
+        elif self.extraction_cache:
+            with self.extraction_cache.recording() as card_keys:
+                soup, vehicles = self.extract_containers(content, url)
+        else:
+            soup, vehicles = self.extract_containers(content, url)
+        with self.metrics.stage('select'):
+            page_urls = self.discover_page_urls(soup, url)
+        for vehicle in vehicles:
+            if vehicle.detail_url:
+                vehicle.detail_url = urljoin(url, vehicle.detail_url)
+        if self.http_cache:
+            self.http_cache.store_extracted(url, {
+                'fingerprint': EXTRACTION_FINGERPRINT,
+                'vehicles': [vehicle.to_row() for vehicle in vehicles],
+                'detail_urls': [vehicle.detail_url for vehicle in vehicles],
+                'page_urls': page_urls,
+                'card_keys': card_keys,
+            })
+        return soup, vehicles, page_urls
+
+    def extract_containers(self, content, url):
+        """Card vehicles on a page - the remembered selector first, the full probe when it under-yields
+
+        Returns (soup, vehicles); with the remembered selector only its subtrees are parsed.
+        """
+        with self.metrics.stage('select'):
+            fingerprint = page_template_fingerprint(content)
+            cached = self.selector_cache.lookup(url, fingerprint)
+        if cached in self.priority_selectors or cached in self.fallback_selectors:
+            soup = self.parse_page(content, selective=self.selective_parse, selectors=[cached])
+            with self.metrics.stage('select'):
+                elements = select_all(soup, [cached])[cached]
+            vehicles = self.try_selector(cached, elements)
+            if self.selector_cache.trusted(len(elements), len(vehicles)):
+                logger.info("Extracted {} vehicles using remembered selector {}".format(len(vehicles), cached))
+                self.selector_cache.record(url, fingerprint, cached, len(elements), len(vehicles))
+                return soup, vehicles
+            logger.info("Remembered selector {} yielded {} of {} elements - probing all selectors".format(
+                cached, len(vehicles), len(elements)))
+            release_soup(soup)
+        
+        soup = self.parse_page(content, selective=self.selective_parse)
+        vehicles, selector, matched = self.probe_selectors(soup)
+        if not vehicles and self.selective_parse:
+            # Nothing in the candidate subtrees - the text fallback needs the whole page
+            soup = self.parse_page(content)
+            vehicles, selector, matched = self.probe_selectors(soup)
+        if vehicles:
+            self.selector_cache.record(url, fingerprint, selector, matched, len(vehicles))
+        return soup, vehicles
+
+    def scrape_page(self, url):
+        """Fetch and process one listing page, or None if it could not be fetched"""
+        content, entry = self.fetch_content(url)
+        if content is None:
+            return None
+        return self.process_page(content, url, entry)
+
+    def parse_page(self, content, selective=False, selectors=None):
+        """Parse raw page HTML into a soup - selective mode keeps only candidate container subtrees"""
+        parse_only = None
+        if selective:
+            if selectors is None:
+                selectors = self.priority_selectors + self.fallback_selectors
+            # Complex selectors cannot be judged while parsing, so they need the full tree
+            if all(compile_selector(selector) for selector in selectors):
+                parse_only = ListingStrainer(selectors)
+        with self.metrics.stage('parse'):
+            soup = BeautifulSoup(content, self.parser, parse_only=parse_only)
+        
+        # Log page info
+        title = soup.find('title')
+        if title:
+            logger.info("Page title: {}".format(title.get_text().strip()))
+        
+        return soup
+
+    def discover_page_urls(self, soup, page_url):
+        """Find other result pages linked from a listing page (rel=next, pagers, page-number params)"""
+        host = urlparse(page_url).netloc
+        urls = []
+        page_template = None
+        last_page = 0
+        
+        for link in soup.select('a[href]'):
+            href = urljoin(page_url, link['href']).split('#')[0]
+            parsed = urlparse(href)
+            if parsed.netloc != host:
+                continue
+            
+            query = parse_qsl(parsed.query, keep_blank_values=True)
+            page_params = [(key, value) for key, value in query if PAGE_PARAM_REGEX.match(key) and value.isdigit()]
+            if page_params:
+                key, value = page_params[0]
+                if int(value) > 1:
+                    urls.append(href)
+                if int(value) > last_page:
+                    last_page = int(value)
+                    page_template = (parsed, key)
+                continue
+            
+            is_next = 'next' in [rel.lower() for rel in link.get('rel', [])]
+            in_pager = link.find_parent(class_=PAGINATION_CLASS_REGEX) is not None
+            if is_next or (in_pager and link.get_text(strip=True).isdigit()):
+                urls.append(href)
+        
+        # Pagers usually show a window of pages - fill the gaps up to the last one seen
+        if page_template:
+            parsed, key = page_template
+            query = parse_qsl(parsed.query, keep_blank_values=True)
+            for number in range(2, min(last_page, self.max_pages) + 1):
+                page_query = [(k, str(number) if k == key else v) for k, v in query]
+                urls.append(urlunparse(parsed._replace(query=urlencode(page_query))))
+        
+        return list(dict.fromkeys(urls))
+
+    @contextmanager
+    def page_pool(self):
+        """Thread pool for page fetches - the shared batch pool when there is one, else one for this crawl"""
+        if self.page_executor is not None:
+            yield self.page_executor
+            return
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            yield executor
+
+    def iter_additional_pages(self, page_urls):
+        """Fetch and process the remaining result pages concurrently, yielding (vehicles, page_urls)
+        in discovery order as they complete - only a bounded window of pages is held at once"""
+        seen = {self.target_url}
+        pending = [url for url in page_urls if url not in seen]
+        
+        with self.page_pool() as executor:
+            while pending and len(seen) < self.max_pages:
+                batch = pending[:self.max_pages - len(seen)]
+                seen.update(batch)
+                logger.info("Fetching {} more result pages with {} workers".format(len(batch), self.max_workers))
+                
+                pending = []
+                for result in ordered_map(executor, self.scrape_page, batch, self.max_workers * 2):
+                    if result is None:
+                        continue
+                    soup, vehicles, urls = result
+                    if soup is not None:
+                        release_soup(soup)
+                    pending.extend(u for u in urls if u not in seen and u not in pending)
+                    yield vehicles, urls
+
+    def extract_structured_vehicles(self, content):
+        """Vehicles from JSON-LD or embedded inventory JSON in the raw page, without building a soup"""
+        html = content.decode('utf-8', errors='replace') if isinstance(content, bytes) else content
+        vehicles = []
+        
+        for attrs, script in SCRIPT_REGEX.findall(html):
+            if 'json' in attrs.lower():
+                script = script.strip()
+                if script.startswith('<!--'):
+                    script = script[4:].rsplit('-->', 1)[0]
+                try:
+                    documents = [json.loads(script, strict=False)]
+                except ValueError:
+                    continue
+            elif 'model' in script and 'make' in script.lower():
+                documents = iter_embedded_json(script)
+            else:
+                continue
+            
+            for document in documents:
+                for record in iter_vehicle_records(document):
+                    vehicle = self.vehicle_from_record(record)
+                    if self.is_complete_vehicle(vehicle):
+                        vehicles.append(vehicle)
+        
+        return vehicles
+
+    def vehicle_from_record(self, record):
+        """Map a JSON-LD Vehicle or inventory JSON record into a Vehicle"""
+        vehicle = Vehicle()
+        
+        make = _scalar(_first_field(record, 'makeName'))
+        if make:
+            make = str(make).strip()
+            vehicle.makeName = self.make_model_matcher.make_lookup.get(make.lower(), make.title())
+        
+        model = _scalar(_first_field(record, 'model'))
+        if model:
+            model = str(model).strip()
+            # Prefer our canonical spelling (RAV4 for "Rav-4") but never swap in a different model
+            known_make, known_model = self.make_model_matcher.find('{} {}'.format(vehicle.makeName, model))
+            same_model = known_make == vehicle.makeName and known_model and \
+                NON_WORD_REGEX.sub('', known_model).lower() == NON_WORD_REGEX.sub('', model).lower()
+            vehicle.model = known_model if same_model else model
+        
+        year_match = YEAR_REGEX.search(str(_scalar(_first_field(record, 'year')) or ''))
+        if year_match:
+            vehicle.year = int(year_match.group(1))
+        
+        trim = _scalar(_first_field(record, 'trim'))
+        if not trim:
+            trim = find_trim(str(_scalar(record.get('name')) or ''))
+        if trim:
+            vehicle.trim = vehicle.sub_model = WHITESPACE_REGEX.sub(' ', str(trim)).strip()
+        
+        mileage = _whole_number(_scalar(_first_field(record, 'mileage')))
+        if mileage is not None and 0 <= mileage <= 500000:
+            vehicle.mileage = mileage
+        
+        # Same rules as the card text: a lower sale price goes to sale_value
+        prices = [p for p in _offer_prices(_first_field(record, 'value')) if 3000 <= p <= 300000]
+        sale_price = _whole_number(_scalar(_first_field(record, 'sale_value')))
+        if sale_price is not None and not 3000 <= sale_price <= 300000:
+            sale_price = None
+        orig_price = max(prices) if prices else None
+        if sale_price is None and len(set(prices)) > 1:
+            sale_price = min(prices)
+        if sale_price is not None and (orig_price is None or sale_price < orig_price):
+            vehicle.value = orig_price
+            vehicle.sale_value = sale_price
+        elif orig_price is not None:
+            vehicle.value = orig_price
+        
+        stock = _scalar(_first_field(record, 'stock_number')) or _scalar(_first_field(record, 'vin'))
+        if stock:
+            vehicle.stock_number = str(stock).strip()
+        
+        engine = _first_field(record, 'engine')
+        if engine:
+            vehicle.engine = _engine_text(engine)
+        
+        vin = str(_scalar(_first_field(record, 'vin')) or '').strip().upper()
+        if VIN_REGEX.match(vin):
+            vehicle.vin = vin
+        
+        detail_url = _scalar(_first_field(record, 'detail_url'))
+        if isinstance(detail_url, str) and detail_url.strip():
+            vehicle.detail_url = detail_url.strip()
+        
+        return vehicle
+
+    def extract_clean_vehicle_data(self, element):
+        """Extract clean, accurate vehicle data from element - universal version"""
+        return self.extract_card_data(*card_payload(element))
+
+    def extract_vehicle(self, element):
+        """extract_clean_vehicle_data with the persistent per-card cache in front"""
+        if not self.extraction_cache:
+            return self.extract_clean_vehicle_data(element)
+        
+        payload = card_payload(element)
+        key = self.extraction_cache.key(payload)
+        vehicle = self.extraction_cache.get(key)
+        if vehicle is None:
+            vehicle = self.extract_card_data(*payload)
+            self.extraction_cache.put(key, vehicle)
+        return vehicle
+
+    def extract_vehicles(self, elements):
+        """extract_vehicle over many cards, in order - large batches go to the process pool"""
+        if not self.parallel_extract or self.extract_workers < 2 or len(elements) < PROCESS_EXTRACTION_MIN_CARDS:
+            if not self.metrics.enabled:
+                return [self.extract_vehicle(element) for element in elements]
+            vehicles = []
+            for element in elements:
+                started = time.perf_counter()
+                vehicles.append(self.extract_vehicle(element))
+                self.metrics.observe('card_extract_seconds', time.perf_counter() - started)
+            return vehicles
+        
+        payloads = [card_payload(element) for element in elements]
+        vehicles = [None] * len(payloads)
+        keys = [None] * len(payloads)
+        pending = []
+        for index, payload in enumerate(payloads):
+            if self.extraction_cache:
+                keys[index] = self.extraction_cache.key(payload)
+                vehicles[index] = self.extraction_cache.get(keys[index])
+            if vehicles[index] is None:
+                pending.append(index)
+        if not pending:
+            return vehicles
+        
+        # A few chunks per worker keeps them busy without paying per-card pickling overhead
+        chunk_size = max(25, -(-len(pending) // (self.extract_workers * 4)))
+        chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+        logger.info("Extracting {} cards in {} chunks on {} processes".format(
+            len(pending), len(chunks), self.extract_workers))
+        timed = self.metrics.enabled
+        try:
+            results = list(self.extraction_pool().map(
+                partial(_extract_card_chunk, timed=timed), [[payloads[i] for i in chunk] for chunk in chunks]))
+        except Exception as e:
+            # A broken pool must not cost the run - finish serially in this process
+            logger.warning("Process extraction failed, extracting serially: {}".format(str(e)))
+            self.parallel_extract = False
+            self.shutdown_extraction_pool()
+            results = [extract_card_chunk(self, [payloads[i] for i in chunk], timed) for chunk in chunks]
+        
+        for chunk, (chunk_vehicles, timings) in zip(chunks, results):
+            # Worker-side timings, so the per-card histogram means the same on both extraction paths
+            for seconds in timings:
+                self.metrics.observe('card_extract_seconds', seconds)
+            for index, vehicle in zip(chunk, chunk_vehicles):
+                vehicles[index] = vehicle
+                if self.extraction_cache:
+                    self.extraction_cache.put(keys[index], vehicle)
+        return vehicles
+
+    def extraction_pool(self):
+        """Process pool for card extraction, started on first use and kept for the whole run"""
+        with self.extract_pool_lock:
+            if self.extract_pool is None:
+                # Imported here - multiprocessing is only needed when parallel extraction is on
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+                # spawn - forking a process that is running fetch threads is not safe
+                self.extract_pool = ProcessPoolExecutor(
+                    max_workers=self.extract_workers, mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_extraction_worker, initargs=(self.make_model_matcher,))
+            return self.extract_pool
+
+    def shutdown_extraction_pool(self):
+        """Stop the extraction processes, if any were started"""
+        with self.extract_pool_lock:
+            if self.extract_pool is not None:
+                self.extract_pool.shutdown()
+                self.extract_pool = None
+
+    def save_caches(self):
+        """Persist run-level caches and log the run's selector and transport metrics once a scrape finishes"""
+        if self.extraction_cache:
+            self.extraction_cache.save()
+        self.selector_cache.save()
+        for row in self.selector_cache.report():
+            logger.info("Selector {selector}: {tries} tries, {wins} wins, {complete}/{matched} complete "
+                        "({yield_rate:.0%}), {ms:.1f} ms extracting".format(ms=row['seconds'] * 1000, **row))
+        logger.info("HTTP: {requests} requests, {retries} retries, {failures} given up, {circuit_open} refused by "
+                    "open circuits, {budget_exhausted} over the run budget".format(**self.transport.stats))
+
     def is_complete_vehicle(self, vehicle):
         """Check if vehicle has enough accurate data"""
-        if not isinstance(vehicle, dict):
+        if isinstance(vehicle, dict):
+            vehicle = Vehicle.from_dict(vehicle)
+        elif not isinstance(vehicle, Vehicle):
             return False
         
-        # Must have at least these essential fields
-        required_fields = ['year', 'makeName']  # Changed from just model to include make
-        has_required = all(vehicle.get(field, '').strip() for field in required_fields)
+        # Must have at least these essential fields: year and make
+        has_required = vehicle.year is not None and bool(vehicle.makeName.strip())
         
-        # Must have at least 1 of these identifying fields
-        identifying_fields = ['model', 'value', 'stock_number', 'mileage']
-        has_identifying = sum(1 for field in identifying_fields if vehicle.get(field, '').strip()) >= 1
+        # Must have at least 1 of these identifying fields: model, price, stock number, mileage
+        has_identifying = bool(vehicle.model.strip()) or vehicle.value is not None or \
+            bool(vehicle.stock_number.strip()) or vehicle.mileage is not None
         
         return has_required and has_identifying
 
-    def find_vehicle_containers(self, soup):
-        """Find vehicle container elements with accurate data"""
+    def try_selector(self, selector, elements):
+        """Complete vehicles among one selector's matches - timed into the selector metrics"""
+        started = time.perf_counter()
         vehicles = []
+        with self.metrics.stage('extract'):
+            extracted = self.extract_vehicles(elements)
+            for element, vehicle in zip(elements, extracted):
+                if self.is_complete_vehicle(vehicle):
+                    vehicle.detail_url = card_link(element)
+                    vehicles.append(vehicle)
+        self.selector_cache.measure(selector, len(elements), len(vehicles), time.perf_counter() - started)
+        self.metrics.count('cards_seen', len(elements))
+        self.metrics.count('cards_rejected', len(elements) - len(vehicles))
+        self.metrics.fields(extracted, EXTRACTED_FIELDS)
+        return vehicles
+
+    def probe_selectors(self, soup):
+        """Full probe over every container selector - returns (vehicles, winning selector, elements it matched)"""
+        # Every selector is evaluated in one traversal, then tried in priority order
+        with self.metrics.stage('select'):
+            candidates = select_all(soup, self.priority_selectors + self.fallback_selectors)
         
-        # Try more specific selectors first
-        priority_selectors = [
-            '[data-vehicle-id]',
-            '[data-stock-number]',
-            '[data-vin]',
-            '.vehicle-card',
-            '.inventory-item',
-            '.vehicle-listing',
-            '.srp-list-item'
-        ]
-        
-        for selector in priority_selectors:
-            elements = soup.select(selector)
+        for selector in self.priority_selectors:
+            elements = candidates[selector]
             if elements:
                 logger.info("Found {} elements with selector: {}".format(len(elements), selector))
                 
-                for element in elements:
-                    vehicle = self.extract_clean_vehicle_data(element)
-                    
-                    if self.is_complete_vehicle(vehicle):
-                        vehicles.append(vehicle)
-                        logger.info("Extracted complete vehicle: {} {} {} - Stock: {}".format(
-                            vehicle['year'], vehicle['makeName'], vehicle['model'], vehicle['stock_number']))
+                vehicles = self.try_selector(selector, elements)
+                for vehicle in vehicles:
+                    logger.info("Extracted complete vehicle: {} {} {} - Stock: {}".format(
+                        _text(vehicle.year), vehicle.makeName, vehicle.model, vehicle.stock_number))
                 
                 if vehicles:
                     logger.info("Successfully extracted {} vehicles using {}".format(len(vehicles), selector))
-                    return vehicles
+                    return vehicles, selector, len(elements)
         
         # Try broader selectors if specific ones fail
-        fallback_selectors = [
-            '.vehicle',
-            '.car-item',
-            '.listing-item',
-            '.inventory-card',
-            '[class*="vehicle"]',
-            '[class*="inventory"]'
-        ]
-        
-        for selector in fallback_selectors:
-            elements = soup.select(selector)
+        for selector in self.fallback_selectors:
+            elements = candidates[selector]
             if elements:
                 logger.info("Trying fallback selector: {} ({} elements)".format(selector, len(elements)))
                 
-                for element in elements:
-                    vehicle = self.extract_clean_vehicle_data(element)
-                    
-                    if self.is_complete_vehicle(vehicle):
-                        vehicles.append(vehicle)
-                
+                vehicles = self.try_selector(selector, elements)
                 if vehicles:
                     logger.info("Extracted {} vehicles using fallback {}".format(len(vehicles), selector))
-                    return vehicles
+                    return vehicles, selector, len(elements)
         
-        return vehicles
+        return [], None, 0
+
+    def find_vehicle_containers(self, soup):
+        """Find vehicle container elements with accurate data"""
+        return self.probe_selectors(soup)[0]
 
     def scrape_inventory(self):
         """Main scraping method - only returns accurate data for any brand"""
@@ -645,71 +2038,105 @@ class UniversalRedDeerToyotaScraper:
         logger.info("Extracting accurate data for ANY brand/model - no fallback samples")
         logger.info("=" * 80)
         
-        # Fetch main page
-        soup = self.fetch_main_page()
-        if not soup:
-            logger.error("Cannot proceed without main page")
-            return []
+        # Fetch every listing/API page, extract and dedup vehicle data
+        self.vehicles = list(self.iter_vehicles())
+        if self.enricher:
+            self.enricher.enrich(self, self.vehicles)
+        logger.info("FINAL RESULT: {} unique vehicles with accurate data".format(len(self.vehicles)))
         
-        # Find and extract vehicle data
-        logger.info("Searching for vehicle containers...")
-        vehicles = self.find_vehicle_containers(soup)
+        return self.vehicles
+
+    def begin_run(self):
+        """Reset per-run state so one instance can serve many runs (warm serverless invocations)"""
+        self.vehicles = []
+        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.selector_cache.begin_run()
+        self.metrics.begin_run()
+        if not self.shared_transport:
+            self.transport.begin_run()
+        if self.extraction_cache:
+            self.extraction_cache.begin_run()
+
+    def iter_vehicles(self):
+        """Stream unique vehicles as pages are processed - fetch, extract and dedup on the fly
+
+        Only an 8-byte digest of each dedup key is kept, so memory stays flat however large
+        the inventory is.
+        """
+        self.begin_run()
+        seen_digests = set()
+        try:
+            for vehicle in self.source.iter_vehicles(self):
+                with self.metrics.stage('dedup'):
+                    identifier = self.dedup_key(vehicle)
+                    unique = any(identifier)
+                    if unique:
+                        digest = hashlib.blake2b('\x1f'.join(identifier).encode('utf-8'), digest_size=8).digest()
+                        unique = digest not in seen_digests
+                        seen_digests.add(digest)
+                if unique:
+                    self.metrics.count('vehicles')
+                    yield vehicle
+                else:
+                    self.metrics.count('duplicates_dropped')
+        finally:
+            self.shutdown_extraction_pool()
+            self.save_caches()
+
+    def extract_vehicles_from_text(self, soup):
+        """Text-based extraction over the whole page - last resort when no containers match"""
+        vehicles = []
         
-        if not vehicles:
-            logger.warning("No complete vehicles found with current selectors")
-            
-            # Try one more approach - look for any text that contains vehicle info
-            logger.info("Attempting text-based extraction as final attempt...")
-            page_text = soup.get_text()
-            
-            # Look for structured vehicle information patterns (any brand)
-            make_list = '|'.join(self.car_makes.keys())
-            vehicle_pattern = r'(19[8-9][0-9]|20[0-2][0-9])\s+({0})\s+([A-Za-z0-9-]+).*?\$([0-9,]+)'.format(make_list)
-            
-            matches = re.findall(vehicle_pattern, page_text, re.IGNORECASE)
+        # Try one more approach - look for any text that contains vehicle info
+        logger.info("Attempting text-based extraction as final attempt...")
+        page_text = soup.get_text()
+        
+        # Look for structured vehicle information patterns (any brand)
+        make_list = '|'.join(self.car_makes.keys())
+        vehicle_pattern = r'(19[8-9][0-9]|20[0-2][0-9])\s+({0})\s+([A-Za-z0-9-]+).*?\$([0-9,]+)'.format(make_list)
+        
+        matches = re.findall(vehicle_pattern, page_text, re.IGNORECASE)
+        
+        for match in matches[:20]:  # Limit results
+            vehicle = Vehicle(makeName=match[1], year=int(match[0]), model=match[2],
+                              value=int(match[3].replace(',', '')))
             
-            for match in matches[:20]:  # Limit results
-                vehicle = {
-                    'makeName': match[1],
-                    'year': match[0],
-                    'model': match[2],
-                    'sub-model': '',
-                    'trim': '',
-                    'mileage': '',
-                    'value': "${:,}".format(int(match[3].replace(',', ''))),
-                    'stock_number': '',
-                    'engine': ''
-                }
-                
-                if self.is_complete_vehicle(vehicle):
-                    vehicles.append(vehicle)
+            if self.is_complete_vehicle(vehicle):
+                vehicles.append(vehicle)
         
-        # Remove duplicates based on multiple criteria
+        return vehicles
+
+    def dedupe_vehicles(self, vehicles):
+        """Remove duplicates based on multiple criteria, keeping first-seen order"""
         unique_vehicles = []
         seen_combinations = set()
         
-        for vehicle in vehicles:
-            # Create unique identifier
-            identifier = (
-                vehicle.get('year', ''),
-                vehicle.get('makeName', ''),
-                vehicle.get('model', ''),
-                vehicle.get('stock_number', ''),
-                vehicle.get('value', '')
-            )
-            
-            if identifier not in seen_combinations and any(identifier):
-                seen_combinations.add(identifier)
-                unique_vehicles.append(vehicle)
-        
-        self.vehicles = unique_vehicles
-        logger.info("FINAL RESULT: {} unique vehicles with accurate data".format(len(self.vehicles)))
+        with self.metrics.stage('dedup'):
+            for vehicle in vehicles:
+                identifier = self.dedup_key(vehicle)
+                if identifier not in seen_combinations and any(identifier):
+                    seen_combinations.add(identifier)
+                    unique_vehicles.append(vehicle)
+        self.metrics.count('vehicles', len(unique_vehicles))
+        self.metrics.count('duplicates_dropped', len(vehicles) - len(unique_vehicles))
         
-        return self.vehicles
+        return unique_vehicles
+
+    def dedup_key(self, vehicle):
+        """Unique identifier for a vehicle across pages"""
+        if isinstance(vehicle, Vehicle):
+            return vehicle.dedup_key()
+        return (
+            vehicle.get('year', ''),
+            vehicle.get('makeName', ''),
+            vehicle.get('model', ''),
+            vehicle.get('stock_number', ''),
+            vehicle.get('value', '')
+        )
 
     def save_to_csv(self, filename):
         """Save only if we have real vehicle data - accepts full path"""
-        fieldnames = ['makeName', 'year', 'model', 'sub-model', 'trim', 'mileage', 'value', 'sale_value', 'stock_number', 'engine']
+        fieldnames = CSV_FIELDNAMES
         
         if not self.vehicles:
             logger.info("No vehicles found - NOT creating CSV file")
@@ -719,13 +2146,10 @@ class UniversalRedDeerToyotaScraper:
             # Ensure directory exists
             os.makedirs(os.path.dirname(filename), exist_ok=True)
             
-            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                
-                for vehicle in self.vehicles:
-                    row = {field: vehicle.get(field, '') for field in fieldnames}
-                    writer.writerow(row)
+            with self.metrics.stage('write'), open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+                writer = csv.writer(csvfile)
+                writer.writerow(fieldnames)
+                writer.writerows(vehicle.to_row() for vehicle in self.vehicles)
             
             logger.info("CSV saved with {} accurate vehicle records to {}".format(len(self.vehicles), filename))
             return True
@@ -734,6 +2158,59 @@ class UniversalRedDeerToyotaScraper:
             logger.error("Error saving CSV: {}".format(str(e)))
             return False
 
+    def stream_to_csv(self, vehicles, filename):
+        """Write vehicles to CSV as they arrive - returns the count; no file unless there was real data"""
+        return self._stream_to_file(vehicles, filename, 'CSV', self._write_csv_rows)
+
+    def stream_to_ndjson(self, vehicles, filename):
+        """Write vehicles as newline-delimited JSON as they arrive - returns the count"""
+        return self._stream_to_file(vehicles, filename, 'NDJSON', self._write_ndjson_lines)
+
+    def _write_csv_rows(self, f, vehicles):
+        writer = csv.writer(f)
+        count = 0
+        for vehicle in vehicles:
+            if count == 0:
+                writer.writerow(CSV_FIELDNAMES)
+            writer.writerow(vehicle.to_row())
+            count += 1
+        return count
+
+    def _write_ndjson_lines(self, f, vehicles):
+        count = 0
+        for vehicle in vehicles:
+            f.write(json.dumps(vehicle.to_dict(), ensure_ascii=False))
+            f.write('\n')
+            count += 1
+        return count
+
+    def _stream_to_file(self, vehicles, filename, label, write):
+        """Stream into a temp file and move it into place only once it holds at least one vehicle"""
+        tmp_path = filename + '.tmp'
+        count = 0
+        # Vehicles are usually still being scraped while they are written - only the writing is timed
+        upstream = [0.0]
+        if self.metrics.enabled:
+            vehicles = _time_iteration(vehicles, upstream)
+        started = time.perf_counter()
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+            with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+                count = write(f, vehicles)
+            if count:
+                os.replace(tmp_path, filename)
+                logger.info("{} streamed with {} accurate vehicle records to {}".format(label, count, filename))
+            else:
+                logger.info("No vehicles found - NOT creating {} file".format(label))
+            return count
+        except Exception as e:
+            logger.error("Error streaming {}: {}".format(label, str(e)))
+            return 0
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            self.metrics.add_time('write', time.perf_counter() - started - upstream[0])
+
     def print_results(self):
         """Print results with accuracy validation"""
         print("\n" + "=" * 100)
@@ -752,11 +2229,16 @@ class UniversalRedDeerToyotaScraper:
         
         print("Found {} vehicles with accurate, complete data".format(len(self.vehicles)))
         print("Generated: {}".format(datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+        if self.extraction_cache:
+            print("Extraction cache: {} hits, {} misses (re-parsed)".format(
+                self.extraction_cache.hits, self.extraction_cache.misses))
+        if self.metrics.enabled:
+            print("Metrics: {}".format(self.metrics.format_summary()))
         
         # Show brand distribution
         brand_counts = {}
         for vehicle in self.vehicles:
-            brand = vehicle.get('makeName', 'Unknown')
+            brand = vehicle.makeName or 'Unknown'
             brand_counts[brand] = brand_counts.get(brand, 0) + 1
         
         print("\nBrand Distribution:")
@@ -770,6 +2252,7 @@ class UniversalRedDeerToyotaScraper:
         
         # Print each vehicle
         for vehicle in self.vehicles:
+            vehicle = vehicle.to_dict()
             make = vehicle.get('makeName', '')[:11]
             year = vehicle.get('year', '')
             model = vehicle.get('model', '')[:14]
@@ -784,58 +2267,340 @@ class UniversalRedDeerToyotaScraper:
             print("{:<12} {:<6} {:<15} {:<12} {:<10} {:<10} {:<10} {:<10} {:<10} {:<20}".format(
                 make, year, model, submodel, trim, mileage, value, sale_value, stock, engine))
 
-def main():
+class AsyncRedDeerToyotaScraper(UniversalRedDeerToyotaScraper):
+    """asyncio variant - pages fetched over one pooled keep-alive aiohttp session,
+    parsing and extraction offloaded to a thread pool so the event loop never blocks"""
+
+    def __init__(self, max_concurrency=8, persistent_session=False, **kwargs):
+        global aiohttp
+        if aiohttp is None:
+            try:
+                import aiohttp
+            except ImportError:
+                raise ImportError("AsyncRedDeerToyotaScraper requires aiohttp (pip install aiohttp)")
+        super().__init__(**kwargs)
+        self.max_concurrency = max(1, max_concurrency)
+        # Warm serverless invocations keep the aiohttp session (and its open connections) between runs
+        self.persistent_session = persistent_session
+        self.http = None
+        self.http_loop = None
+
+    def http_headers(self):
+        """Session headers for aiohttp - brotli is only decodable when the optional package is installed"""
+        headers = dict(self.session.headers)
+        headers['Accept-Encoding'] = 'gzip, deflate'
+        return headers
+
+    async def fetch_page_async(self, http, semaphore, url):
+        """Fetch one page body, bounded by the shared semaphore and per-host rate limit
+
+        Returns (body, cache entry if not modified) like fetch_content.
+        """
+        async with semaphore:
+            delay = self.rate_limiter.reserve(url)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                entry = self.http_cache.get(url) if self.http_cache else None
+                headers = self.http_cache.conditional_headers(entry) if entry else {}
+                
+                logger.info("Fetching: {}".format(url))
+                status, response_headers, content = await self.timed_get_async(http, url, headers)
+                if status == 304 and entry:
+                    body = self.http_cache.read_body(entry)
+                    if body is not None:
+                        logger.info("Not modified since last run, using cached copy: {}".format(url))
+                        self.http_cache.refresh(entry)
+                        self.metrics.count('pages_not_modified')
+                        return body, entry
+                    # Cached body went missing - fetch it again without validators
+                    status, response_headers, content = await self.timed_get_async(http, url)
+                if status >= 400:
+                    raise requests.exceptions.HTTPError("{} Error for url: {}".format(status, url))
+                logger.info("Response: {}, Size: {} bytes".format(status, len(content)))
+                self.metrics.count('pages_fetched')
+                self.metrics.count('bytes_downloaded', len(content))
+                if self.http_cache:
+                    self.http_cache.store(url, response_headers, content)
+                return content, None
+            except Exception as e:
+                self.metrics.count('pages_failed')
+                logger.error("Failed to fetch page {}: {}".format(url, str(e)))
+                return None, None
+
+    async def get_async(self, http, url, headers=None):
+        """GET through the aiohttp session under the transport's policy - returns (status, headers, body)
+
+        The same run budget, jittered backoff with Retry-After, per-host circuit breaker and stats as
+        ResilientAdapter.send; each attempt's timeout is clamped to what is left of the budget.
+        """
+        remaining = self.transport.admit(url)
+        attempt = 0
+        while True:
+            self.transport.count('requests')
+            connect, read = self.transport.timeouts(None, remaining)
+            timeout = aiohttp.ClientTimeout(total=None if remaining is None else max(0.01, remaining),
+                                            sock_connect=connect, sock_read=read)
+            response, error = None, None
+            try:
+                async with http.get(url, headers=headers, timeout=timeout) as response:
+                    body = await response.read() if response.status not in RETRY_STATUSES else b''
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                response, error = None, e
+            if response is not None and response.status not in RETRY_STATUSES:
+                self.transport.succeeded(url)
+                return response.status, response.headers, body
+
+            reason = error or 'HTTP {}'.format(response.status)
+            delay = self.transport.retry_delay('GET', url, attempt, reason, response)
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response.status, response.headers, body
+            await asyncio.sleep(delay)
+            attempt += 1
+            remaining = self.transport.remaining()
+
+    async def timed_get_async(self, http, url, headers=None):
+        """get_async timed into the fetch stage by this coroutine itself
+
+        stage() is scoped to the thread, and every coroutine shares the event loop's, so its
+        start and end would interleave with other fetches in flight.
+        """
+        started = time.perf_counter()
+        try:
+            return await self.get_async(http, url, headers)
+        finally:
+            self.metrics.add_time('fetch', time.perf_counter() - started)
+
+    async def http_session(self):
+        """Pooled aiohttp session for the running event loop, created on first use"""
+        loop = asyncio.get_running_loop()
+        if self.http is None or self.http.closed or self.http_loop is not loop:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=30)
+            # Per-request timeouts come from the transport (see get_async)
+            timeout = aiohttp.ClientTimeout(sock_connect=self.transport.connect_timeout,
+                                            sock_read=self.transport.read_timeout)
+            self.http = aiohttp.ClientSession(headers=self.http_headers(), connector=connector, timeout=timeout)
+            self.http_loop = loop
+        return self.http
+
+    async def close(self):
+        """Close the aiohttp session and its connections"""
+        if self.http is not None and not self.http.closed:
+            await self.http.close()
+        self.http = None
+        self.http_loop = None
+
+    async def scrape_inventory_async(self):
+        """Async counterpart of scrape_inventory - same results, concurrent page fan-out"""
+        logger.info("=" * 80)
+        logger.info("UNIVERSAL RED DEER TOYOTA USED INVENTORY SCRAPER (ASYNC)")
+        logger.info("=" * 80)
+        
+        self.begin_run()
+        loop = asyncio.get_running_loop()
+        if not isinstance(self.source, HtmlListingSource):
+            # JSON endpoints need no parsing - the source pages them concurrently itself
+            vehicles = await loop.run_in_executor(None, self.source.fetch_vehicles, self)
+            self.vehicles = self.dedupe_vehicles(vehicles)
+            self.save_caches()
+            if self.enricher:
+                await loop.run_in_executor(None, self.enricher.enrich, self, self.vehicles)
+            logger.info("FINAL RESULT: {} unique vehicles with accurate data".format(len(self.vehicles)))
+            return self.vehicles
+        
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        http = await self.http_session()
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                content, entry = await self.fetch_page_async(http, semaphore, self.target_url)
+                if content is None:
+                    logger.error("Cannot proceed without main page")
+                    return []
+                
+                soup, vehicles, pending = await loop.run_in_executor(
+                    pool, self.process_page, content, self.target_url, entry)
+                vehicles = list(vehicles)
+                seen = {self.target_url}
+                
+                while pending and len(seen) < self.max_pages:
+                    batch = [url for url in pending if url not in seen][:self.max_pages - len(seen)]
+                    seen.update(batch)
+                    fetched = await asyncio.gather(*(self.fetch_page_async(http, semaphore, url) for url in batch))
+                    results = await asyncio.gather(*(
+                        loop.run_in_executor(pool, self.process_page, body, url, entry)
+                        for url, (body, entry) in zip(batch, fetched) if body is not None
+                    ))
+                    
+                    pending = []
+                    for _, page_vehicles, page_urls in results:
+                        vehicles.extend(page_vehicles)
+                        pending.extend(url for url in page_urls if url not in seen and url not in pending)
+                
+                if not vehicles:
+                    logger.warning("No complete vehicles found with current selectors")
+                    vehicles = await loop.run_in_executor(pool, self.extract_vehicles_from_text, soup)
+        finally:
+            if not self.persistent_session:
+                await self.close()
+        self.shutdown_extraction_pool()
+        
+        self.vehicles = self.dedupe_vehicles(vehicles)
+        self.save_caches()
+        if self.enricher:
+            await loop.run_in_executor(None, self.enricher.enrich, self, self.vehicles)
+        logger.info("FINAL RESULT: {} unique vehicles with accurate data".format(len(self.vehicles)))
+        
+        return self.vehicles
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Scrape the Red Deer Toyota inventory and export it for the app')
+    parser.add_argument('--profile', action='store_true',
+                        help='sample the scrape per stage and write collapsed stacks, speedscope JSON and the '
+                             'top functions (single-dealer runs only)')
+    parser.add_argument('--profile-dir', help='where profile files go (default: <cache dir>/profile)')
+    parser.add_argument('--profile-top', type=int, default=25, help='hot functions listed per stage')
+    parser.add_argument('--profile-interval', type=float, default=0.002, help='seconds between stack samples')
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main execution - no fallback data"""
-    scraper = UniversalRedDeerToyotaScraper()
+    args = parse_args(argv)
+    # Pages and cards cached by previous runs are revalidated/reused instead of re-parsed
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.abspath(os.path.join(script_dir, '..', '..'))
+    cache_dir = os.environ.get('SCRAPER_CACHE_DIR', os.path.join(project_root, '.cache'))
+    # Dealer platforms that expose their inventory XHR endpoint can skip HTML entirely
+    inventory_api = os.environ.get('SCRAPER_INVENTORY_API')
+    source = JsonInventorySource(inventory_api) if inventory_api else None
+    # Deep inventories can spread card extraction over every CPU
+    parallel_extract = os.environ.get('SCRAPER_PARALLEL_EXTRACT', '').lower() in ('1', 'true', 'yes')
+    # SCRAPER_RECORD_DIR saves the run's pages and output as a new replayable corpus version;
+    # nothing may come from the page caches then, or it would be missing from the recording
+    record_dir = os.environ.get('SCRAPER_RECORD_DIR')
+    # Detail pages fill in the engine/trim/VIN cards leave out - within a page and time budget per run
+    enricher = None
+    if os.environ.get('SCRAPER_ENRICH_DETAILS', '').lower() in ('1', 'true', 'yes'):
+        from detail_enrichment import DetailEnricher
+        enricher = DetailEnricher(None if record_dir else os.path.join(cache_dir, 'details.json'),
+                                  max_pages=int(os.environ.get('SCRAPER_DETAIL_MAX_PAGES', '200')),
+                                  max_seconds=float(os.environ.get('SCRAPER_DETAIL_MAX_SECONDS', '120')))
+    # Transient 429/5xx and slow hosts are retried with backoff instead of failing the run;
+    # SCRAPER_RUN_BUDGET (seconds) bounds the whole run, detail pages included
+    transport_settings = {
+        'connect_timeout': float(os.environ.get('SCRAPER_CONNECT_TIMEOUT', '5')),
+        'read_timeout': float(os.environ.get('SCRAPER_READ_TIMEOUT', '20')),
+        'retries': int(os.environ.get('SCRAPER_MAX_RETRIES', '3')),
+        'run_budget': float(os.environ.get('SCRAPER_RUN_BUDGET', '0')) or None,
+    }
+    pool_size = int(os.environ.get('SCRAPER_POOL_SIZE', '10'))
+    # SCRAPER_METRICS_DIR gets a JSON run report and a Prometheus text file per run
+    metrics_dir = os.environ.get('SCRAPER_METRICS_DIR')
+    scraper = UniversalRedDeerToyotaScraper(cache_dir=cache_dir, source=source, parallel_extract=parallel_extract,
+                                            enricher=enricher,
+                                            transport=ResilientAdapter(pool_size=pool_size, **transport_settings),
+                                            metrics=ScrapeMetrics(enabled=bool(metrics_dir)))
+    corpus = None
+    if record_dir:
+        from page_corpus import PageCorpus
+        corpus = PageCorpus.new_version(record_dir)
+        corpus.record(scraper)
+    
+    # Every run is recorded in the inventory store; the React app's files are exported from it
+    from inventory_store import InventoryStore
+    from delta_export import DeltaExporter
+    from columnar_export import ColumnarExporter
+    store_path = os.environ.get('SCRAPER_INVENTORY_DB', os.path.join(cache_dir, 'inventory.sqlite'))
+    public_data_dir = os.path.join(project_root, 'public', 'data')
+    csv_path = os.path.join(public_data_dir, 'inventory.csv')
+    json_path = os.path.join(public_data_dir, 'inventory.json')
+    # Optional Parquet copy of the listed inventory for analytics (needs pyarrow)
+    parquet_path = os.environ.get('SCRAPER_PARQUET_PATH')
+    
+    # A JSON list of dealership configs scrapes them all at once into one merged store
+    dealers_path = os.environ.get('SCRAPER_DEALERS')
+    if dealers_path:
+        from dealer_batch import load_configs, scrape_many
+        batch = scrape_many(load_configs(dealers_path),
+                            store_path=os.environ.get('SCRAPER_DEALERS_DB', os.path.join(cache_dir, 'dealers.sqlite')),
+                            output_dir=os.path.join(public_data_dir, 'dealers'), cache_dir=cache_dir,
+                            transport_settings=transport_settings)
+        for dealer_id, result in batch['dealers'].items():
+            print("{:<24} {:>6} vehicles in {:>6.2f}s{}".format(
+                dealer_id, result['count'], result['seconds'], ' - ' + result['error'] if result['error'] else ''))
+        print("Batch: {} vehicles from {} dealers in {:.2f}s".format(
+            len(batch['vehicles']), len(batch['dealers']), batch['seconds']))
+        return 0 if batch['vehicles'] else 1
+    
+    # --profile samples the whole run - scrape and exports - attributing each sample to its stage
+    profiler = None
+    profile_run = ExitStack()
+    if args.profile:
+        from scrape_profiler import SamplingProfiler, profiling
+        profiler = SamplingProfiler(interval=args.profile_interval, top=args.profile_top)
+        profile_run.enter_context(profiling(scraper, profiler))
     
     try:
         # Run the precise scraper
         vehicles = scraper.scrape_inventory()
+        if corpus:
+            corpus.save()
+            corpus.save_golden(vehicles)
+            print("Recorded {} pages into {}".format(len(corpus.pages), corpus.path))
         
         # Display results
         scraper.print_results()
         
-        # Determine project root and public/data path so the React app can fetch the CSV
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        project_root = os.path.abspath(os.path.join(script_dir, '..', '..'))
-        public_data_dir = os.path.join(project_root, 'public', 'data')
-        os.makedirs(public_data_dir, exist_ok=True)
-        csv_path = os.path.join(public_data_dir, 'inventory.csv')
+        # A failed or empty run leaves the last good export in place - the UI keeps showing it
+        if not vehicles:
+            print("\nCSV Status: No vehicles found - keeping the last exported inventory")
+            return 1
         
-        # Only save CSV if we have real data
-        if vehicles:
-            csv_saved = scraper.save_to_csv(csv_path)
-            print("\nCSV Status: {}".format('Successfully created with accurate data' if csv_saved else 'Failed to create'))
+        # Store and exports make up the write stage
+        with scraper.metrics.stage('write'):
+            store = InventoryStore(store_path, CSV_FIELDNAMES)
+            try:
+                summary = store.record_run(vehicles, dedup_key=scraper.dedup_key)
+                print("\nInventory store: {count} listed, {added} added, {removed} removed, "
+                      "{price_changes} price changes ({path})".format(path=store_path, **summary))
             
-            if csv_saved and os.path.exists(csv_path):
-                with open(csv_path, 'r') as f:
-                    lines = f.readlines()
-                    print("{} contains {} lines (including header)".format(csv_path, len(lines)))
-        else:
-            print("\nCSV Status: No file created - no accurate vehicle data found")
-            # Remove any existing CSV file to avoid stale data
-            if os.path.exists(csv_path):
-                os.remove(csv_path)
-                print("Removed any existing CSV file to prevent stale data")
+                # changes.json + a content-hashed snapshot; nothing at all is written for an unchanged inventory
+                delta = DeltaExporter(public_data_dir, CSV_FIELDNAMES).export(
+                    vehicles, key=lambda vehicle: store.vehicle_key(vehicle, scraper.dedup_key))
+                if delta is None and os.path.exists(csv_path):
+                    print("CSV Status: Inventory unchanged since the last run - no files written")
+                    return 0
+                csv_count = store.export_csv(csv_path)
+                store.export_json(json_path)
+                # Typed, dictionary-encoded columns with .gz/.br siblings - what the React app loads
+                columnar = ColumnarExporter(public_data_dir, CSV_FIELDNAMES)
+                columnar.export(store.iter_listed())
+                if parquet_path:
+                    columnar.export_parquet(store.iter_listed(), parquet_path)
+            finally:
+                store.close()
+        print("CSV Status: {}".format('Exported {} vehicles to {}'.format(csv_count, csv_path)
+                                      if csv_count else 'Failed to create'))
         
-        return 0 if vehicles else 1
+        return 0 if csv_count else 1
         
     except Exception as e:
         logger.error("Scraper failed: {}".format(str(e)))
         print("Error: {}".format(str(e)))
-        
-        # Remove any existing CSV file on error (inside public/data)
-        try:
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            project_root = os.path.abspath(os.path.join(script_dir, '..', '..'))
-            csv_path = os.path.join(project_root, 'public', 'data', 'inventory.csv')
-            if os.path.exists(csv_path):
-                os.remove(csv_path)
-                print("Removed existing CSV file due to scraper error")
-        except Exception:
-            pass
-        
+        print("Keeping the last exported inventory")
         return 1
+    finally:
+        profile_run.close()
+        if profiler:
+            paths = profiler.write(args.profile_dir or os.path.join(cache_dir, 'profile'))
+            print("\n" + profiler.format_top())
+            print("Profile: {} (open in https://www.speedscope.app), {}".format(paths['speedscope'],
+                                                                            paths['collapsed']))
+        if metrics_dir:
+            scraper.metrics.finish()
+            scraper.metrics.write_report(os.path.join(metrics_dir, 'scrape_metrics.json'))
+            scraper.metrics.write_prometheus(os.path.join(metrics_dir, 'scrape_metrics.prom'))
 
 if __name__ == "__main__":
     exit_code = main()
@@ -0,0 +1,52 @@
+"""
+Shared setup for the scraper test suite
+The scraper modules live in src/script and are imported from there, as the benchmarks do;
+fixture sites and synthetic inventories come from scrape_fixtures
+"""
+
+import os
+import sys
+
+import pytest
+
+SCRIPT_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'script'))
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+
+@pytest.fixture
+def local_api():
+    """Factory for a freshly imported api/scrape.py whose scrapers crawl a local fixture site
+
+    local_api(site, page_count, use_async=False) returns the module with an empty in-memory result
+    cache; with use_async the async backend is used when aiohttp is installed.
+    """
+    from result_cache import ResultCache
+    from scrape_fixtures import load_api_module
+    from toyota_scrapper import UniversalRedDeerToyotaScraper, async_backend_available
+    loaded = []
+
+    def stub(scraper_class, site, page_count):
+        class StubSiteScraper(scraper_class):
+            def __init__(self, **kwargs):
+                kwargs['cache_dir'] = None
+                super().__init__(max_pages=page_count, requests_per_second=None, **kwargs)
+                self.target_url = site.url
+        return StubSiteScraper
+
+    def load(site, page_count, use_async=False):
+        api = load_api_module()
+        api._load_scraper()
+        api.UniversalRedDeerToyotaScraper = stub(UniversalRedDeerToyotaScraper, site, page_count)
+        if use_async and async_backend_available():
+            api.AsyncRedDeerToyotaScraper = stub(api.AsyncRedDeerToyotaScraper, site, page_count)
+        else:
+            api.AsyncRedDeerToyotaScraper = None
+        api._RESULT_CACHE = ResultCache()
+        loaded.append(api)
+        return api
+
+    yield load
+    for api in loaded:
+        if api._SCRAPER is not None and getattr(api._SCRAPER, 'http', None) is not None:
+            api._run_async(api._SCRAPER.close())
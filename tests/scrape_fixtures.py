@@ -0,0 +1,497 @@
+"""
+Fixture sites and synthetic inventories shared by the test suite and the benchmarks
+Local HTTP stand-ins for dealer sites and inventory APIs, synthetic cards, titles and vehicle
+records built from the scraper's own tables, and the original lookups kept as parity references
+"""
+
+import importlib.util
+import json
+import os
+import random
+import re
+import socket
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlencode, urlparse, parse_qs
+
+try:
+    import resource
+except ImportError:  # not on Windows - peak RSS is then not reported
+    resource = None
+
+from toyota_scrapper import (
+    UniversalRedDeerToyotaScraper, JsonInventorySource, CAR_MAKES, TRIM_NAMES, TRIM_PATTERNS,
+)
+
+
+CARD_TEMPLATES = [
+    "{year} {make} {model} {trim} {mileage} km Stock #{stock} {engine} Price: ${price:,}",
+    "Used {year} {make} {model} {trim} Was ${price:,} Now ${sale:,} Odometer: {mileage} Stock# {stock}",
+    "{make} {model} {year} | {engine} | {mileage} km | Internet Price ${sale:,} | VIN: {vin}",
+    "Certified {year} {make} {model} AWD {trim} Mileage: {mileage} MSRP ${price:,} #{stock}",
+    "{year} {make} {model} - {mileage} miles - Clearance ${sale:,} - Engine: {engine}",
+]
+
+ENGINES = ['2.5L 4Cyl', '3.5L V6', '2.0L Turbo', '5.0L V8', '1.8L Hybrid', '3.6 Liter', '6.2L Supercharged']
+
+
+def synthetic_card_texts(count, seed=1403):
+    """Generate realistic vehicle card texts from the scraper's own make/model/trim tables"""
+    rng = random.Random(seed)
+    makes = sorted(CAR_MAKES.items())
+    texts = []
+    for _ in range(count):
+        make, models = rng.choice(makes)
+        price = rng.randint(8000, 90000)
+        texts.append(rng.choice(CARD_TEMPLATES).format(
+            year=rng.randint(2005, 2025),
+            make=rng.choice([make, make.upper()]),
+            model=rng.choice(sorted(models)),
+            trim=rng.choice(TRIM_NAMES),
+            mileage="{:,}".format(rng.randint(5000, 250000)),
+            stock="T{}".format(rng.randint(10000, 99999)),
+            vin=''.join(rng.choice('ABCDEFGHJKLMNPRSTUVWXYZ0123456789') for _ in range(17)),
+            engine=rng.choice(ENGINES),
+            price=price,
+            sale=price - rng.randint(500, 5000),
+        ))
+    return texts
+
+
+def synthetic_cards_html(count, seed=1403, pager=''):
+    """Wrap synthetic card texts in inventory-style markup"""
+    cards = ['<div class="vehicle-card"><h3>{}</h3></div>'.format(text)
+             for text in synthetic_card_texts(count, seed)]
+    return '<html><head><title>Used Inventory</title></head><body>{}{}</body></html>'.format(''.join(cards), pager)
+
+
+def synthetic_listing_page(count, seed=1403):
+    """A full dealer-style SRP: site chrome, wrapped cards with specs and images, scripts and footer"""
+    rng = random.Random(seed)
+    nav = ''.join('<li class="menu-item"><a href="/section/{0}">Section {0}</a></li>'.format(i) for i in range(60))
+    cards = []
+    for index, text in enumerate(synthetic_card_texts(count, seed)):
+        specs = ''.join('<li class="spec"><span class="label">Spec {}</span><span class="value">{}</span></li>'.format(
+            i, rng.randint(1, 999)) for i in range(8))
+        cards.append(
+            '<div class="srp-row"><div class="vehicle-card" data-vin="VIN{0:05d}">'
+            '<img src="/photos/{0}.jpg" alt="photo"><div class="title"><h3>{1}</h3></div>'
+            '<ul class="specs">{2}</ul><a href="/vehicle/{0}">View details</a></div></div>'.format(index, text, specs))
+    scripts = ''.join('<script>window.analytics{} = {};</script>'.format(i, '{"k": "' + 'x' * 400 + '"}')
+                      for i in range(20))
+    footer = ''.join('<div class="footer-col"><p>Footer text {}</p></div>'.format(i) for i in range(200))
+    return ('<html><head><title>Used Inventory</title>{}</head><body><header><ul class="menu">{}</ul></header>'
+            '<main><div class="results">{}</div><nav class="pagination"><a href="?page=2">2</a></nav></main>'
+            '<footer>{}</footer></body></html>').format(scripts, nav, ''.join(cards), footer)
+
+
+def paginated_site_pages(page_count, cards_per_page=24):
+    """Listing pages keyed by page number, each with a first/last + windowed pager like a dealer SRP"""
+    pages = {}
+    for number in range(1, page_count + 1):
+        window = sorted({1, page_count} | set(range(max(1, number - 2), min(page_count, number + 2) + 1)))
+        links = ''.join('<a href="/inventory/used/?page={0}">{0}</a>'.format(n) for n in window)
+        if number < page_count:
+            links += '<a rel="next" href="/inventory/used/?page={}">Next</a>'.format(number + 1)
+        pager = '<nav class="pagination">{}</nav>'.format(links)
+        pages[number] = synthetic_cards_html(cards_per_page, seed=number, pager=pager).encode('utf-8')
+    return pages
+
+
+class LocalSite:
+    """Local HTTP stand-in for the dealer site serving fixture pages with simulated latency
+
+    pages maps page number -> body, or is a callable taking the parsed query string.
+    faults(path, hit) injects failures - hit counts that path's requests from 0 - and returns
+    None to serve the page, or {'delay': seconds, 'status': code, 'retry_after': value, 'drop': bool}.
+    """
+
+    def __init__(self, pages, latency=0.0, content_type='text/html; charset=utf-8', faults=None):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site.requests += 1
+                time.sleep(site.latency)
+                if site.faults and self.inject_fault():
+                    return
+                query = parse_qs(urlparse(self.path).query)
+                number = int(query.get('page', ['1'])[0])
+                body = site.pages(query) if callable(site.pages) else site.pages.get(number)
+                etag = '"{}-{}"'.format(number, len(body or b''))
+                if body and self.headers.get('If-None-Match') == etag:
+                    site.not_modified += 1
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                self.send_response(200 if body else 404)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Type', site.content_type)
+                self.send_header('Content-Length', str(len(body or b'')))
+                self.end_headers()
+                self.wfile.write(body or b'')
+
+            def inject_fault(self):
+                """Apply the fault for this request, if any - returns whether the response was handled"""
+                with site.lock:
+                    hit = site.hits.get(self.path, 0)
+                    site.hits[self.path] = hit + 1
+                    site.hit_times.setdefault(self.path, []).append(time.monotonic())
+                fault = site.faults(self.path, hit)
+                if not fault:
+                    return False
+                time.sleep(fault.get('delay', 0))
+                if fault.get('drop'):
+                    self.close_connection = True
+                    self.connection.shutdown(socket.SHUT_RDWR)
+                    return True
+                if not fault.get('status'):
+                    return False
+                self.send_response(fault['status'])
+                if fault.get('retry_after') is not None:
+                    self.send_header('Retry-After', str(fault['retry_after']))
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return True
+
+            def log_message(self, format, *args):
+                pass
+
+        self.pages = pages
+        self.latency = latency
+        self.content_type = content_type
+        self.faults = faults
+        self.requests = 0
+        self.not_modified = 0
+        self.hits = {}
+        self.hit_times = {}
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        if faults:
+            # Clients hanging up on a slow or failing response is the point - not worth a traceback
+            self.server.handle_error = lambda request, client_address: None
+        self.url = 'http://127.0.0.1:{}/inventory/used/'.format(self.server.server_address[1])
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def legacy_find_trim(text):
+    """The original per-call re.search loop over the trim table, kept as the parity reference"""
+    for trim_name, pattern in TRIM_PATTERNS.items():
+        if re.search(pattern, text, re.IGNORECASE):
+            return trim_name
+    return None
+
+
+def synthetic_trim_titles(count, seed=1403):
+    """Generate titles mixing several trims in varied case and spacing, partial trim words and punctuation"""
+    rng = random.Random(seed)
+    models = sorted({model for models in CAR_MAKES.values() for model in models})
+    trims = list(TRIM_NAMES)
+    noise = ['Used', 'AWD', '|', '-', '(', ')', 'Grand', 'Sport', 'M', 'Line', 'S', 'Trail', 'LEX', 'XLEs', '4x4']
+    titles = []
+    for _ in range(count):
+        words = [str(rng.randint(1995, 2025)), rng.choice(models)]
+        for _ in range(rng.randint(0, 4)):
+            word = rng.choice(trims) if rng.random() < 0.6 else rng.choice(noise)
+            if rng.random() < 0.3:
+                word = rng.choice([word.lower(), word.upper(), word.replace(' ', '  '), word.replace('-', ' ')])
+            words.append(word)
+        titles.append(rng.choice([' ', ' ', '-', '/']).join(words))
+    return titles
+
+
+def legacy_extract_make_and_model(car_makes, text):
+    """The original nested-regex make/model lookup, kept as the parity reference - models are
+    tried in sorted order, the matcher's deterministic tie-break"""
+    text = re.sub(r'\s+', ' ', text.strip())
+    for make, models in car_makes.items():
+        make_patterns = [
+            r'\b{}\b'.format(re.escape(make)),
+            r'\b{}\b'.format(re.escape(make.upper())),
+            r'\b{}\b'.format(re.escape(make.lower()))
+        ]
+        for make_pattern in make_patterns:
+            if re.search(make_pattern, text, re.IGNORECASE):
+                for model in sorted(models):
+                    model_patterns = [
+                        r'\b{}\b'.format(re.escape(model)),
+                        r'\b{}\b'.format(re.escape(model.replace("-", ""))),
+                        r'\b{}\b'.format(re.escape(model.replace(" ", "")))
+                    ]
+                    for model_pattern in model_patterns:
+                        if re.search(model_pattern, text, re.IGNORECASE):
+                            return make, model
+    generic_pattern = r'\b(20[0-2][0-9])\s+([A-Z][a-zA-Z-]+)\s+([A-Z][a-zA-Z0-9-]+)\b'
+    match = re.search(generic_pattern, text)
+    if match:
+        year, potential_make, potential_model = match.groups()
+        for make in car_makes.keys():
+            if make.lower() == potential_make.lower():
+                return make, potential_model
+    return None, None
+
+
+def synthetic_titles(count, seed=1403):
+    """Generate noisy vehicle titles: case changes, hyphen/space variants, several makes or none"""
+    rng = random.Random(seed)
+    makes = sorted(CAR_MAKES)
+    models = sorted({model for models in CAR_MAKES.values() for model in models})
+    noise = ['Used', 'Certified', 'AWD', 'Low km', '|', '-', 'Prime', 'Unknownmake', 'Xyz', 'Grand', '(', ')']
+    titles = []
+    for _ in range(count):
+        words = [str(rng.randint(1995, 2029))]
+        for _ in range(rng.randint(1, 6)):
+            kind = rng.random()
+            if kind < 0.3:
+                word = rng.choice(makes)
+            elif kind < 0.7:
+                word = rng.choice(models)
+                word = rng.choice([word, word.replace('-', ''), word.replace(' ', ''), word.replace('-', ' ')])
+            else:
+                word = rng.choice(noise)
+            words.append(rng.choice([word, word.upper(), word.lower(), word.title()]))
+        titles.append(rng.choice([' ', '  ', ' \n']).join(words) + rng.choice(['', '.', '!', 'x']))
+    return titles
+
+
+def synthetic_vehicle_records(count, seed=1403):
+    """Ground-truth vehicle dicts in the scraper's output schema"""
+    rng = random.Random(seed)
+    makes = sorted(CAR_MAKES.items())
+    records = []
+    for index in range(count):
+        make, models = rng.choice(makes)
+        price = rng.randint(8000, 90000)
+        trim = rng.choice(TRIM_NAMES)
+        records.append({
+            'makeName': make,
+            'year': str(rng.randint(2005, 2025)),
+            'model': rng.choice(sorted(models)),
+            'sub-model': trim,
+            'trim': trim,
+            'mileage': str(rng.randint(5000, 250000)),
+            'value': str(price),
+            'sale_value': str(price - rng.randint(500, 5000)) if rng.random() < 0.5 else '',
+            'stock_number': 'T{:05d}'.format(index),
+            'engine': rng.choice(ENGINES),
+            'vin': '2T3W1RFV{:09d}'.format(index),
+        })
+    return records
+
+
+def structured_listing_page(records, kind):
+    """A listing page with both HTML cards and the same inventory as JSON-LD or an embedded JS object"""
+    cards = []
+    for record in records:
+        cards.append('<div class="vehicle-card"><h3>{year} {makeName} {model} {trim} {mileage} km '
+                     'Stock #{stock_number} {engine} Price: ${value}</h3></div>'.format(**record))
+    if kind == 'json-ld':
+        items = []
+        for record in records:
+            offers = [{'@type': 'Offer', 'price': '{}.00'.format(record['value']), 'priceCurrency': 'CAD'}]
+            if record['sale_value']:
+                offers.append({'@type': 'Offer', 'price': int(record['sale_value']), 'priceCurrency': 'CAD'})
+            items.append({'@type': 'ListItem', 'item': {
+                '@type': 'Car',
+                'name': '{year} {makeName} {model} {trim}'.format(**record),
+                'brand': {'@type': 'Brand', 'name': record['makeName']},
+                'model': record['model'],
+                'vehicleModelDate': record['year'],
+                'vehicleConfiguration': record['trim'],
+                'mileageFromOdometer': {'@type': 'QuantitativeValue', 'value': int(record['mileage']),
+                                        'unitCode': 'KMT'},
+                'sku': record['stock_number'],
+                'vehicleIdentificationNumber': record['vin'],
+                'vehicleEngine': {'@type': 'EngineSpecification', 'name': record['engine']},
+                'offers': offers,
+            }})
+        script = '<script type="application/ld+json">{}</script>'.format(
+            json.dumps({'@context': 'https://schema.org', '@type': 'ItemList', 'itemListElement': items}))
+    else:
+        vehicles = [{
+            'make': record['makeName'].upper(),
+            'model': record['model'],
+            'year': int(record['year']),
+            'trim': record['trim'],
+            'odometer': '{:,} km'.format(int(record['mileage'])),
+            'msrp': int(record['value']),
+            'salePrice': int(record['sale_value']) if record['sale_value'] else None,
+            'stockNumber': record['stock_number'],
+            'vin': record['vin'],
+            'engine': record['engine'],
+        } for record in records]
+        script = '<script>window.dataLayer = [];\nwindow.__INVENTORY__ = {};\n</script>'.format(
+            json.dumps({'total': len(vehicles), 'vehicles': vehicles}))
+    pager = '<nav class="pagination"><a href="?page=2">2</a></nav>'
+    return ('<html><head><title>Used Inventory</title>{}</head><body>{}{}</body></html>'.format(
+        script, ''.join(cards), pager)).encode('utf-8')
+
+
+def inventory_api_pages(records, report_total=True, max_page_size=None):
+    """Paged JSON endpoint body for a query - shaped like a dealer platform's inventory XHR"""
+    def page(query):
+        number = int(query.get('page', ['1'])[0])
+        size = int(query.get('pageSize', ['20'])[0])
+        if max_page_size:
+            size = min(size, max_page_size)
+        items = [{
+            'vin': record['vin'],
+            'stockNumber': record['stock_number'],
+            'year': int(record['year']),
+            'make': record['makeName'],
+            'model': record['model'],
+            'trim': record['trim'],
+            'odometer': int(record['mileage']),
+            'msrp': int(record['value']),
+            'salePrice': int(record['sale_value']) if record['sale_value'] else None,
+            'engine': {'name': record['engine']},
+            'images': [{'url': '/photos/{}.jpg'.format(record['stock_number'])}],
+        } for record in records[(number - 1) * size:number * size]]
+        body = {'results': items, 'meta': {'page': number, 'pageSize': size}}
+        if report_total:
+            body['meta']['totalCount'] = len(records)
+        return json.dumps(body).encode('utf-8')
+    return page
+
+
+def load_api_module():
+    """Import api/scrape.py the way the serverless runtime does, from its own path"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api', 'scrape.py')
+    spec = importlib.util.spec_from_file_location('api_scrape', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def call_app(api, query=None, headers=None, method='GET'):
+    """One in-process request to the api/scrape.py WSGI app - a dict with statusCode, headers and body"""
+    environ = {'REQUEST_METHOD': method, 'QUERY_STRING': urlencode(query or {})}
+    for name, value in (headers or {}).items():
+        environ['HTTP_' + name.upper().replace('-', '_')] = value
+    response = {}
+
+    def start_response(status, response_headers):
+        response.update(statusCode=int(status.split()[0]), headers=dict(response_headers))
+    body = b''.join(api.app(environ, start_response)).decode('utf-8')
+    return dict(response, body=body)
+
+
+def detail_site_pages(records, cards_per_page=24, changed=None):
+    """Listing pages whose cards lack engine/trim/VIN and link to detail pages (?vdp=<stock>) that have them
+
+    Even-numbered detail pages carry JSON-LD (plus a similar vehicle), odd ones only text.
+    changed maps stock number -> card year overrides, to relist a vehicle under a new identity.
+    """
+    by_stock = {record['stock_number']: (index, record) for index, record in enumerate(records)}
+
+    def page(query):
+        if 'vdp' in query:
+            page.details.append(query['vdp'][0])
+            index, record = by_stock[query['vdp'][0]]
+            body = ('<main><h1>{year} {makeName} {model}</h1><ul><li>Trim: {trim}</li>'
+                    '<li>Engine: {engine}</li><li>VIN: {vin}</li></ul></main>').format(**record)
+            if index % 2 == 0:
+                other = records[(index + 1) % len(records)]
+                cars = [{'@type': 'Car', 'brand': {'@type': 'Brand', 'name': r['makeName']}, 'model': r['model'],
+                         'vehicleModelDate': r['year'], 'vehicleConfiguration': r['trim'], 'sku': r['stock_number'],
+                         'vehicleIdentificationNumber': r['vin'], 'vehicleEngine': r['engine']}
+                        for r in (other, record)]
+                body = '<script type="application/ld+json">{}</script><main><h1>{year} {makeName} {model}</h1>' \
+                       '</main>'.format(json.dumps(cars), **record)
+            return '<html><head><title>Vehicle</title></head><body>{}</body></html>'.format(body).encode('utf-8')
+        number = int(query.get('page', ['1'])[0])
+        chunk = records[(number - 1) * cards_per_page:number * cards_per_page]
+        if not chunk:
+            return None
+        cards = ''.join(
+            '<div class="vehicle-card"><a href="?vdp={stock_number}"><h3>{year} {makeName} {model} {mileage} km '
+            'Stock #{stock_number} Price: ${value}</h3></a></div>'.format(**dict(
+                record, year=(changed or {}).get(record['stock_number'], record['year'])))
+            for record in chunk)
+        pager = ''
+        if number * cards_per_page < len(records):
+            pager = '<nav class="pagination"><a rel="next" href="?page={}">Next</a></nav>'.format(number + 1)
+        return '<html><head><title>Used Inventory</title></head><body>{}{}</body></html>'.format(
+            cards, pager).encode('utf-8')
+    page.details = []
+    return page
+
+
+def late_selector_page(count, seed=1403, card_class='listing-item'):
+    """A listing page whose cards only match a late fallback selector - earlier selectors hit
+    compare widgets, photo tiles and promo boxes that never yield a complete vehicle"""
+    decoys = ''.join('<div data-vehicle-id="{0}"><button>Compare</button><span>Save vehicle {0}</span></div>'.format(i)
+                     for i in range(60))
+    decoys += ''.join('<div data-vin="tile{0}"><img src="/p/{0}.jpg" alt="Photo {0} of 34"><p>Shop with confidence - '
+                      'every vehicle inspected by our certified technicians since 2019</p></div>'.format(i)
+                      for i in range(60))
+    decoys += ''.join('<div class="vehicle-card promo"><p>Get pre-approved in minutes. Trade-in values updated '
+                      'for 2024 models. Offer {}</p></div>'.format(i) for i in range(30))
+    cards = ''.join('<div class="{}"><h3>{}</h3><a href="/vehicle/{}-{}">Details</a></div>'.format(
+        card_class, text, seed, index) for index, text in enumerate(synthetic_card_texts(count, seed)))
+    return ('<html><head><title>Used Inventory</title></head><body><aside>{}</aside><main>{}</main>'
+            '<nav class="pagination"><a href="?page=2">2</a></nav></body></html>').format(decoys, cards).encode('utf-8')
+
+
+def record_local_corpus(root, page_count=12):
+    """Record a crawl of a local paginated site into a new corpus version, with its golden output"""
+    from page_corpus import PageCorpus
+    with LocalSite(paginated_site_pages(page_count)) as site:
+        scraper = UniversalRedDeerToyotaScraper(max_pages=page_count, requests_per_second=None)
+        scraper.target_url = site.url
+        corpus = PageCorpus.new_version(root)
+        corpus.record(scraper)
+        vehicles = scraper.scrape_inventory()
+        corpus.save()
+        corpus.save_golden(vehicles)
+    return corpus
+
+
+def replay_run(corpus_path):
+    """Replay one corpus through scrape_inventory with no network - meant for a fresh process per
+    corpus so the peak RSS belongs to that replay alone"""
+    from page_corpus import PageCorpus, replay
+    from scrape_metrics import ScrapeMetrics
+    corpus = PageCorpus(corpus_path)
+    manifest = corpus.manifest
+    source = JsonInventorySource(manifest['inventory_api']) if manifest.get('inventory_api') else None
+    enricher = None
+    if manifest.get('detail_pages'):
+        from detail_enrichment import DetailEnricher
+        enricher = DetailEnricher(None)
+    scraper = UniversalRedDeerToyotaScraper(requests_per_second=None, source=source, enricher=enricher,
+                                            metrics=ScrapeMetrics())
+    adapter = replay(corpus, scraper)
+    started = time.perf_counter()
+    vehicles = scraper.scrape_inventory()
+    seconds = time.perf_counter() - started
+    scraper.metrics.finish()
+    report = scraper.metrics.report()
+    cards = report['counters'].get('cards_seen') or len(vehicles)
+    peak_rss_mb = None
+    if resource is not None:
+        # ru_maxrss is in KB on Linux and in bytes on macOS
+        peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == 'darwin'
+                                                                             else 1024)
+    return {
+        'seconds': seconds,
+        'pages': adapter.served,
+        'missing': adapter.missing,
+        'cards': cards,
+        'vehicles': [vehicle.to_dict() for vehicle in vehicles],
+        'cards_per_second': cards / seconds if seconds else 0.0,
+        'mb_per_second': report['counters'].get('bytes_downloaded', 0) / 1e6 / seconds if seconds else 0.0,
+        'us_per_card': seconds / cards * 1e6 if cards else None,
+        'stages': {name: stage for name, stage in report['stages'].items() if stage['calls']},
+        'peak_rss_mb': peak_rss_mb,
+    }
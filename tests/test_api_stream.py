@@ -0,0 +1,91 @@
+"""/api/scrape WSGI app - streamed NDJSON and server-sent events carry the buffered JSON's vehicles"""
+
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from scrape_fixtures import LocalSite, call_app, paginated_site_pages
+
+
+def parse_stream(mode, body):
+    """(vehicles, summary) from a streamed response body"""
+    vehicles, summary = [], None
+    if mode == 'ndjson':
+        records = [json.loads(line) for line in body.splitlines() if line]
+        events = [(record['type'], record['data']) for record in records]
+    else:
+        events = []
+        for block in body.split('\n\n'):
+            lines = dict(line.split(': ', 1) for line in block.splitlines() if ': ' in line)
+            if lines:
+                events.append((lines['event'], json.loads(lines['data'])))
+    for kind, data in events:
+        if kind == 'vehicle':
+            vehicles.append(data)
+        else:
+            summary = data
+    return vehicles, summary
+
+
+@pytest.mark.parametrize('mode', ['ndjson', 'sse'])
+def test_streamed_vehicles_match_buffered_json(local_api, mode):
+    with LocalSite(paginated_site_pages(4)) as site:
+        api = local_api(site, 4)
+        buffered = json.loads(call_app(api)['body'])
+        response = call_app(api, {'stream': mode, 'force': '1'})
+    vehicles, summary = parse_stream(mode, response['body'])
+    assert response['headers']['Content-Type'] == api.STREAM_CONTENT_TYPES[mode]
+    assert vehicles == buffered['vehicles'] and len(vehicles) == 4 * 24
+    assert summary['ok'] and summary['count'] == len(vehicles) and summary['cache'] == 'BYPASS'
+
+
+def test_first_record_streamed_before_the_scrape_ends(local_api):
+    with LocalSite(paginated_site_pages(16), latency=0.05) as site:
+        api = local_api(site, 16)
+        environ = {'REQUEST_METHOD': 'GET', 'QUERY_STRING': 'stream=ndjson'}
+        started = time.perf_counter()
+        chunks = api.app(environ, lambda status, headers: None)
+        first = next(iter(chunks))
+        first_seconds = time.perf_counter() - started
+        rest = list(chunks)
+        elapsed = time.perf_counter() - started
+    assert json.loads(first)['type'] == 'vehicle'
+    assert json.loads(rest[-1])['data']['count'] == 16 * 24
+    assert first_seconds < elapsed / 4, (first_seconds, elapsed)
+
+
+def test_accept_header_selects_the_stream(local_api):
+    with LocalSite(paginated_site_pages(2)) as site:
+        api = local_api(site, 2)
+        response = call_app(api, headers={'Accept': 'application/x-ndjson'})
+    vehicles, summary = parse_stream('ndjson', response['body'])
+    assert summary['count'] == len(vehicles) == 2 * 24
+
+
+def test_stream_replays_the_cached_result(local_api):
+    with LocalSite(paginated_site_pages(2)) as site:
+        api = local_api(site, 2)
+        buffered = json.loads(call_app(api)['body'])
+        requests_before = site.requests
+        vehicles, summary = parse_stream('ndjson', call_app(api, {'stream': 'ndjson'})['body'])
+    assert site.requests == requests_before
+    assert summary['cache'] == 'HIT' and vehicles == buffered['vehicles']
+
+
+def test_unsupported_method_refused(local_api):
+    with LocalSite(paginated_site_pages(1)) as site:
+        api = local_api(site, 1)
+        response = call_app(api, {'stream': 'ndjson'}, method='DELETE')
+    assert response['statusCode'] == 405
+
+
+def test_legacy_handler_serves_buffered_json(local_api):
+    with LocalSite(paginated_site_pages(1)) as site:
+        api = local_api(site, 1)
+        buffered = json.loads(call_app(api)['body'])
+        response = api.handler(SimpleNamespace(method='GET', query={}, headers={}))
+    assert response['statusCode'] == 200 and json.loads(response['body']) == buffered
+    # The runtime picks its entrypoint from the listed names - app must stay the only one
+    assert 'handler' not in dir(api)
@@ -0,0 +1,55 @@
+"""asyncio backend - same results as the threaded crawl"""
+
+import asyncio
+
+import pytest
+
+from scrape_fixtures import LocalSite, inventory_api_pages, paginated_site_pages, synthetic_vehicle_records
+from toyota_scrapper import JsonInventorySource, UniversalRedDeerToyotaScraper, async_backend_available
+
+pytestmark = pytest.mark.skipif(not async_backend_available(), reason='aiohttp is not installed')
+
+
+def async_scraper(**kwargs):
+    from toyota_scrapper import AsyncRedDeerToyotaScraper
+    return AsyncRedDeerToyotaScraper(requests_per_second=None, **kwargs)
+
+
+def test_async_crawl_matches_threaded_crawl():
+    with LocalSite(paginated_site_pages(6)) as site:
+        threaded = UniversalRedDeerToyotaScraper(max_pages=6, requests_per_second=None)
+        threaded.target_url = site.url
+        expected = [vehicle.to_dict() for vehicle in threaded.scrape_inventory()]
+        scraper = async_scraper(max_concurrency=4, max_pages=6)
+        scraper.target_url = site.url
+        vehicles = asyncio.run(scraper.scrape_inventory_async())
+    assert [vehicle.to_dict() for vehicle in vehicles] == expected
+    assert scraper.http is None
+
+
+def test_persistent_session_survives_the_run():
+    with LocalSite(paginated_site_pages(2)) as site:
+        scraper = async_scraper(max_pages=2, persistent_session=True)
+        scraper.target_url = site.url
+
+        async def run_twice():
+            first = await scraper.scrape_inventory_async()
+            http = scraper.http
+            second = await scraper.scrape_inventory_async()
+            reused = http is scraper.http and not http.closed
+            await scraper.close()
+            return first, second, reused
+        first, second, reused = asyncio.run(run_twice())
+    assert len(first) == len(second) == 2 * 24
+    assert reused
+
+
+def test_json_source_run_saves_caches(monkeypatch):
+    records = synthetic_vehicle_records(60)
+    saved = []
+    with LocalSite(inventory_api_pages(records), content_type='application/json') as site:
+        scraper = async_scraper(source=JsonInventorySource(site.url, page_size=20))
+        monkeypatch.setattr(scraper, 'save_caches', lambda: saved.append(True))
+        vehicles = asyncio.run(scraper.scrape_inventory_async())
+    assert [vehicle.to_dict() for vehicle in vehicles] == records
+    assert saved == [True]
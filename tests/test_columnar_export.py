@@ -0,0 +1,43 @@
+"""Columnar export - lossless against the CSV, byte-stable .gz sibling, nothing written for an empty inventory"""
+
+import csv
+import gzip
+import json
+import os
+
+from columnar_export import ColumnarExporter, COLUMNS_FILE, decode_columns
+from scrape_fixtures import synthetic_vehicle_records
+from toyota_scrapper import CSV_FIELDNAMES, UniversalRedDeerToyotaScraper, Vehicle
+
+
+def test_round_trip_matches_csv_rows(tmp_path):
+    vehicles = synthetic_vehicle_records(500)
+    scraper = UniversalRedDeerToyotaScraper(cache_dir=None)
+    scraper.vehicles = [Vehicle.from_dict(vehicle) for vehicle in vehicles]
+    csv_path = os.path.join(str(tmp_path), 'inventory.csv')
+    scraper.save_to_csv(csv_path)
+    ColumnarExporter(str(tmp_path), CSV_FIELDNAMES).export(vehicles)
+
+    with open(os.path.join(str(tmp_path), COLUMNS_FILE), 'r', encoding='utf-8') as f:
+        document = json.load(f)
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        assert decode_columns(document) == list(csv.DictReader(f))
+
+
+def test_gzip_sibling_is_byte_stable(tmp_path):
+    vehicles = synthetic_vehicle_records(100)
+    exporter = ColumnarExporter(str(tmp_path), CSV_FIELDNAMES)
+    path = os.path.join(str(tmp_path), COLUMNS_FILE)
+    exporter.export(vehicles)
+    with open(path + '.gz', 'rb') as f:
+        first = f.read()
+    exporter.export(vehicles)
+    with open(path + '.gz', 'rb') as f:
+        assert f.read() == first
+    with open(path, 'rb') as f:
+        assert gzip.decompress(first) == f.read()
+
+
+def test_empty_inventory_writes_nothing(tmp_path):
+    assert ColumnarExporter(str(tmp_path), CSV_FIELDNAMES).export([]) == {}
+    assert os.listdir(str(tmp_path)) == []
@@ -0,0 +1,105 @@
+"""Multi-dealer batch - same vehicles as scraping each dealer alone, tagged, merged store and per-dealer exports"""
+
+import contextlib
+import csv
+import os
+
+import pytest
+
+from dealer_batch import DealerConfig, dealer_scraper, host_limits, scrape_many
+from inventory_store import InventoryStore
+from scrape_fixtures import LocalSite, paginated_site_pages
+from toyota_scrapper import CSV_FIELDNAMES
+
+PAGES = {'north': 3, 'south': 2, 'west': 1}
+
+
+@pytest.fixture
+def sites():
+    """dealer_id -> LocalSite, the same fixture pages on every site so stock numbers collide across dealers"""
+    with contextlib.ExitStack() as stack:
+        yield {dealer_id: stack.enter_context(LocalSite(paginated_site_pages(pages)))
+               for dealer_id, pages in PAGES.items()}
+
+
+@pytest.fixture
+def configs(sites):
+    return [DealerConfig(dealer_id, site.url, requests_per_second=None, max_pages=PAGES[dealer_id])
+            for dealer_id, site in sites.items()]
+
+
+@pytest.fixture
+def alone(configs):
+    return {config.dealer_id: len(dealer_scraper(config).scrape_inventory()) for config in configs}
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def test_batch_finds_what_each_dealer_finds_alone(configs, alone, tmp_path):
+    batch = scrape_many(configs, store_path=os.path.join(str(tmp_path), 'dealers.sqlite'))
+    assert {dealer_id: result['count'] for dealer_id, result in batch['dealers'].items()} == alone
+    assert all(vehicle.dealer_id == dealer_id and vehicle.to_dict()['dealer_id'] == dealer_id
+               for dealer_id, result in batch['dealers'].items() for vehicle in result['vehicles'])
+    assert len(batch['vehicles']) == sum(alone.values())
+
+
+def test_merged_and_per_dealer_exports(configs, alone, tmp_path):
+    output_dir = os.path.join(str(tmp_path), 'dealers')
+    batch = scrape_many(configs, store_path=os.path.join(str(tmp_path), 'dealers.sqlite'), output_dir=output_dir)
+
+    merged = read_csv(os.path.join(output_dir, 'inventory.csv'))
+    assert len(merged) == len(batch['vehicles'])
+    assert [row['dealer_id'] for row in merged] == sorted(row['dealer_id'] for row in merged)
+    for dealer_id, count in alone.items():
+        rows = read_csv(os.path.join(output_dir, dealer_id, 'inventory.csv'))
+        assert len(rows) == count and list(rows[0]) == CSV_FIELDNAMES
+        assert [row['stock_number'] for row in rows] == [
+            vehicle.stock_number for vehicle in batch['dealers'][dealer_id]['vehicles']]
+
+
+def test_batch_runs_dealers_concurrently_within_their_rate_limits(tmp_path):
+    # 6 pages at 4 requests/s take at least 1.25s per dealer, whatever the concurrency
+    with LocalSite(paginated_site_pages(6), latency=0.05) as north, \
+            LocalSite(paginated_site_pages(6), latency=0.05) as south:
+        configs = [DealerConfig('north', north.url, requests_per_second=4.0, max_pages=6),
+                   DealerConfig('south', south.url, requests_per_second=4.0, max_pages=6)]
+        batch = scrape_many(configs, store_path=os.path.join(str(tmp_path), 'dealers.sqlite'))
+    assert all(batch['dealers'][dealer_id]['seconds'] >= 1.25 for dealer_id in ('north', 'south'))
+    # One dealer after the other would take at least 2.5s
+    assert batch['seconds'] < 2.0, batch['seconds']
+
+
+def test_dead_site_keeps_its_listings(sites, configs, alone, tmp_path):
+    store_path = os.path.join(str(tmp_path), 'dealers.sqlite')
+    scrape_many(configs, store_path=store_path)
+    sites['south'].__exit__()
+
+    again = scrape_many(configs, store_path=store_path)
+    assert again['dealers']['south']['count'] == 0 and again['dealers']['south']['error'] is None
+    assert again['dealers']['north']['count'] == alone['north']
+    store = InventoryStore(store_path, CSV_FIELDNAMES + ['dealer_id'])
+    try:
+        assert {dealer_id: len(list(store.iter_listed({'dealer_id': dealer_id}))) for dealer_id in alone} == alone
+    finally:
+        store.close()
+
+
+def test_config_validation():
+    with pytest.raises(ValueError):
+        DealerConfig('../north', 'http://north.example/used')
+    with pytest.raises(ValueError):
+        DealerConfig('north', 'ftp://north.example/used')
+    with pytest.raises(ValueError):
+        DealerConfig.from_dict({'dealer_id': 'north', 'url': 'http://north.example/used', 'rps': 1})
+    with pytest.raises(ValueError):
+        scrape_many([DealerConfig('north', 'http://a.example/'), DealerConfig('north', 'http://b.example/')])
+
+
+def test_host_limits_take_the_strictest_rate():
+    configs = [DealerConfig('a', 'http://shared.example/a', requests_per_second=4.0),
+               DealerConfig('b', 'http://shared.example/b', requests_per_second=1.0),
+               DealerConfig('c', 'http://other.example/', requests_per_second=None)]
+    assert host_limits(configs) == {'shared.example': 1.0, 'other.example': None}
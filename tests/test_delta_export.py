@@ -0,0 +1,103 @@
+"""Delta export - unchanged runs write nothing, diffs classify every change, deltas replay onto the snapshot"""
+
+import json
+import os
+import random
+
+import pytest
+
+from delta_export import DeltaExporter, CHANGES_FILE
+from scrape_fixtures import synthetic_vehicle_records
+from toyota_scrapper import CSV_FIELDNAMES
+
+COUNT = 1000
+
+
+def key(vehicle):
+    return vehicle['stock_number']
+
+
+def load(directory, name):
+    with open(os.path.join(directory, name), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def apply_deltas(snapshot, deltas):
+    """Python mirror of the React app's applyDeltas - replays feed deltas onto a snapshot"""
+    column = {field: position for position, field in enumerate(snapshot['fields'])}
+    rows = dict(zip(snapshot['keys'], snapshot['rows']))
+    for delta in deltas:
+        for key in delta['removed']:
+            rows.pop(key, None)
+        for change in delta['added'] + delta['updated']:
+            rows[change['key']] = change['row']
+        for change in delta['price_changed'] + delta['mileage_changed']:
+            if change['key'] in rows:
+                row = list(rows[change['key']])
+                for field, value in change.items():
+                    if field in column:
+                        row[column[field]] = value
+                rows[change['key']] = row
+    return rows
+
+
+def churn(inventory, fresh, rng):
+    """Sell 20, list the fresh ones, re-price 40, correct 10 odometers and fix 2 trims"""
+    rng.shuffle(inventory)
+    inventory = inventory[20:]
+    for vehicle in inventory[:40]:
+        vehicle['value'] = str(int(vehicle['value']) - 500)
+    for vehicle in inventory[40:50]:
+        vehicle['mileage'] = str(int(vehicle['mileage']) + 1200)
+    for vehicle in inventory[50:52]:
+        vehicle['engine'] = vehicle['engine'] + ' Hybrid'
+    return inventory + [dict(record) for record in fresh]
+
+
+@pytest.fixture
+def exported(tmp_path):
+    """Export directory after a first run and two churned runs - returns (directory, first snapshot, deltas)"""
+    directory = str(tmp_path)
+    rng = random.Random(1403)
+    records = synthetic_vehicle_records(COUNT + 50, seed=1403)
+    exporter = DeltaExporter(directory, CSV_FIELDNAMES)
+    inventory = [dict(record) for record in records[:COUNT]]
+    exporter.export(inventory, key)
+    base = load(directory, load(directory, CHANGES_FILE)['snapshot'])
+    deltas = []
+    for run in range(2):
+        inventory = churn(inventory, records[COUNT + run * 25:COUNT + (run + 1) * 25], rng)
+        deltas.append(exporter.export(inventory, key))
+    return directory, base, deltas
+
+
+def test_unchanged_run_writes_nothing(tmp_path):
+    directory = str(tmp_path)
+    inventory = synthetic_vehicle_records(200)
+    exporter = DeltaExporter(directory, CSV_FIELDNAMES)
+    assert exporter.export([dict(vehicle) for vehicle in inventory], key) is not None
+    before = {name: os.stat(os.path.join(directory, name)).st_mtime_ns for name in os.listdir(directory)}
+    assert exporter.export([dict(vehicle) for vehicle in reversed(inventory)], key) is None
+    assert {name: os.stat(os.path.join(directory, name)).st_mtime_ns for name in os.listdir(directory)} == before
+
+
+def test_diff_classifies_every_change(exported):
+    _, _, deltas = exported
+    for delta in deltas:
+        counts = {kind: len(delta[kind]) for kind in ('added', 'removed', 'price_changed', 'mileage_changed', 'updated')}
+        assert counts == {'added': 25, 'removed': 20, 'price_changed': 40, 'mileage_changed': 10, 'updated': 2}
+
+
+def test_one_content_hashed_snapshot_kept(exported):
+    directory, _, _ = exported
+    feed = load(directory, CHANGES_FILE)
+    assert [name for name in os.listdir(directory) if name.startswith('inventory-')] == [feed['snapshot']]
+    assert feed['version'] in feed['snapshot']
+    assert len(feed['deltas']) == 2
+
+
+def test_client_replay_matches_latest_snapshot(exported):
+    directory, base, _ = exported
+    feed = load(directory, CHANGES_FILE)
+    latest = load(directory, feed['snapshot'])
+    assert apply_deltas(base, feed['deltas']) == dict(zip(latest['keys'], latest['rows']))
@@ -0,0 +1,97 @@
+"""Detail-page enrichment - filled fields match the detail pages, cache by URL + content hash, page budget"""
+
+import os
+import time
+
+import pytest
+
+from detail_enrichment import DetailEnricher
+from scrape_fixtures import LocalSite, detail_site_pages, synthetic_vehicle_records
+from toyota_scrapper import UniversalRedDeerToyotaScraper
+
+COUNT = 30
+RECORDS = synthetic_vehicle_records(COUNT)
+
+
+@pytest.fixture
+def site():
+    with LocalSite(detail_site_pages(RECORDS)) as site:
+        yield site
+
+
+def run(site, enricher, listing=None):
+    """Scrape the listing and enrich it - returns (vehicles before enrichment as dicts, vehicles, stats)"""
+    if listing is not None:
+        listing.details = site.pages.details
+        site.pages = listing
+    scraper = UniversalRedDeerToyotaScraper(max_workers=4, max_pages=100, requests_per_second=None)
+    scraper.target_url = site.url
+    vehicles = scraper.scrape_inventory()
+    del site.pages.details[:]
+    before = {vehicle.stock_number: vehicle.to_dict() for vehicle in vehicles}
+    return before, vehicles, enricher.enrich(scraper, vehicles)
+
+
+@pytest.mark.parametrize('field', ['vin', 'trim', 'engine'])
+def test_fields_filled_from_detail_pages(site, tmp_path, field):
+    before, vehicles, stats = run(site, DetailEnricher(os.path.join(str(tmp_path), 'details.json')))
+    assert len(vehicles) == COUNT and stats['enriched'] == COUNT
+    truth = {record['stock_number']: record for record in RECORDS}
+    filled = [vehicle for vehicle in vehicles if getattr(vehicle, field) and not before[vehicle.stock_number][field]]
+    assert filled and all(getattr(vehicle, field) for vehicle in vehicles)
+    # Cards sometimes carry a guessed trim (the model SL reads as the SL trim) - those are left alone
+    assert [vehicle.stock_number for vehicle in filled
+            if getattr(vehicle, field) != truth[vehicle.stock_number][field]] == []
+
+
+def test_next_run_served_from_cache(site, tmp_path):
+    cache_path = os.path.join(str(tmp_path), 'details.json')
+    _, vehicles, _ = run(site, DetailEnricher(cache_path))
+    first = [vehicle.to_row() for vehicle in vehicles]
+
+    _, vehicles, stats = run(site, DetailEnricher(cache_path))
+    assert site.pages.details == [] and stats['cached'] == COUNT
+    assert [vehicle.to_row() for vehicle in vehicles] == first
+
+
+def test_relisted_vehicle_refetched(site, tmp_path):
+    cache_path = os.path.join(str(tmp_path), 'details.json')
+    run(site, DetailEnricher(cache_path))
+    relisted = RECORDS[3]['stock_number']
+    listing = detail_site_pages(RECORDS, changed={relisted: str(int(RECORDS[3]['year']) - 1)})
+
+    _, _, stats = run(site, DetailEnricher(cache_path), listing)
+    # Its detail page itself did not change - fetched again, but not re-parsed
+    assert site.pages.details == [relisted]
+    assert stats['unchanged'] == 1 and stats['cached'] == COUNT - 1
+
+
+def test_page_budget_defers_the_rest(site, tmp_path):
+    _, _, stats = run(site, DetailEnricher(os.path.join(str(tmp_path), 'details.json'), max_pages=10))
+    assert len(site.pages.details) == 10 and stats['deferred'] == COUNT - 10
+
+
+def test_detail_pages_fetched_concurrently(site, tmp_path):
+    scraper = UniversalRedDeerToyotaScraper(max_workers=4, max_pages=100, requests_per_second=None)
+    scraper.target_url = site.url
+    vehicles = scraper.scrape_inventory()
+    site.latency = 0.1
+    started = time.perf_counter()
+    stats = DetailEnricher(os.path.join(str(tmp_path), 'details.json')).enrich(scraper, vehicles)
+    elapsed = time.perf_counter() - started
+    assert stats['fetched'] == COUNT
+    # One detail page after another would take COUNT * latency
+    assert elapsed < COUNT * 0.1 / 2, elapsed
+
+
+def test_time_budget_ends_enrichment_on_time(site, tmp_path):
+    scraper = UniversalRedDeerToyotaScraper(max_workers=4, max_pages=100, requests_per_second=None)
+    scraper.target_url = site.url
+    vehicles = scraper.scrape_inventory()
+    site.latency = 0.3
+    started = time.perf_counter()
+    stats = DetailEnricher(os.path.join(str(tmp_path), 'details.json'), max_seconds=0.5).enrich(scraper, vehicles)
+    elapsed = time.perf_counter() - started
+    assert stats['fetched'] > 0 and stats['deferred'] > 0
+    # Pages already in flight at the deadline may still finish - nothing starts after it
+    assert elapsed < 0.5 + 0.3 + 0.3, elapsed
@@ -0,0 +1,40 @@
+"""Card extraction cache - unchanged cards reuse their previous extraction across runs"""
+
+import json
+import os
+
+from scrape_fixtures import paginated_site_pages
+from toyota_scrapper import UniversalRedDeerToyotaScraper
+
+URL = 'http://localhost/inventory/used/'
+
+
+def extract(cache_dir, content):
+    scraper = UniversalRedDeerToyotaScraper(cache_dir=cache_dir)
+    scraper.begin_run()
+    _, vehicles, _ = scraper.process_page(content, URL)
+    scraper.save_caches()
+    return [vehicle.to_dict() for vehicle in vehicles], scraper.extraction_cache
+
+
+def test_unchanged_cards_hit_the_cache(tmp_path):
+    content = paginated_site_pages(1)[1]
+    first, cache = extract(str(tmp_path), content)
+    assert cache.hits == 0 and cache.misses == len(first)
+    second, cache = extract(str(tmp_path), content)
+    assert second == first
+    assert cache.hits == len(first) and cache.misses == 0
+
+
+def test_entries_from_other_extraction_code_are_ignored(tmp_path):
+    content = paginated_site_pages(1)[1]
+    first, _ = extract(str(tmp_path), content)
+    path = os.path.join(str(tmp_path), 'extraction.json')
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    data['fingerprint'] = 'older-extractor'
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    second, cache = extract(str(tmp_path), content)
+    assert second == first
+    assert cache.hits == 0
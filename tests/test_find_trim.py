@@ -0,0 +1,23 @@
+"""Precompiled trim lookup parity with the original per-call re.search loop"""
+
+import pytest
+
+from scrape_fixtures import legacy_find_trim, synthetic_card_texts, synthetic_trim_titles
+from toyota_scrapper import find_trim
+
+
+def test_find_trim_agrees_with_legacy_search_loop():
+    for title in synthetic_card_texts(2000) + synthetic_trim_titles(3000):
+        assert find_trim(title) == legacy_find_trim(title), title
+
+
+# Priority order, not match length, decides - Touring still beats Grand Touring, as it always did
+@pytest.mark.parametrize('title, trim', [
+    ('2019 Toyota RAV4 LE AWD', 'LE'),
+    ('2022 Honda Pilot Grand Touring', 'Touring'),
+    ('2018 Lexus IS 350 f  sport', 'Sport'),
+    ('Toyota Tacoma TRD Off-Road', 'TRD'),
+    ('2017 Toyota Camry LEX', None),
+])
+def test_find_trim_examples(title, trim):
+    assert find_trim(title) == trim
@@ -0,0 +1,73 @@
+"""Conditional page fetches - 304s replay the cached page and its previous parse"""
+
+import asyncio
+import json
+import os
+
+import pytest
+
+from scrape_fixtures import LocalSite, paginated_site_pages
+from scrape_metrics import ScrapeMetrics
+from toyota_scrapper import UniversalRedDeerToyotaScraper, async_backend_available
+
+
+def crawl(site, cache_dir, use_async=False):
+    if use_async:
+        from toyota_scrapper import AsyncRedDeerToyotaScraper
+        scraper = AsyncRedDeerToyotaScraper(max_pages=4, requests_per_second=None, cache_dir=cache_dir,
+                                            metrics=ScrapeMetrics())
+    else:
+        scraper = UniversalRedDeerToyotaScraper(max_pages=4, requests_per_second=None, cache_dir=cache_dir,
+                                                metrics=ScrapeMetrics())
+    scraper.target_url = site.url
+    vehicles = asyncio.run(scraper.scrape_inventory_async()) if use_async else scraper.scrape_inventory()
+    return [vehicle.to_dict() for vehicle in vehicles], scraper.metrics.report()['counters']
+
+
+@pytest.mark.parametrize('use_async', [False, pytest.param(True, marks=pytest.mark.skipif(
+    not async_backend_available(), reason='aiohttp is not installed'))])
+def test_unchanged_pages_replay_from_the_cache(tmp_path, use_async):
+    with LocalSite(paginated_site_pages(4)) as site:
+        first, _ = crawl(site, str(tmp_path), use_async)
+        second, counters = crawl(site, str(tmp_path), use_async)
+    assert site.not_modified == 4
+    assert counters.get('pages_not_modified') == 4
+    assert not counters.get('pages_fetched')
+    assert second == first and len(first) == 4 * 24
+
+
+def test_missing_cached_body_is_fetched_again(tmp_path):
+    with LocalSite(paginated_site_pages(4)) as site:
+        first, _ = crawl(site, str(tmp_path))
+        http_dir = os.path.join(str(tmp_path), 'http')
+        for name in os.listdir(http_dir):
+            if name.endswith('.body'):
+                os.remove(os.path.join(http_dir, name))
+        second, counters = crawl(site, str(tmp_path))
+    assert counters.get('pages_fetched') == 4
+    assert second == first
+
+
+def test_changed_page_is_downloaded(tmp_path):
+    pages = paginated_site_pages(4)
+    with LocalSite(pages) as site:
+        crawl(site, str(tmp_path))
+        pages[2] = paginated_site_pages(4, cards_per_page=20)[2]
+        vehicles, counters = crawl(site, str(tmp_path))
+    assert counters.get('pages_fetched') == 1 and counters.get('pages_not_modified') == 3
+    assert len(vehicles) == 3 * 24 + 20
+
+
+def test_replayed_pages_keep_their_extracted_cards(tmp_path):
+    pages = paginated_site_pages(4)
+    with LocalSite(pages) as site:
+        crawl(site, str(tmp_path))
+        crawl(site, str(tmp_path))
+        with open(os.path.join(str(tmp_path), 'extraction.json'), encoding='utf-8') as f:
+            assert len(json.load(f)['entries']) == 4 * 24
+        # A page that changes after a replayed run still reuses its unchanged cards
+        pages[2] = pages[2].replace(b'</body>', b'<!-- updated --></body>')
+        scraper = UniversalRedDeerToyotaScraper(max_pages=4, requests_per_second=None, cache_dir=str(tmp_path))
+        scraper.target_url = site.url
+        scraper.scrape_inventory()
+    assert scraper.extraction_cache.hits == 24 and scraper.extraction_cache.misses == 0
@@ -0,0 +1,186 @@
+"""Resilient transport - backoff, Retry-After, timeouts and the per-host circuit breaker, sync and async"""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+import pytest
+import requests
+
+from http_transport import (
+    BudgetExhaustedError, CircuitBreaker, CircuitOpenError, ResilientAdapter, mount_transport, parse_retry_after,
+)
+from scrape_fixtures import LocalSite, paginated_site_pages
+from toyota_scrapper import UniversalRedDeerToyotaScraper, async_backend_available
+
+PAGE_COUNT = 4
+BACKENDS = [False, pytest.param(True, marks=pytest.mark.skipif(
+    not async_backend_available(), reason='aiohttp is not installed'))]
+
+
+def crawl(site, use_async, **settings):
+    settings.setdefault('backoff_base', 0.05)
+    if use_async:
+        from toyota_scrapper import AsyncRedDeerToyotaScraper
+        scraper = AsyncRedDeerToyotaScraper(max_concurrency=4, max_pages=PAGE_COUNT, requests_per_second=None,
+                                            transport=ResilientAdapter(**settings))
+    else:
+        scraper = UniversalRedDeerToyotaScraper(max_workers=4, max_pages=PAGE_COUNT, requests_per_second=None,
+                                                transport=ResilientAdapter(**settings))
+    scraper.target_url = site.url
+    vehicles = asyncio.run(scraper.scrape_inventory_async()) if use_async else scraper.scrape_inventory()
+    return [vehicle.to_dict() for vehicle in vehicles]
+
+
+def statuses(site, transport, count, use_async):
+    """Status codes of count GETs to the site, None for each one the open circuit refused"""
+    if use_async:
+        from toyota_scrapper import AsyncRedDeerToyotaScraper
+        scraper = AsyncRedDeerToyotaScraper(requests_per_second=None, transport=transport)
+
+        async def run():
+            http = await scraper.http_session()
+            codes = []
+            try:
+                for _ in range(count):
+                    try:
+                        codes.append((await scraper.get_async(http, site.url))[0])
+                    except CircuitOpenError:
+                        codes.append(None)
+            finally:
+                await scraper.close()
+            return codes
+        return asyncio.run(run())
+    session = requests.Session()
+    mount_transport(session, transport)
+    codes = []
+    for _ in range(count):
+        try:
+            codes.append(session.get(site.url).status_code)
+        except CircuitOpenError:
+            codes.append(None)
+    session.close()
+    return codes
+
+
+def transient(path, hit):
+    """Every page fails twice first - 503, 429 with Retry-After, 500 or a dropped connection"""
+    if hit >= 2:
+        return None
+    kind = sum(map(ord, path)) % 4
+    return [{'status': 503}, {'status': 429, 'retry_after': 1}, {'status': 500}, {'drop': True}][kind]
+
+
+@pytest.fixture(scope='module')
+def expected():
+    with LocalSite(paginated_site_pages(PAGE_COUNT)) as site:
+        return crawl(site, use_async=False)
+
+
+@pytest.mark.parametrize('use_async', BACKENDS)
+def test_transient_faults_are_retried(expected, use_async):
+    with LocalSite(paginated_site_pages(PAGE_COUNT), faults=transient) as site:
+        assert crawl(site, use_async) == expected
+    waits = [times[1] - times[0] for path, times in site.hit_times.items()
+             if transient(path, 0).get('retry_after') and len(times) > 1]
+    assert waits and min(waits) >= 0.95
+
+
+@pytest.mark.parametrize('use_async', BACKENDS)
+def test_without_retries_faults_lose_vehicles(expected, use_async):
+    with LocalSite(paginated_site_pages(PAGE_COUNT), faults=transient) as site:
+        assert len(crawl(site, use_async, retries=0)) < len(expected)
+
+
+@pytest.mark.parametrize('use_async', BACKENDS)
+def test_slow_response_cut_at_read_timeout(expected, use_async):
+    with LocalSite(paginated_site_pages(PAGE_COUNT),
+                   faults=lambda path, hit: {'delay': 3.0} if 'page=3' in path and hit == 0 else None) as site:
+        started = time.perf_counter()
+        assert crawl(site, use_async, read_timeout=0.5) == expected
+    assert time.perf_counter() - started < 2.5
+
+
+@pytest.mark.parametrize('use_async', BACKENDS)
+def test_run_budget_bounds_the_crawl(expected, use_async):
+    budget = 1.0
+    # Every response takes 0.6s - the first page arrives within the budget, the pages it links to cannot
+    with LocalSite(paginated_site_pages(PAGE_COUNT), faults=lambda path, hit: {'delay': 0.6}) as site:
+        started = time.perf_counter()
+        vehicles = crawl(site, use_async, run_budget=budget)
+        elapsed = time.perf_counter() - started
+    # The crawl ends on time with what was fetched before the budget ran out
+    assert elapsed < budget + 0.5, elapsed
+    assert 0 < len(vehicles) < len(expected)
+
+
+@pytest.mark.parametrize('use_async', BACKENDS)
+def test_dead_host_opens_and_recovers(use_async):
+    dead = {'down': True}
+    with LocalSite(paginated_site_pages(1), faults=lambda path, hit: {'status': 503} if dead['down'] else None) as site:
+        transport = ResilientAdapter(retries=1, backoff_base=0.01, failure_threshold=3, breaker_cooldown=0.5)
+        host = urlparse(site.url).netloc
+        # 3 failed requests of 2 attempts each open the circuit; the other 17 never reach the host
+        assert statuses(site, transport, 20, use_async).count(None) == 17
+        assert site.requests == 6 and transport.breaker.state(host) == 'open'
+        assert transport.stats['circuit_open'] == 17 and transport.stats['failures'] == 3
+
+        dead['down'] = False
+        time.sleep(0.6)
+        assert transport.breaker.state(host) == 'half-open'
+        assert statuses(site, transport, 1, use_async) == [200]
+        assert transport.breaker.state(host) == 'closed'
+
+
+def test_breaker_state_transitions():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=0.05)
+    assert breaker.state('a') == 'closed'
+    breaker.failure('a')
+    assert breaker.state('a') == 'closed' and breaker.allow('a')
+    breaker.failure('a')
+    assert breaker.state('a') == 'open' and not breaker.allow('a')
+    assert breaker.allow('b')
+
+    time.sleep(0.06)
+    assert breaker.state('a') == 'half-open'
+    # Only one trial goes out - a failed trial reopens the circuit at once
+    assert breaker.allow('a') and not breaker.allow('a')
+    breaker.failure('a')
+    assert breaker.state('a') == 'open'
+
+    time.sleep(0.06)
+    assert breaker.allow('a')
+    breaker.success('a')
+    assert breaker.state('a') == 'closed' and breaker.allow('a')
+
+
+def test_retry_policy():
+    adapter = ResilientAdapter(retries=2, backoff_base=0.01, backoff_max=1.0)
+    assert adapter.retry_delay('GET', 'http://a.example/', 0, 'HTTP 503') is not None
+    assert adapter.retry_delay('GET', 'http://a.example/', 2, 'HTTP 503') is None
+    assert adapter.retry_delay('POST', 'http://a.example/', 0, 'HTTP 503') is None
+    # A Retry-After past backoff_max is not waited for
+    response = requests.Response()
+    response.headers['Retry-After'] = '5'
+    assert adapter.retry_delay('GET', 'http://a.example/', 0, 'HTTP 429', response) is None
+    assert adapter.stats['retries'] == 1 and adapter.stats['failures'] == 3
+
+
+def test_timeouts_clamped_to_run_budget():
+    adapter = ResilientAdapter(connect_timeout=5.0, read_timeout=20.0, run_budget=2.0)
+    assert adapter.timeouts(None, None) == (5.0, 20.0)
+    assert adapter.timeouts(3.0, None) == (3.0, 3.0)
+    assert adapter.timeouts(None, 1.5) == (1.5, 1.5)
+    adapter.deadline = time.monotonic() - 1
+    with pytest.raises(BudgetExhaustedError):
+        adapter.admit('http://a.example/')
+    assert adapter.stats['budget_exhausted'] == 1
+
+
+def test_parse_retry_after():
+    now = datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+    assert parse_retry_after('120') == 120.0
+    assert parse_retry_after('Mon, 01 Jan 2024 12:00:30 GMT', now=now) == 30.0
+    assert parse_retry_after('Mon, 01 Jan 2024 11:00:00 GMT', now=now) == 0.0
+    assert parse_retry_after('soon') is None and parse_retry_after(None) is None
@@ -0,0 +1,61 @@
+"""Inventory store - run history, price drops, days on lot and the frontend CSV export"""
+
+import csv
+import os
+
+import pytest
+
+from inventory_store import InventoryStore
+from toyota_scrapper import CSV_FIELDNAMES, UniversalRedDeerToyotaScraper
+
+DAY = 24 * 3600
+START = 1700000000
+FIRST = [
+    {'makeName': 'Toyota', 'year': '2020', 'model': 'RAV4', 'value': '30000', 'stock_number': 'A1'},
+    {'makeName': 'Honda', 'year': '2018', 'model': 'Civic', 'value': '18000', 'stock_number': 'B2'},
+    {'makeName': 'Ford', 'year': '2015', 'model': 'F-150', 'value': '21000', 'stock_number': ''},
+]
+SECOND = [dict(FIRST[0], sale_value='28500'), FIRST[2],
+          {'makeName': 'Mazda', 'year': '2021', 'model': 'CX-5', 'value': '27000', 'stock_number': 'C3'}]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = InventoryStore(os.path.join(str(tmp_path), 'inventory.sqlite'), CSV_FIELDNAMES)
+    dedup_key = UniversalRedDeerToyotaScraper(cache_dir=None).dedup_key
+    store.record_run(FIRST, dedup_key=dedup_key, now=START)
+    store.summary = store.record_run(SECOND, dedup_key=dedup_key, now=START + 3 * DAY)
+    yield store
+    store.close()
+
+
+def test_run_summary(store):
+    assert store.summary == {'count': 3, 'added': 1, 'removed': 1, 'price_changes': 1}
+
+
+def test_price_drops(store):
+    drops = store.price_drops(now=START + 3 * DAY)
+    assert [(v['stock_number'], v['previous_price'], v['price']) for v in drops] == [('A1', 30000, 28500)]
+
+
+def test_days_on_lot(store):
+    lot = {row['makeName']: row['average_days'] for row in store.days_on_lot_by_make()}
+    assert lot == {'Toyota': 3.0, 'Ford': 3.0, 'Mazda': 0.0}
+    sold = {row['makeName']: row['average_days'] for row in store.days_on_lot_by_make(active=False)}
+    assert sold == {'Honda': 0.0}
+
+
+def test_csv_export_lists_vehicles_in_run_order(store, tmp_path):
+    path = os.path.join(str(tmp_path), 'inventory.csv')
+    store.export_csv(path)
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert [row['model'] for row in rows] == ['RAV4', 'F-150', 'CX-5']
+    assert rows[0]['sale_value'] == '28500' and list(rows[0]) == CSV_FIELDNAMES
+
+
+def test_price_drop_query_uses_indexes(store):
+    plans = ' '.join(row[-1] for row in store.db.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM price_history h JOIN vehicles v ON v.vehicle_key = h.vehicle_key "
+        "WHERE h.observed_at >= ? AND v.active = 1", (START,)))
+    assert 'SCAN' not in plans, plans
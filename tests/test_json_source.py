@@ -0,0 +1,40 @@
+"""Paged JSON inventory endpoint - every record mapped exactly, however the endpoint pages"""
+
+import time
+
+import pytest
+
+from scrape_fixtures import LocalSite, inventory_api_pages, synthetic_vehicle_records
+from toyota_scrapper import JsonInventorySource, UniversalRedDeerToyotaScraper
+
+
+@pytest.mark.parametrize('report_total, max_page_size', [(True, None), (False, None), (True, 20)],
+                         ids=['total reported', 'no total', 'server caps page size'])
+def test_every_record_mapped(report_total, max_page_size):
+    records = synthetic_vehicle_records(230)
+    with LocalSite(inventory_api_pages(records, report_total, max_page_size), content_type='application/json') as site:
+        scraper = UniversalRedDeerToyotaScraper(max_workers=4, max_pages=100, requests_per_second=None,
+                                                source=JsonInventorySource(site.url, page_size=40))
+        vehicles = scraper.scrape_inventory()
+    assert [vehicle.to_dict() for vehicle in vehicles] == records
+
+
+@pytest.mark.parametrize('report_total', [True, False], ids=['total reported', 'no total'])
+def test_pages_are_fetched_concurrently(report_total):
+    records, latency = synthetic_vehicle_records(400), 0.1
+    with LocalSite(inventory_api_pages(records, report_total), latency=latency,
+                   content_type='application/json') as site:
+        scraper = UniversalRedDeerToyotaScraper(max_workers=8, max_pages=100, requests_per_second=None,
+                                                source=JsonInventorySource(site.url, page_size=40))
+        started = time.perf_counter()
+        vehicles = scraper.scrape_inventory()
+        elapsed = time.perf_counter() - started
+    assert len(vehicles) == len(records)
+    # One request after another would take site.requests * latency
+    assert elapsed < site.requests * latency / 2, (elapsed, site.requests)
+
+
+def test_records_located_without_a_records_key():
+    source = JsonInventorySource('http://localhost/api')
+    data = {'meta': {'totalCount': 1}, 'data': {'inventory': [{'make': 'Toyota', 'model': 'RAV4', 'year': 2020}]}}
+    assert len(source.records(data)) == 1
@@ -0,0 +1,16 @@
+"""Make/model matcher parity with the original regex loops"""
+
+from scrape_fixtures import legacy_extract_make_and_model, synthetic_titles
+from toyota_scrapper import UniversalRedDeerToyotaScraper
+
+
+def test_matcher_agrees_with_legacy_regex_loops():
+    scraper = UniversalRedDeerToyotaScraper()
+    for title in synthetic_titles(3000):
+        assert scraper.extract_make_and_model(title) == legacy_extract_make_and_model(scraper.car_makes, title), title
+
+
+def test_matcher_examples():
+    scraper = UniversalRedDeerToyotaScraper()
+    assert scraper.extract_make_and_model('2019 Toyota RAV4 LE AWD') == ('Toyota', 'RAV4')
+    assert scraper.extract_make_and_model('Nothing to see here') == (None, None)
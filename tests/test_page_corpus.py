@@ -0,0 +1,93 @@
+"""Recorded page corpus - offline replay reproduces the golden output, recording sees every page"""
+
+import os
+
+import pytest
+
+from page_corpus import PageCorpus, diff_vehicles, replay
+from scrape_fixtures import LocalSite, paginated_site_pages, record_local_corpus, replay_run
+from toyota_scrapper import UniversalRedDeerToyotaScraper, Vehicle, async_backend_available
+
+PAGE_COUNT = 4
+
+
+def golden_diff(corpus, vehicles):
+    return diff_vehicles(corpus.golden(), vehicles, key=lambda vehicle: Vehicle.from_dict(vehicle).dedup_key())
+
+
+@pytest.fixture(scope='module')
+def corpus(tmp_path_factory):
+    """A corpus recorded from a local site that is gone by the time it is replayed"""
+    return record_local_corpus(str(tmp_path_factory.mktemp('corpus')), page_count=PAGE_COUNT)
+
+
+def test_replay_reproduces_the_golden_output(corpus):
+    result = replay_run(corpus.path)
+    assert result['missing'] == [] and result['pages'] == len(corpus.pages)
+    diff = golden_diff(corpus, result['vehicles'])
+    assert diff['accuracy'] == 1.0 and diff['expected'] == PAGE_COUNT * 24
+
+
+def test_unrecorded_pages_are_not_found(corpus):
+    scraper = UniversalRedDeerToyotaScraper(requests_per_second=None, cache_dir=None)
+    adapter = replay(corpus, scraper)
+    url = corpus.manifest['target_url'] + '?page=99'
+    assert scraper.session.get(url).status_code == 404
+    assert adapter.missing == [url] and adapter.served == 0
+
+
+def test_recording_switches_the_page_cache_off(tmp_path):
+    root = str(tmp_path)
+    cache_dir = os.path.join(root, 'cache')
+    with LocalSite(paginated_site_pages(2)) as site:
+        warm = UniversalRedDeerToyotaScraper(max_pages=2, requests_per_second=None, cache_dir=cache_dir)
+        warm.target_url = site.url
+        warm.scrape_inventory()
+
+        scraper = UniversalRedDeerToyotaScraper(max_pages=2, requests_per_second=None, cache_dir=cache_dir)
+        scraper.target_url = site.url
+        corpus = PageCorpus.new_version(os.path.join(root, 'corpus'))
+        corpus.record(scraper)
+        scraper.scrape_inventory()
+    assert scraper.http_cache is None and site.not_modified == 0
+    assert len(corpus.pages) == 2
+
+
+@pytest.mark.skipif(not async_backend_available(), reason='aiohttp is not installed')
+def test_async_scraper_cannot_be_recorded(tmp_path):
+    from toyota_scrapper import AsyncRedDeerToyotaScraper
+    with pytest.raises(ValueError):
+        PageCorpus(str(tmp_path)).record(AsyncRedDeerToyotaScraper(cache_dir=None))
+
+
+def test_versions_kept_side_by_side(tmp_path):
+    root = str(tmp_path)
+    for version in ('20240102_000000', '20240101_000000'):
+        corpus = PageCorpus.new_version(root, version)
+        corpus.add('https://dealer.example/used', 200, {'Content-Type': 'text/html'}, b'<html></html>')
+        corpus.save()
+    assert PageCorpus.versions(root) == ['20240101_000000', '20240102_000000']
+    assert PageCorpus.latest(root).path == os.path.join(root, '20240102_000000')
+    with pytest.raises(FileExistsError):
+        PageCorpus.new_version(root, '20240101_000000')
+
+
+def test_diff_vehicles_counts_mismatches():
+    expected = [{'stock_number': 'A1', 'value': '30000'}, {'stock_number': 'B2', 'value': '18000'}]
+    actual = [{'stock_number': 'A1', 'value': '28500'}, {'stock_number': 'C3', 'value': '27000'}]
+    diff = diff_vehicles(expected, actual, key=lambda vehicle: vehicle['stock_number'])
+    assert (diff['matched'], diff['missing'], diff['extra'], diff['exact']) == (1, 1, 1, 0)
+    assert diff['field_mismatches'] == {'value': 1} and diff['accuracy'] == 0.0
+
+
+RECORD_DIR = os.environ.get('SCRAPER_RECORD_DIR')
+
+
+@pytest.mark.skipif(not RECORD_DIR, reason='SCRAPER_RECORD_DIR names no recorded corpora')
+@pytest.mark.parametrize('version', PageCorpus.versions(RECORD_DIR) if RECORD_DIR else [])
+def test_recorded_corpus_matches_its_golden_output(version):
+    corpus = PageCorpus(os.path.join(RECORD_DIR, version))
+    if corpus.golden() is None:
+        pytest.skip('corpus has no golden output')
+    diff = golden_diff(corpus, replay_run(corpus.path)['vehicles'])
+    assert diff['accuracy'] == 1.0, diff
@@ -0,0 +1,72 @@
+"""Concurrent pagination crawl and process-pool card extraction"""
+
+import asyncio
+import time
+
+import pytest
+from bs4 import BeautifulSoup
+
+from scrape_metrics import ScrapeMetrics
+from scrape_fixtures import LocalSite, paginated_site_pages, synthetic_cards_html
+from toyota_scrapper import PROCESS_EXTRACTION_MIN_CARDS, UniversalRedDeerToyotaScraper, async_backend_available
+
+
+def test_crawl_follows_every_page_once():
+    with LocalSite(paginated_site_pages(6)) as site:
+        scraper = UniversalRedDeerToyotaScraper(max_workers=4, max_pages=6, requests_per_second=None)
+        scraper.target_url = site.url
+        vehicles = scraper.scrape_inventory()
+    assert site.requests == 6
+    assert len(vehicles) == 6 * 24
+
+
+def test_crawl_stops_at_max_pages():
+    with LocalSite(paginated_site_pages(6)) as site:
+        scraper = UniversalRedDeerToyotaScraper(max_workers=4, max_pages=3, requests_per_second=None)
+        scraper.target_url = site.url
+        vehicles = scraper.scrape_inventory()
+    assert site.requests == 3
+    assert len(vehicles) == 3 * 24
+
+
+@pytest.mark.parametrize('use_async', [False, pytest.param(True, marks=pytest.mark.skipif(
+    not async_backend_available(), reason='aiohttp is not installed'))])
+def test_pages_are_fetched_concurrently(use_async):
+    page_count, latency = 8, 0.2
+    with LocalSite(paginated_site_pages(page_count), latency=latency) as site:
+        if use_async:
+            from toyota_scrapper import AsyncRedDeerToyotaScraper
+            scraper = AsyncRedDeerToyotaScraper(max_concurrency=8, max_pages=page_count, requests_per_second=None,
+                                                cache_dir=None)
+        else:
+            scraper = UniversalRedDeerToyotaScraper(max_workers=8, max_pages=page_count, requests_per_second=None,
+                                                    cache_dir=None)
+        scraper.target_url = site.url
+        started = time.perf_counter()
+        vehicles = asyncio.run(scraper.scrape_inventory_async()) if use_async else scraper.scrape_inventory()
+        elapsed = time.perf_counter() - started
+    assert len(vehicles) == page_count * 24
+    # One page after another would take page_count * latency
+    assert elapsed < page_count * latency / 2, elapsed
+
+
+def test_process_pool_extraction_matches_serial():
+    elements = BeautifulSoup(synthetic_cards_html(PROCESS_EXTRACTION_MIN_CARDS * 2), 'html.parser').select(
+        '.vehicle-card')
+    expected = [UniversalRedDeerToyotaScraper().extract_vehicle(element) for element in elements]
+    scraper = UniversalRedDeerToyotaScraper(parallel_extract=True, extract_workers=2)
+    try:
+        assert scraper.extract_vehicles(elements) == expected
+    finally:
+        scraper.shutdown_extraction_pool()
+
+
+def test_process_pool_reports_per_card_timings():
+    elements = BeautifulSoup(synthetic_cards_html(PROCESS_EXTRACTION_MIN_CARDS * 2), 'html.parser').select(
+        '.vehicle-card')
+    scraper = UniversalRedDeerToyotaScraper(parallel_extract=True, extract_workers=2, metrics=ScrapeMetrics())
+    try:
+        scraper.extract_vehicles(elements)
+    finally:
+        scraper.shutdown_extraction_pool()
+    assert scraper.metrics.report()['histograms']['card_extract_seconds']['count'] == len(elements)
@@ -0,0 +1,26 @@
+"""Listing page parsing - the restricting strainer and single-pass selection find the same cards"""
+
+import pytest
+from bs4 import BeautifulSoup
+
+from scrape_fixtures import synthetic_listing_page
+from toyota_scrapper import FALLBACK_SELECTORS, HTML_PARSER, PRIORITY_SELECTORS, ListingStrainer, select_all
+
+SELECTORS = PRIORITY_SELECTORS + FALLBACK_SELECTORS
+
+
+def selected(soup, single_pass):
+    if single_pass:
+        found = select_all(soup, SELECTORS)
+    else:
+        found = {selector: soup.select(selector) for selector in SELECTORS}
+    return {selector: [str(element) for element in elements] for selector, elements in found.items()}
+
+
+@pytest.mark.parametrize('parser', sorted({'html.parser', HTML_PARSER}))
+@pytest.mark.parametrize('selective', [False, True])
+def test_single_pass_selection_matches_per_selector_select(parser, selective):
+    html = synthetic_listing_page(120)
+    reference = selected(BeautifulSoup(html, 'html.parser'), single_pass=False)
+    soup = BeautifulSoup(html, parser, parse_only=ListingStrainer(SELECTORS) if selective else None)
+    assert selected(soup, single_pass=True) == reference
@@ -0,0 +1,193 @@
+"""Endpoint result cache - TTL, ETag/304, stale-while-revalidate and single-flight scrapes"""
+
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from result_cache import ResultCache
+from scrape_fixtures import LocalSite, call_app, paginated_site_pages
+
+CALLERS = 6
+
+
+def concurrently(fn, callers=CALLERS):
+    barrier = threading.Barrier(callers)
+    results = [None] * callers
+
+    def call(index):
+        barrier.wait()
+        results[index] = fn()
+    threads = [threading.Thread(target=call, args=(index,)) for index in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def slow_compute(calls, body='{"ok": true}', seconds=0.2):
+    def compute():
+        calls.append(True)
+        time.sleep(seconds)
+        return body, True
+    return compute
+
+
+def test_concurrent_callers_share_one_compute():
+    cache, calls = ResultCache(), []
+    results = concurrently(lambda: cache.get('key', slow_compute(calls)))
+    assert len(calls) == 1
+    assert sorted(state for _, state in results) == ['COALESCED'] * (CALLERS - 1) + ['MISS']
+    assert len({entry['etag'] for entry, _ in results}) == 1
+
+
+def test_fresh_entry_is_a_hit():
+    cache, calls = ResultCache(ttl=60), []
+    cache.get('key', slow_compute(calls, seconds=0))
+    entry, state = cache.get('key', slow_compute(calls, seconds=0))
+    assert state == 'HIT' and len(calls) == 1
+
+
+def test_stale_entry_served_while_one_refresh_runs():
+    cache, calls = ResultCache(ttl=0.05, stale_ttl=60), []
+    first, _ = cache.get('key', slow_compute(calls, body='{"v": 1}', seconds=0))
+    time.sleep(0.1)
+    results = concurrently(lambda: cache.get('key', slow_compute(calls, body='{"v": 2}')))
+    assert all(state == 'STALE' and entry['body'] == first['body'] for entry, state in results)
+    flight = cache.flights.get('key')
+    if flight is not None:
+        flight.event.wait(5)
+    assert len(calls) == 2
+    assert cache.lookup('key')['body'] == '{"v": 2}'
+
+
+def test_refresh_finishing_within_the_wait_is_served():
+    cache, calls = ResultCache(ttl=0.05, stale_ttl=60, refresh_wait=5), []
+    cache.get('key', slow_compute(calls, body='{"v": 1}', seconds=0))
+    time.sleep(0.1)
+    entry, state = cache.get('key', slow_compute(calls, body='{"v": 2}', seconds=0.05))
+    assert state == 'REVALIDATED' and entry['body'] == '{"v": 2}'
+
+
+def test_entry_past_the_stale_window_is_recomputed():
+    cache, calls = ResultCache(ttl=0.01, stale_ttl=0.01), []
+    cache.get('key', slow_compute(calls, seconds=0))
+    time.sleep(0.05)
+    _, state = cache.get('key', slow_compute(calls, seconds=0))
+    assert state == 'MISS' and len(calls) == 2
+
+
+def test_force_bypasses_and_joins_flights():
+    cache, calls = ResultCache(ttl=60), []
+    cache.get('key', slow_compute(calls, seconds=0))
+    _, state = cache.get('key', slow_compute(calls, seconds=0), force=True)
+    assert state == 'BYPASS' and len(calls) == 2
+    results = concurrently(lambda: cache.get('key', slow_compute(calls), force=True))
+    assert sorted(state for _, state in results) == ['BYPASS'] + ['COALESCED'] * (CALLERS - 1)
+    assert len(calls) == 3
+
+
+def test_empty_results_are_not_cached():
+    cache = ResultCache(ttl=60)
+    cache.get('key', lambda: ('{"ok": true, "count": 0}', False))
+    assert cache.lookup('key') is None
+
+
+def test_waiters_give_up_on_a_hung_compute():
+    cache, release = ResultCache(wait_timeout=0.1), threading.Event()
+    leader = threading.Thread(target=cache.get, args=('key', lambda: (release.wait(5), ('{}', True))[1]))
+    leader.start()
+    while 'key' not in cache.flights:
+        time.sleep(0.01)
+    started = time.time()
+    with pytest.raises(TimeoutError):
+        cache.get('key', slow_compute([]))
+    release.set()
+    leader.join()
+    assert time.time() - started < 1
+
+
+def test_errors_reach_every_waiter():
+    cache = ResultCache()
+
+    def failing():
+        time.sleep(0.1)
+        raise RuntimeError('site down')
+
+    def call():
+        try:
+            cache.get('key', failing)
+        except RuntimeError as e:
+            return str(e)
+    assert concurrently(call) == ['site down'] * CALLERS
+    assert not cache.flights
+
+
+@pytest.mark.parametrize('name', ['results.json', 'results.sqlite'])
+def test_persisted_store_survives_a_new_process(tmp_path, name):
+    path = os.path.join(str(tmp_path), name)
+    entry, _ = ResultCache(path=path).get('inventory', lambda: ('{"ok": true}', True))
+    reloaded = ResultCache(path=path).lookup('inventory')
+    assert reloaded is not None and reloaded['etag'] == entry['etag'] and reloaded['body'] == entry['body']
+
+
+def test_endpoint_scrapes_once_for_concurrent_cold_requests(local_api):
+    with LocalSite(paginated_site_pages(4), latency=0.02) as site:
+        api = local_api(site, 4)
+        results = concurrently(lambda: call_app(api))
+        assert site.requests == 4
+        assert len({result['body'] for result in results}) == 1 and results[0]['statusCode'] == 200
+
+        hit = call_app(api)
+        assert hit['headers']['X-Cache'] == 'HIT' and site.requests == 4
+        revalidated = call_app(api, headers={'If-None-Match': hit['headers']['ETag']})
+        assert revalidated['statusCode'] == 304 and not revalidated['body']
+        assert 'stale-while-revalidate' in revalidated['headers']['Cache-Control']
+
+        forced = call_app(api, {'force': '1'})
+        assert forced['headers']['X-Cache'] == 'BYPASS' and site.requests == 8
+
+
+def test_uncached_results_are_not_stored_downstream(local_api):
+    with LocalSite(paginated_site_pages(1)) as site:
+        api = local_api(site, 1)
+        api._scrape_result = lambda: (json.dumps({'ok': True, 'count': 0, 'vehicles': []}), False)
+        response = call_app(api)
+    assert response['headers']['X-Cache'] == 'MISS'
+    assert response['headers']['Cache-Control'] == 'no-store'
+
+
+def test_requests_joining_a_hung_scrape_fail(local_api):
+    with LocalSite(paginated_site_pages(1)) as site:
+        api = local_api(site, 1)
+        api._RESULT_CACHE = ResultCache(wait_timeout=0.1)
+        # A scrape another request started and never finishes
+        flight, _ = api._RESULT_CACHE.begin(api.RESULT_KEY)
+        buffered = call_app(api)
+        summary = json.loads(list(api._stream_vehicles('ndjson'))[-1])['data']
+        api._RESULT_CACHE.complete(api.RESULT_KEY, flight, error=RuntimeError('done'))
+    assert buffered['statusCode'] == 500
+    assert summary['ok'] is False and summary['count'] == 0 and summary['errors']
+
+
+def test_concurrent_forced_streams_share_one_scrape(local_api):
+    def stream():
+        vehicles, summary = [], None
+        for line in api._stream_vehicles('ndjson', force=True):
+            record = json.loads(line)
+            if record['type'] == 'vehicle':
+                vehicles.append(record['data'])
+            else:
+                summary = record['data']
+        return vehicles, summary
+
+    with LocalSite(paginated_site_pages(4), latency=0.02) as site:
+        api = local_api(site, 4)
+        results = concurrently(stream)
+    states = sorted(summary['cache'] for _, summary in results)
+    assert site.requests == 4
+    assert states == ['BYPASS'] + ['COALESCED'] * (CALLERS - 1)
+    assert all(vehicles == results[0][0] and len(vehicles) == 4 * 24 for vehicles, _ in results)
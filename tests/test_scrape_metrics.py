@@ -0,0 +1,86 @@
+"""Run metrics - a crawl fills in every stage and counter, and the Prometheus/JSON outputs are well-formed"""
+
+import json
+import os
+import re
+
+import pytest
+
+from scrape_metrics import Histogram, ScrapeMetrics, STAGES
+from scrape_fixtures import LocalSite, paginated_site_pages
+from toyota_scrapper import UniversalRedDeerToyotaScraper
+
+PAGE_COUNT = 3
+
+
+@pytest.fixture(scope='module')
+def crawl(tmp_path_factory):
+    """(pages, vehicle count, metrics) of a crawl streamed to CSV"""
+    pages = paginated_site_pages(PAGE_COUNT)
+    with LocalSite(pages) as site:
+        scraper = UniversalRedDeerToyotaScraper(max_workers=2, max_pages=PAGE_COUNT, requests_per_second=None,
+                                                metrics=ScrapeMetrics())
+        scraper.target_url = site.url
+        count = scraper.stream_to_csv(scraper.iter_vehicles(),
+                                      os.path.join(str(tmp_path_factory.mktemp('metrics')), 'inventory.csv'))
+    scraper.metrics.finish()
+    return pages, count, scraper.metrics
+
+
+def test_every_stage_timed(crawl):
+    _, _, metrics = crawl
+    stages = metrics.report()['stages']
+    assert [stage for stage in STAGES if not stages[stage]['calls']] == []
+    assert stages['fetch']['calls'] == PAGE_COUNT
+
+
+def test_pages_cards_and_fields_counted(crawl):
+    pages, count, metrics = crawl
+    report = metrics.report()
+    counters = report['counters']
+    assert counters['pages_fetched'] == PAGE_COUNT
+    assert counters['bytes_downloaded'] == sum(len(body) for body in pages.values())
+    assert counters['cards_seen'] == count + counters.get('cards_rejected', 0) + counters.get('duplicates_dropped', 0)
+    assert report['histograms']['card_extract_seconds']['count'] == counters['cards_extracted']
+    assert report['field_hit_rates']['year'] == 1.0
+
+
+def test_prometheus_text_parses(crawl):
+    _, _, metrics = crawl
+    prometheus = metrics.to_prometheus()
+    samples = [line for line in prometheus.splitlines() if line and not line.startswith('#')]
+    assert samples
+    assert [line for line in samples if not re.match(r'^[a-z_]+(\{[^}]*\})? -?[\d.e+-]+$', line)] == []
+    assert 'scraper_card_extract_seconds_bucket{le="+Inf"} ' in prometheus
+
+
+def test_json_report_round_trips(crawl, tmp_path):
+    _, _, metrics = crawl
+    path = os.path.join(str(tmp_path), 'metrics.json')
+    metrics.write_report(path)
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f)['counters'] == metrics.report()['counters']
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = ScrapeMetrics(enabled=False)
+    with metrics.stage('parse'):
+        pass
+    metrics.add_time('fetch', 0.5)
+    metrics.count('pages_fetched')
+    metrics.observe('card_extract_seconds', 0.001)
+    report = metrics.report()
+    assert report['counters'] == {} and report['histograms'] == {}
+    assert all(stage['calls'] == 0 for stage in report['stages'].values())
+
+
+def test_histogram_quantiles():
+    histogram = Histogram(buckets=(0.001, 0.01, 0.1))
+    assert histogram.quantile(0.5) is None
+    for value in [0.0005] * 50 + [0.005] * 45 + [0.05] * 5:
+        histogram.observe(value)
+    assert histogram.quantile(0.5) == pytest.approx(0.001)
+    assert histogram.quantile(0.95) == pytest.approx(0.01)
+    assert 0.01 < histogram.quantile(0.99) <= 0.05
+    assert histogram.quantile(1.0) == 0.05
+    assert histogram.snapshot()['buckets'] == {'0.001': 50, '0.01': 45, '0.1': 5, '+Inf': 0}
@@ -0,0 +1,93 @@
+"""Stage-scoped profiler - samples filed under their thread's stage, well-formed outputs, ?profile=1 behind the secret"""
+
+import asyncio
+import json
+import re
+
+import pytest
+
+from scrape_profiler import SamplingProfiler, profiling
+from scrape_fixtures import LocalSite, call_app, paginated_site_pages
+from toyota_scrapper import UniversalRedDeerToyotaScraper
+
+PAGE_COUNT = 4
+SECRET = 'test-secret'
+
+
+@pytest.fixture(scope='module')
+def profiled():
+    """(scraper, profiler, vehicles) of a crawl run under the profiler"""
+    with LocalSite(paginated_site_pages(PAGE_COUNT, cards_per_page=100)) as site:
+        scraper = UniversalRedDeerToyotaScraper(max_workers=2, max_pages=PAGE_COUNT, cache_dir=None,
+                                                requests_per_second=None)
+        scraper.target_url = site.url
+        profiler = SamplingProfiler(interval=0.001, top=10)
+        with profiling(scraper, profiler):
+            vehicles = scraper.scrape_inventory()
+    return scraper, profiler, vehicles
+
+
+def test_samples_filed_under_their_stage(profiled):
+    scraper, profiler, _ = profiled
+    assert not scraper.metrics.enabled and scraper.metrics.profiler is None
+    assert {'fetch', 'parse', 'extract'} <= set(profiler.report()['stages'])
+    assert any('extract_card_data' in label for stack in profiler.counts if stack[0] == 'extract'
+               for label in stack[1:])
+
+
+def test_written_profiles_are_well_formed(profiled, tmp_path):
+    _, profiler, _ = profiled
+    report = profiler.report()
+    paths = profiler.write(str(tmp_path))
+
+    with open(paths['collapsed'], encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert lines and [line for line in lines if not re.match(r'^[a-z]+(;[^;]+)+ \d+$', line)] == []
+    assert sum(int(line.rsplit(' ', 1)[1]) for line in lines) == report['samples']
+
+    with open(paths['speedscope'], encoding='utf-8') as f:
+        speedscope = json.load(f)
+    frame_count = len(speedscope['shared']['frames'])
+    assert {profile['name'] for profile in speedscope['profiles']} == set(report['stages'])
+    assert all(index < frame_count for profile in speedscope['profiles']
+               for sample in profile['samples'] for index in sample)
+
+    with open(paths['top'], encoding='utf-8') as f:
+        assert f.read().startswith('all stages')
+
+
+def test_stages_on_an_event_loop_are_ignored():
+    profiler = SamplingProfiler()
+
+    async def stage():
+        profiler.enter_stage('dedup')
+        await asyncio.sleep(0)
+        profiler.exit_stage('dedup')
+        return dict(profiler.active)
+    assert asyncio.run(stage()) == {}
+
+    profiler.enter_stage('parse')
+    profiler.enter_stage('extract')
+    profiler.exit_stage('parse')
+    assert list(profiler.active.values()) == [['parse', 'extract']]
+
+
+def test_profile_needs_the_secret(local_api):
+    with LocalSite(paginated_site_pages(1)) as site:
+        api = local_api(site, 1)
+        api.ACTION_SECRET = SECRET
+        assert call_app(api, {'profile': '1'})['statusCode'] == 401
+        assert call_app(api, {'profile': '1'}, headers={'x-action-secret': 'wrong'})['statusCode'] == 401
+
+
+@pytest.mark.parametrize('use_async', [False, True], ids=['sync', 'async'])
+def test_profile_runs_on_a_scraper_of_its_own(local_api, use_async):
+    with LocalSite(paginated_site_pages(2)) as site:
+        api = local_api(site, 2, use_async=use_async)
+        api.ACTION_SECRET = SECRET
+        response = call_app(api, {'profile': '1'}, headers={'x-action-secret': SECRET})
+    assert response['statusCode'] == 200
+    body = json.loads(response['body'])
+    assert body['count'] == 2 * 24 and body['profile']['samples'] and body['collapsed']
+    # Neither the process-wide scraper nor the result cache was touched
+    assert api._SCRAPER is None and not api._RESULT_CACHE.entries
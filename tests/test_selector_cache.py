@@ -0,0 +1,55 @@
+"""Adaptive selector cache - the remembered winner finds the same vehicles alone, a re-templated site is relearned"""
+
+import os
+
+import pytest
+
+from scrape_fixtures import late_selector_page
+from toyota_scrapper import SelectorCache, UniversalRedDeerToyotaScraper
+
+URL = 'https://dealer.example/inventory/used/?page={}'
+PAGE_COUNT = 3
+CARDS = 20
+
+
+def process(cache, pages):
+    """Vehicle dicts from every page, each on a fresh scraper sharing the cache"""
+    vehicles = []
+    for number, content in enumerate(pages, 1):
+        scraper = UniversalRedDeerToyotaScraper(cache_dir=None)
+        scraper.selector_cache = cache
+        vehicles.extend(vehicle.to_dict() for vehicle in scraper.process_page(content, URL.format(number))[1])
+    return vehicles
+
+
+@pytest.fixture
+def pages():
+    return [late_selector_page(CARDS, seed=number) for number in range(1, PAGE_COUNT + 1)]
+
+
+@pytest.fixture
+def learned(pages, tmp_path):
+    """Path of a selector cache saved by a run that probed the pages - and that run's vehicles"""
+    path = os.path.join(str(tmp_path), 'selectors.json')
+    cache = SelectorCache(path)
+    vehicles = process(cache, pages)
+    cache.save()
+    return path, vehicles
+
+
+def test_remembered_winner_alone_finds_the_same_vehicles(pages, learned):
+    path, probed = learned
+    cache = SelectorCache(path)
+    assert process(cache, pages) == probed and len(probed) == PAGE_COUNT * CARDS
+    assert {row['selector'] for row in cache.report()} == {'.listing-item'}
+
+
+def test_retemplated_site_is_relearned(learned):
+    path, _ = learned
+    redesigned = [late_selector_page(CARDS, seed=number, card_class='srp-list-item')
+                  for number in range(1, PAGE_COUNT + 1)]
+    cache = SelectorCache(path)
+    assert len(process(cache, redesigned)) == PAGE_COUNT * CARDS
+    report = {row['selector']: row for row in cache.report()}
+    assert report['.srp-list-item']['wins'] == PAGE_COUNT
+    assert report['.listing-item']['tries'] == 1
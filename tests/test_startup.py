@@ -0,0 +1,53 @@
+"""Cold start and warm invocations - heavy imports deferred, the scraper reused while warm"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import toyota_scrapper
+from scrape_fixtures import LocalSite, call_app, paginated_site_pages
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(toyota_scrapper.__file__))
+API_DIR = os.path.normpath(os.path.join(SCRIPT_DIR, '..', '..', 'api'))
+
+
+def imported_modules(statement, cwd):
+    result = subprocess.run([sys.executable, '-c', statement + '; import sys; print(" ".join(sys.modules))'],
+                            cwd=cwd, capture_output=True, text=True, check=True)
+    return set(result.stdout.split())
+
+
+def test_scraper_import_defers_optional_backends():
+    modules = imported_modules('import toyota_scrapper', SCRIPT_DIR)
+    assert 'toyota_scrapper' in modules
+    assert not {'aiohttp', 'multiprocessing'} & modules
+
+
+def test_endpoint_import_defers_the_scraper():
+    modules = imported_modules('import scrape', API_DIR)
+    assert 'scrape' in modules and 'toyota_scrapper' not in modules
+
+
+@pytest.mark.parametrize('use_async', [False, True], ids=['sync', 'async'])
+def test_warm_invocations_reuse_the_scraper(local_api, use_async):
+    tables = (toyota_scrapper.MAKE_MODEL_MATCHER, toyota_scrapper.TRIM_COMPOUND_REGEX, toyota_scrapper.TRIM_WORDS)
+    with LocalSite(paginated_site_pages(2)) as site:
+        api = local_api(site, 2, use_async=use_async)
+        states = []
+        for _ in range(2):
+            result = call_app(api, {'force': '1'})
+            assert result['statusCode'] == 200 and json.loads(result['body'])['count'] > 0
+            scraper = api._SCRAPER
+            states.append((scraper, scraper.session, getattr(scraper, 'http', None), scraper.make_model_matcher))
+    assert all(first is second for first, second in zip(*states))
+    http = states[1][2]
+    if use_async and toyota_scrapper.async_backend_available():
+        assert http is not None and not http.closed
+    else:
+        assert http is None
+    assert states[1][3] is tables[0]
+    assert tables == (toyota_scrapper.MAKE_MODEL_MATCHER, toyota_scrapper.TRIM_COMPOUND_REGEX,
+                      toyota_scrapper.TRIM_WORDS)
@@ -0,0 +1,68 @@
+"""Streaming pipeline - iter_vehicles and the streaming writers match the buffered scrape"""
+
+import json
+import os
+import time
+
+from scrape_fixtures import LocalSite, paginated_site_pages
+from toyota_scrapper import UniversalRedDeerToyotaScraper
+
+
+def make_scraper(site):
+    scraper = UniversalRedDeerToyotaScraper(max_workers=4, max_pages=5, requests_per_second=None)
+    scraper.target_url = site.url
+    return scraper
+
+
+def test_iter_vehicles_matches_scrape_inventory():
+    with LocalSite(paginated_site_pages(5)) as site:
+        expected = [vehicle.to_dict() for vehicle in make_scraper(site).scrape_inventory()]
+        streamed = [vehicle.to_dict() for vehicle in make_scraper(site).iter_vehicles()]
+    assert streamed == expected
+
+
+def test_first_vehicle_arrives_before_the_crawl_ends():
+    with LocalSite(paginated_site_pages(16), latency=0.05) as site:
+        scraper = UniversalRedDeerToyotaScraper(max_workers=2, max_pages=16, requests_per_second=None,
+                                                cache_dir=None)
+        scraper.target_url = site.url
+        started = time.perf_counter()
+        first = None
+        count = 0
+        for _ in scraper.iter_vehicles():
+            first = first or time.perf_counter() - started
+            count += 1
+        elapsed = time.perf_counter() - started
+    assert count == 16 * 24
+    assert first < elapsed / 4, (first, elapsed)
+
+
+def test_streamed_csv_matches_buffered_csv(tmp_path):
+    buffered_path = os.path.join(str(tmp_path), 'buffered.csv')
+    streamed_path = os.path.join(str(tmp_path), 'streamed.csv')
+    with LocalSite(paginated_site_pages(5)) as site:
+        scraper = make_scraper(site)
+        scraper.scrape_inventory()
+        scraper.save_to_csv(buffered_path)
+        scraper = make_scraper(site)
+        count = scraper.stream_to_csv(scraper.iter_vehicles(), streamed_path)
+    with open(buffered_path, encoding='utf-8') as buffered, open(streamed_path, encoding='utf-8') as streamed:
+        assert streamed.read() == buffered.read()
+    assert count == 5 * 24
+
+
+def test_streamed_ndjson_holds_every_vehicle(tmp_path):
+    path = os.path.join(str(tmp_path), 'inventory.ndjson')
+    with LocalSite(paginated_site_pages(5)) as site:
+        expected = [vehicle.to_dict() for vehicle in make_scraper(site).scrape_inventory()]
+        scraper = make_scraper(site)
+        scraper.stream_to_ndjson(scraper.iter_vehicles(), path)
+    with open(path, encoding='utf-8') as f:
+        assert [json.loads(line) for line in f] == expected
+
+
+def test_nothing_written_without_vehicles(tmp_path):
+    path = os.path.join(str(tmp_path), 'inventory.csv')
+    scraper = UniversalRedDeerToyotaScraper()
+    assert scraper.stream_to_csv(iter([]), path) == 0
+    assert not os.path.exists(path)
@@ -0,0 +1,34 @@
+"""JSON-LD and embedded inventory JSON - read exactly, before the HTML heuristics"""
+
+import re
+
+import pytest
+
+from scrape_fixtures import structured_listing_page, synthetic_vehicle_records
+from toyota_scrapper import UniversalRedDeerToyotaScraper
+
+URL = 'http://localhost/inventory/used/'
+
+
+def process(content):
+    _, vehicles, page_urls = UniversalRedDeerToyotaScraper().process_page(content, URL)
+    return vehicles, page_urls
+
+
+def html_only_page(records):
+    return re.sub(rb'<script>.*?</script>', b'', structured_listing_page(records, 'none'), flags=re.S)
+
+
+@pytest.mark.parametrize('kind', ['json-ld', 'embedded-json'])
+def test_structured_data_matches_the_inventory(kind):
+    records = synthetic_vehicle_records(200)
+    vehicles, page_urls = process(structured_listing_page(records, kind))
+    assert [vehicle.to_dict() for vehicle in vehicles] == records
+    assert page_urls == process(html_only_page(records))[1]
+
+
+def test_html_heuristics_without_structured_data():
+    records = synthetic_vehicle_records(200)
+    vehicles, page_urls = process(html_only_page(records))
+    assert len(vehicles) == len(records)
+    assert page_urls
@@ -0,0 +1,31 @@
+"""Vehicle records - the API/CSV shapes are the string dicts the scraper always produced"""
+
+import csv
+import io
+
+from scrape_fixtures import synthetic_vehicle_records
+from toyota_scrapper import CSV_FIELDNAMES, Vehicle
+
+
+def test_to_dict_round_trips_csv_rows():
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDNAMES)
+    writer.writeheader()
+    writer.writerows(synthetic_vehicle_records(1000))
+    rows = list(csv.DictReader(io.StringIO(buffer.getvalue())))
+    assert [Vehicle.from_dict(row).to_dict() for row in rows] == rows
+
+
+def test_to_row_round_trips():
+    vehicle = Vehicle.from_dict({'makeName': 'Toyota', 'year': '2020', 'model': 'RAV4', 'value': '$30,000',
+                                 'mileage': '41,250 km', 'stock_number': 'A1'})
+    assert (vehicle.year, vehicle.value, vehicle.mileage) == (2020, 30000, 41250)
+    assert Vehicle.from_row(vehicle.to_row()) == vehicle
+    assert len(vehicle.to_row()) == len(CSV_FIELDNAMES)
+
+
+def test_to_dict_only_adds_dealer_fields_when_set():
+    vehicle = Vehicle(makeName='Toyota', year=2020, model='RAV4')
+    assert list(vehicle.to_dict()) == CSV_FIELDNAMES
+    assert Vehicle(makeName='Toyota', dealer_id='north').to_dict()['dealer_id'] == 'north'
+    assert vehicle.get('sub-model') == '' and vehicle.get('year') == '2020'